@@ -11,12 +11,18 @@ import "./Components/QuizPage.scss"
 
 interface QuizOption {
   text: string;
-  is_correct: boolean;
 }
 
 interface QuizQuestion {
+  id: string;
   question: string;
   options: QuizOption[];
+}
+
+interface GradeResult {
+  id: string;
+  correct: boolean;
+  correct_option: number;
   explanation: string;
 }
 
@@ -37,6 +43,9 @@ export default function QuizPage() {
   const [isAnswered, setIsAnswered] = useState(false);
   const [score, setScore] = useState(0);
   const [quizCompleted, setQuizCompleted] = useState(false);
+  const [quizId, setQuizId] = useState<string | null>(null);
+  const [result, setResult] = useState<GradeResult | null>(null);
+  const [gradeError, setGradeError] = useState<string | null>(null);
   const queryParams = new URLSearchParams(location.search)
   const storyId = queryParams.get("storyId")
 
@@ -53,6 +62,7 @@ export default function QuizPage() {
         
         if (data.success && data.quiz) {
           setQuiz(data.quiz)
+          setQuizId(data.storyId || storyId)
         } else {
           console.error("Quiz data not found:", data)
         }
@@ -71,17 +81,33 @@ export default function QuizPage() {
     setSelectedOption(index);
   };
 
-  const handleCheckAnswer = () => {
-    if (selectedOption === null || !quiz) return;
+  const handleCheckAnswer = async () => {
+    if (selectedOption === null || !quiz || !quizId) return;
 
-    setIsAnswered(true);
-    // Find the correct answer index
-    const correctIndex = quiz.questions[currentQuestion].options.findIndex(
-      option => option.is_correct
-    );
-    
-    if (selectedOption === correctIndex) {
-      setScore(score + 1);
+    // Answers are graded on the server; the quiz payload has no answer key
+    const questionId = quiz.questions[currentQuestion].id;
+    setGradeError(null);
+    try {
+      const response = await fetch(`http://localhost:8000/api/quiz/${quizId}/grade`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ answers: { [questionId]: selectedOption } })
+      })
+      const data = await response.json().catch(() => null)
+      const graded: GradeResult | undefined = data?.results?.[0]
+      if (!response.ok || !graded) {
+        throw new Error(data?.detail || `Grading failed with status ${response.status}`)
+      }
+
+      setResult(graded);
+      setIsAnswered(true);
+      if (graded.correct) {
+        setScore(score + 1);
+      }
+    } catch (error) {
+      // The answer stays selected and unanswered, so Check Answer retries it
+      console.error("Error grading answer:", error)
+      setGradeError("Couldn't check your answer. Please try again.")
     }
   };
 
@@ -92,6 +118,8 @@ export default function QuizPage() {
       setCurrentQuestion(currentQuestion + 1);
       setSelectedOption(null);
       setIsAnswered(false);
+      setResult(null);
+      setGradeError(null);
     } else {
       setQuizCompleted(true);
     }
@@ -102,6 +130,8 @@ export default function QuizPage() {
       setCurrentQuestion(currentQuestion - 1);
       setSelectedOption(null);
       setIsAnswered(false);
+      setResult(null);
+      setGradeError(null);
     }
   };
 
@@ -181,7 +211,7 @@ export default function QuizPage() {
                       className={`quiz-option ${
                         selectedOption === index
                           ? isAnswered
-                            ? option.is_correct
+                            ? result?.correct_option === index
                               ? "correct"
                               : "incorrect"
                             : "selected"
@@ -198,7 +228,7 @@ export default function QuizPage() {
                         {option.text}
                       </Label>
                       {isAnswered &&
-                        (option.is_correct ? (
+                        (result?.correct_option === index ? (
                           <CheckCircle2 className="quiz-option-icon correct" />
                         ) : (
                           selectedOption === index && <XCircle className="quiz-option-icon incorrect" />
@@ -207,10 +237,16 @@ export default function QuizPage() {
                   ))}
                 </RadioGroup>
                 
-                {isAnswered && (
+                {gradeError && !isAnswered && (
+                  <div className="quiz-grade-error" role="alert">
+                    <p>{gradeError}</p>
+                  </div>
+                )}
+
+                {isAnswered && result && (
                   <div className="quiz-explanation">
                     <h4>Explanation:</h4>
-                    <p>{quiz.questions[currentQuestion].explanation}</p>
+                    <p>{result.explanation}</p>
                   </div>
                 )}
               </div>
@@ -233,7 +269,7 @@ export default function QuizPage() {
                     disabled={selectedOption === null}
                     className="check-button"
                   >
-                    Check Answer
+                    {gradeError ? "Retry" : "Check Answer"}
                   </Button>
                 ) : (
                   <Button
@@ -0,0 +1,146 @@
+"""
+Admission control for expensive endpoints.
+
+An AdmissionController lets at most ``limit`` requests run at once and parks
+up to ``queue_size`` more in FIFO order. A request is turned away immediately
+(Overloaded, reported as 503 with Retry-After) when the queue is full or when
+its expected wait, estimated from recent service times, is beyond the
+deadline. A queued request that is still waiting at the deadline is turned
+away too, so callers never wait longer than the deadline for a slot.
+
+Controllers are used from the event loop only and need no locks.
+"""
+import os
+import math
+import time
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Deque, Dict
+
+GENERATE_CONCURRENCY = int(os.getenv("GENERATE_CONCURRENCY", "4"))
+GENERATE_QUEUE_SIZE = int(os.getenv("GENERATE_QUEUE_SIZE", "16"))
+GENERATE_QUEUE_DEADLINE = float(os.getenv("GENERATE_QUEUE_DEADLINE_SECONDS", "30"))
+FOLLOWUP_CONCURRENCY = int(os.getenv("FOLLOWUP_CONCURRENCY", "8"))
+FOLLOWUP_QUEUE_SIZE = int(os.getenv("FOLLOWUP_QUEUE_SIZE", "32"))
+FOLLOWUP_QUEUE_DEADLINE = float(os.getenv("FOLLOWUP_QUEUE_DEADLINE_SECONDS", "15"))
+# Weight of the newest sample in the service-time moving average
+SERVICE_TIME_ALPHA = 0.2
+
+
+class Overloaded(Exception):
+    def __init__(self, name: str, reason: str, retry_after: float):
+        super().__init__(f"{name} is overloaded ({reason})")
+        self.name = name
+        self.reason = reason
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+class AdmissionController:
+    def __init__(self, name: str, limit: int, queue_size: int, deadline: float, expected_seconds: float):
+        self.name = name
+        self.limit = max(1, limit)
+        self.queue_size = max(0, queue_size)
+        self.deadline = deadline
+        self.service_seconds = expected_seconds
+        self._active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+        self.admitted = 0
+        self.queued = 0
+        self.rejected_queue_full = 0
+        self.rejected_deadline = 0
+        self.timed_out = 0
+        self.max_waiting = 0
+        self._wait_total = 0.0
+
+    def expected_wait(self, position: int) -> float:
+        """Estimated seconds until the request at queue ``position`` (1-based) gets a slot"""
+        return math.ceil(position / self.limit) * self.service_seconds
+
+    def _reject(self, reason: str, retry_after: float) -> None:
+        if reason == "queue_full":
+            self.rejected_queue_full += 1
+        elif reason == "deadline":
+            self.rejected_deadline += 1
+        else:
+            self.timed_out += 1
+        raise Overloaded(self.name, reason, retry_after)
+
+    async def _acquire(self) -> float:
+        """Take a slot, waiting in the queue if needed; returns the seconds spent waiting"""
+        if self._active < self.limit and not self._waiters:
+            self._active += 1
+            return 0.0
+
+        position = len(self._waiters) + 1
+        expected = self.expected_wait(position)
+        if len(self._waiters) >= self.queue_size:
+            self._reject("queue_full", expected)
+        if expected > self.deadline:
+            self._reject("deadline", expected)
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self.queued += 1
+        self.max_waiting = max(self.max_waiting, len(self._waiters))
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(waiter, timeout=self.deadline)
+        except asyncio.TimeoutError:
+            self._discard(waiter)
+            self._reject("timeout", self.expected_wait(len(self._waiters) + 1))
+        except asyncio.CancelledError:
+            # The client went away; if a slot was already handed over, pass it on
+            if waiter.done() and not waiter.cancelled():
+                self._release()
+            else:
+                self._discard(waiter)
+            raise
+        return time.monotonic() - started
+
+    def _discard(self, waiter: asyncio.Future) -> None:
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    def _release(self) -> None:
+        """Hand the slot to the oldest live waiter, or free it"""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._active -= 1
+
+    @asynccontextmanager
+    async def admit(self):
+        """Hold a slot for the duration of the block; raises Overloaded when shedding load"""
+        waited = await self._acquire()
+        self.admitted += 1
+        self._wait_total += waited
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - started
+            self.service_seconds += SERVICE_TIME_ALPHA * (elapsed - self.service_seconds)
+            self._release()
+
+    def stats(self) -> Dict:
+        return {
+            "limit": self.limit,
+            "queue_size": self.queue_size,
+            "deadline_seconds": self.deadline,
+            "active": self._active,
+            "waiting": len(self._waiters),
+            "max_waiting": self.max_waiting,
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "rejected_queue_full": self.rejected_queue_full,
+            "rejected_deadline": self.rejected_deadline,
+            "timed_out": self.timed_out,
+            "avg_wait_seconds": self._wait_total / self.admitted if self.admitted else 0.0,
+            "service_seconds": round(self.service_seconds, 3),
+        }
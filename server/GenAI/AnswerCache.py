@@ -0,0 +1,178 @@
+import os
+import re
+import time
+import zlib
+import random
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_THRESHOLD = float(os.getenv("TUTOR_CACHE_THRESHOLD", "0.8"))
+DEFAULT_MAX_ENTRIES = int(os.getenv("TUTOR_CACHE_SIZE", "512"))
+DEFAULT_TTL_SECONDS = float(os.getenv("TUTOR_CACHE_TTL_SECONDS", "86400"))
+
+# Mersenne prime used for the universal hash family
+_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+def normalize_question(text: str) -> str:
+    """Lowercase, strip punctuation and collapse whitespace"""
+    text = re.sub(r"[^a-z0-9\s]", " ", (text or "").lower())
+    return " ".join(text.split())
+
+
+def shingles(text: str, size: int = 3) -> FrozenSet[str]:
+    """Character n-gram shingles of the normalized question"""
+    normalized = normalize_question(text)
+    if len(normalized) <= size:
+        return frozenset([normalized]) if normalized else frozenset()
+    return frozenset(normalized[i:i + size] for i in range(len(normalized) - size + 1))
+
+
+def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class AnswerCache:
+    """
+    Offline near-duplicate cache for tutor answers.
+
+    Questions are reduced to character shingles, signed with MinHash and
+    bucketed by LSH bands. A lookup only compares against questions sharing
+    at least one band, then confirms with the exact Jaccard similarity.
+    """
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 ttl_seconds: float = DEFAULT_TTL_SECONDS, num_perm: int = 64, bands: int = 16,
+                 seed: int = 42):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.bands = bands
+        self.rows = num_perm // bands
+
+        rng = random.Random(seed)
+        self._coefficients = [(rng.randrange(1, _PRIME), rng.randrange(0, _PRIME)) for _ in range(num_perm)]
+
+        # entry id -> (shingles, signature, answer, created_at)
+        self._entries: "OrderedDict[int, Tuple[FrozenSet[str], Tuple[int, ...], str, float]]" = OrderedDict()
+        self._buckets: Dict[Tuple[int, Tuple[int, ...]], set] = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+        # Expired entries met by lookups are dropped at once; the rest by a sweep on put
+        self._sweep_interval = min(self.ttl_seconds, 60.0)
+        self._last_sweep = time.monotonic()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _signature(self, shingle_set: FrozenSet[str]) -> Tuple[int, ...]:
+        hashed = [zlib.crc32(s.encode("utf-8")) for s in shingle_set]
+        return tuple(
+            min(((a * h + b) % _PRIME) & _MAX_HASH for h in hashed)
+            for a, b in self._coefficients
+        )
+
+    def _band_keys(self, signature: Tuple[int, ...]) -> List[Tuple[int, Tuple[int, ...]]]:
+        return [(band, signature[band * self.rows:(band + 1) * self.rows]) for band in range(self.bands)]
+
+    def _remove(self, entry_id: int) -> None:
+        """Drop an entry and its bucket memberships (caller must hold the lock)"""
+        _, signature, _, _ = self._entries.pop(entry_id)
+        for band_key in self._band_keys(signature):
+            bucket = self._buckets.get(band_key)
+            if bucket is not None:
+                bucket.discard(entry_id)
+                if not bucket:
+                    del self._buckets[band_key]
+
+    def _purge_expired(self, now: float) -> None:
+        """Drop every expired entry (caller must hold the lock)"""
+        expired = [entry_id for entry_id, entry in self._entries.items() if now - entry[3] > self.ttl_seconds]
+        for entry_id in expired:
+            self._remove(entry_id)
+        self.expirations += len(expired)
+        self._last_sweep = now
+
+    def get(self, question: str) -> Optional[str]:
+        """Return a cached answer for a near-duplicate question, or None"""
+        shingle_set = shingles(question)
+        if not shingle_set:
+            return None
+        signature = self._signature(shingle_set)
+        now = time.monotonic()
+
+        with self._lock:
+            candidates = set()
+            for band_key in self._band_keys(signature):
+                candidates |= self._buckets.get(band_key, set())
+
+            best_id, best_score = None, 0.0
+            for entry_id in candidates:
+                entry_shingles, _, _, created_at = self._entries[entry_id]
+                if now - created_at > self.ttl_seconds:
+                    self._remove(entry_id)
+                    self.expirations += 1
+                    continue
+                score = jaccard(shingle_set, entry_shingles)
+                if score > best_score:
+                    best_id, best_score = entry_id, score
+
+            if best_id is None or best_score < self.threshold:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._entries.move_to_end(best_id)
+            logger.info(f"Tutor answer cache hit (similarity {best_score:.2f})")
+            return self._entries[best_id][2]
+
+    def put(self, question: str, answer: str) -> None:
+        """Cache an answer, evicting the least recently used entries beyond capacity"""
+        shingle_set = shingles(question)
+        if not shingle_set or not answer:
+            return
+        signature = self._signature(shingle_set)
+        now = time.monotonic()
+
+        with self._lock:
+            if now - self._last_sweep >= self._sweep_interval:
+                self._purge_expired(now)
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = (shingle_set, signature, answer, now)
+            for band_key in self._band_keys(signature):
+                self._buckets.setdefault(band_key, set()).add(entry_id)
+
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._buckets.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "threshold": self.threshold,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
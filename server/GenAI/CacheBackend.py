@@ -0,0 +1,334 @@
+import os
+import re
+import json
+import bisect
+import socket
+import sqlite3
+import logging
+import threading
+import itertools
+from collections.abc import MutableMapping
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory").lower()
+CACHE_SQLITE_PATH = os.getenv("CACHE_SQLITE_PATH", os.path.join("output", "cache.sqlite3"))
+CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/0")
+
+
+class CacheBackend(MutableMapping):
+    """
+    Dict-like cache of JSON-serializable values that remembers insertion order.
+
+    Subclasses only differ in where entries live; web_server.py uses them
+    exactly like the plain dicts they replace.
+    """
+
+    backend_name = "base"
+
+    def latest_key(self) -> Optional[str]:
+        """Most recently inserted key, or None when empty"""
+        last = None
+        for last in self:
+            pass
+        return last
+
+    def position(self, key: str) -> Optional[int]:
+        """Insertion position of ``key`` (positive, increasing, never reused), or None when missing"""
+        for position, existing in enumerate(self, 1):
+            if existing == key:
+                return position
+        return None
+
+    def keys_after(self, position: int, limit: int) -> List[Tuple[int, str]]:
+        """Up to ``limit`` (position, key) pairs inserted after ``position``, oldest first"""
+        return list(itertools.islice(
+            ((current, key) for current, key in enumerate(self, 1) if current > position), limit
+        ))
+
+    def clear(self) -> None:
+        for key in list(self):
+            del self[key]
+
+    def ping(self) -> bool:
+        """Check that the backend is reachable"""
+        len(self)
+        return True
+
+
+class MemoryCache(CacheBackend):
+    """Per-process cache; the default for single-worker deployments"""
+
+    backend_name = "memory"
+
+    def __init__(self):
+        self._data = {}
+        # Insertion positions, and (position, key) pairs in order for range reads
+        self._positions: Dict[str, int] = {}
+        self._order: List[Tuple[int, str]] = []
+        self._next_position = 1
+
+    def __getitem__(self, key: str) -> Any:
+        return self._data[key]
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key not in self._positions:
+            self._positions[key] = self._next_position
+            self._order.append((self._next_position, key))
+            self._next_position += 1
+        self._data[key] = value
+
+    def __delitem__(self, key: str) -> None:
+        del self._data[key]
+        del self._positions[key]
+        # Deleted keys stay in the order list until they outnumber the live ones
+        if len(self._order) > 2 * len(self._positions) + 64:
+            self._order = [(position, key) for position, key in self._order if self._positions.get(key) == position]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._data))
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._data
+
+    def latest_key(self) -> Optional[str]:
+        return next(reversed(self._data), None)
+
+    def position(self, key: str) -> Optional[int]:
+        return self._positions.get(key)
+
+    def keys_after(self, position: int, limit: int) -> List[Tuple[int, str]]:
+        order = self._order
+        result = []
+        for index in range(bisect.bisect_right(order, position, key=lambda entry: entry[0]), len(order)):
+            current, key = order[index]
+            if self._positions.get(key) == current:
+                result.append((current, key))
+                if len(result) == limit:
+                    break
+        return result
+
+    def clear(self) -> None:
+        self._data.clear()
+        self._positions.clear()
+        self._order = []
+
+
+class SQLiteCache(CacheBackend):
+    """
+    Cache shared by every process on the node through one SQLite file in WAL
+    mode, so readers never block the writer.
+    """
+
+    backend_name = "sqlite"
+
+    def __init__(self, path: str, namespace: str):
+        self.path = path
+        self.table = "cache_" + re.sub(r"\W", "_", namespace)
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn().execute(
+            f"CREATE TABLE IF NOT EXISTS {self.table} ("
+            "seq INTEGER PRIMARY KEY AUTOINCREMENT, key TEXT UNIQUE NOT NULL, value TEXT NOT NULL)"
+        )
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite3 connections cannot be shared across threads; keep one per thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def __getitem__(self, key: str) -> Any:
+        row = self._conn().execute(f"SELECT value FROM {self.table} WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            raise KeyError(key)
+        return json.loads(row[0])
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self._conn().execute(
+            f"INSERT INTO {self.table} (key, value) VALUES (?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (key, json.dumps(value))
+        )
+
+    def __delitem__(self, key: str) -> None:
+        cursor = self._conn().execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+        if cursor.rowcount == 0:
+            raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        rows = self._conn().execute(f"SELECT key FROM {self.table} ORDER BY seq").fetchall()
+        return iter([row[0] for row in rows])
+
+    def __len__(self) -> int:
+        return self._conn().execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+    def __contains__(self, key: object) -> bool:
+        return self._conn().execute(
+            f"SELECT 1 FROM {self.table} WHERE key = ?", (key,)
+        ).fetchone() is not None
+
+    def latest_key(self) -> Optional[str]:
+        row = self._conn().execute(f"SELECT key FROM {self.table} ORDER BY seq DESC LIMIT 1").fetchone()
+        return row[0] if row else None
+
+    def position(self, key: str) -> Optional[int]:
+        row = self._conn().execute(f"SELECT seq FROM {self.table} WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def keys_after(self, position: int, limit: int) -> List[Tuple[int, str]]:
+        rows = self._conn().execute(
+            f"SELECT seq, key FROM {self.table} WHERE seq > ? ORDER BY seq LIMIT ?", (position, limit)
+        ).fetchall()
+        return [(row[0], row[1]) for row in rows]
+
+    def clear(self) -> None:
+        self._conn().execute(f"DELETE FROM {self.table}")
+
+
+class RedisError(Exception):
+    pass
+
+
+class RedisCache(CacheBackend):
+    """
+    Cache on any server speaking the Redis protocol (Redis, KeyDB, or a local
+    stand-in). Insertion order is kept in a sorted set scored by a counter.
+    """
+
+    backend_name = "redis"
+
+    def __init__(self, url: str, namespace: str, timeout: float = 5.0):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.password = parsed.password
+        self.timeout = timeout
+        self.prefix = f"fintales:{namespace}:"
+        self.index_key = f"fintales:{namespace}:__index__"
+        self.seq_key = f"fintales:{namespace}:__seq__"
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+            conn = (sock, sock.makefile("rb"))
+            self._local.conn = conn
+            if self.password:
+                self._command("AUTH", self.password)
+            if self.db:
+                self._command("SELECT", self.db)
+        return conn
+
+    def _read_reply(self, reader) -> Any:
+        line = reader.readline()
+        if not line:
+            raise ConnectionError("Connection closed by server")
+        kind, payload = line[:1], line[1:-2]
+        if kind == b"+":
+            return payload.decode()
+        if kind == b"-":
+            raise RedisError(payload.decode())
+        if kind == b":":
+            return int(payload)
+        if kind == b"$":
+            length = int(payload)
+            if length < 0:
+                return None
+            data = reader.read(length + 2)
+            return data[:-2].decode()
+        if kind == b"*":
+            length = int(payload)
+            if length < 0:
+                return None
+            return [self._read_reply(reader) for _ in range(length)]
+        raise RedisError(f"Unexpected reply: {line!r}")
+
+    def _command(self, *args) -> Any:
+        sock, reader = self._connection()
+        parts = [f"*{len(args)}\r\n".encode()]
+        for arg in args:
+            data = str(arg).encode()
+            parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        try:
+            sock.sendall(b"".join(parts))
+            return self._read_reply(reader)
+        except OSError:
+            # Drop the broken connection so the next call reconnects
+            self._local.conn = None
+            raise
+
+    def __getitem__(self, key: str) -> Any:
+        value = self._command("GET", self.prefix + key)
+        if value is None:
+            raise KeyError(key)
+        return json.loads(value)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self._command("SET", self.prefix + key, json.dumps(value))
+        # NX keeps the original position when an existing key is overwritten
+        seq = self._command("INCR", self.seq_key)
+        self._command("ZADD", self.index_key, "NX", seq, key)
+
+    def __delitem__(self, key: str) -> None:
+        if not self._command("DEL", self.prefix + key):
+            raise KeyError(key)
+        self._command("ZREM", self.index_key, key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._command("ZRANGE", self.index_key, 0, -1) or [])
+
+    def __len__(self) -> int:
+        return self._command("ZCARD", self.index_key)
+
+    def __contains__(self, key: object) -> bool:
+        return bool(self._command("EXISTS", self.prefix + str(key)))
+
+    def latest_key(self) -> Optional[str]:
+        keys: List[str] = self._command("ZRANGE", self.index_key, -1, -1) or []
+        return keys[0] if keys else None
+
+    def position(self, key: str) -> Optional[int]:
+        score = self._command("ZSCORE", self.index_key, key)
+        return int(float(score)) if score is not None else None
+
+    def keys_after(self, position: int, limit: int) -> List[Tuple[int, str]]:
+        reply = self._command(
+            "ZRANGEBYSCORE", self.index_key, f"({position}", "+inf", "WITHSCORES", "LIMIT", 0, limit
+        ) or []
+        return [(int(float(score)), key) for key, score in zip(reply[::2], reply[1::2])]
+
+    def clear(self) -> None:
+        keys = list(self)
+        if keys:
+            self._command("DEL", *[self.prefix + key for key in keys])
+        # The counter is kept so positions handed out in cursors are never reused
+        self._command("DEL", self.index_key)
+
+    def ping(self) -> bool:
+        return self._command("PING") == "PONG"
+
+
+def create_cache(namespace: str, backend: Optional[str] = None) -> CacheBackend:
+    """Build the configured cache backend (CACHE_BACKEND=memory|sqlite|redis)"""
+    backend = (backend or CACHE_BACKEND).lower()
+    if backend == "sqlite":
+        return SQLiteCache(CACHE_SQLITE_PATH, namespace)
+    if backend == "redis":
+        return RedisCache(CACHE_REDIS_URL, namespace)
+    if backend != "memory":
+        logger.warning(f"Unknown CACHE_BACKEND '{backend}', using in-memory cache")
+    return MemoryCache()
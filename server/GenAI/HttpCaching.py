@@ -0,0 +1,43 @@
+"""
+Conditional GET helpers: content-hash ETags and If-None-Match handling.
+"""
+import os
+import json
+import hashlib
+from typing import Dict, List, Optional
+
+# Cached stories never change after generation, so clients may reuse them briefly
+# and revalidate cheaply with If-None-Match afterwards
+STORY_CACHE_CONTROL = os.getenv("STORY_CACHE_CONTROL", "private, max-age=300, must-revalidate")
+# The latest story changes whenever a new one is generated; always revalidate
+LATEST_CACHE_CONTROL = os.getenv("LATEST_STORY_CACHE_CONTROL", "private, no-cache")
+
+
+def content_hash(payload: Dict) -> str:
+    """Stable hash of a JSON-serializable payload (key order does not matter)"""
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:32]
+
+
+def make_etag(digest: str, variant: Optional[List[str]] = None) -> str:
+    """
+    Weak ETag for a representation; projected (fields=) bodies get their own tag.
+
+    GZipMiddleware compresses bodies after the tag is set, so the same tag covers
+    the gzip and identity bytes. That only holds for a weak (semantic) validator.
+    """
+    if variant:
+        suffix = hashlib.sha256(",".join(variant).encode("utf-8")).hexdigest()[:8]
+        return f'W/"{digest}-{suffix}"'
+    return f'W/"{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match check (RFC 9110 uses weak comparison here)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return any(tag.removeprefix("W/") == opaque for tag in candidates)
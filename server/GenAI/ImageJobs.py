@@ -0,0 +1,343 @@
+"""
+Durable image jobs.
+
+Each story's images are one job in a local SQLite file, with a row per asset
+(cover, characters, backgrounds) recording its state, attempts and uploaded
+URL. Running a job only renders assets that are not done yet, so re-running a
+job after a crash or a failed upload never generates an uploaded asset again.
+
+A runner holds a lease on the job while it works. If the process dies, the
+lease expires and ImageJobWorker (or any process sharing the file) picks the
+job up where it stopped. Failed assets are retried with exponential backoff
+until IMAGE_JOB_MAX_ATTEMPTS is reached.
+
+The worker only resumes jobs attached to a served story, since nothing else
+would ever show their images. Jobs whose render was preempted are cancelled,
+and jobs that never got a story within IMAGE_JOB_ORPHAN_SECONDS (a pooled
+story that expired or was thrown away) are cancelled too.
+"""
+import os
+import json
+import time
+import socket
+import sqlite3
+import logging
+import threading
+from typing import Callable, Dict, List, Optional
+from HttpCaching import content_hash
+from WorkScheduler import Preempted
+
+logger = logging.getLogger(__name__)
+
+IMAGE_JOBS = os.getenv("IMAGE_JOBS", "true").lower() in ("1", "true", "yes")
+IMAGE_JOBS_PATH = os.getenv("IMAGE_JOBS_PATH", os.path.join("output", "image_jobs.sqlite3"))
+IMAGE_JOB_MAX_ATTEMPTS = int(os.getenv("IMAGE_JOB_MAX_ATTEMPTS", "3"))
+IMAGE_JOB_RETRY_SECONDS = float(os.getenv("IMAGE_JOB_RETRY_SECONDS", "30"))
+# How long a runner may hold a job before others assume it died
+IMAGE_JOB_LEASE_SECONDS = float(os.getenv("IMAGE_JOB_LEASE_SECONDS", "600"))
+IMAGE_JOB_POLL_SECONDS = float(os.getenv("IMAGE_JOB_POLL_SECONDS", "30"))
+# Unattached jobs older than this belong to stories nobody was served (defaults to the pool's max age)
+IMAGE_JOB_ORPHAN_SECONDS = float(os.getenv("IMAGE_JOB_ORPHAN_SECONDS", os.getenv("STORY_POOL_MAX_AGE_SECONDS", "3600")))
+
+PENDING, RUNNING, DONE, FAILED, CANCELLED = "pending", "running", "done", "failed", "cancelled"
+
+
+def image_job_id(story_data: Dict) -> str:
+    """Job id for a story; derived from its content so re-enqueueing the same story is a no-op"""
+    return content_hash({k: v for k, v in story_data.items() if k != "generated_images"})
+
+
+class ImageJobQueue:
+    def __init__(self, path: str, max_attempts: int = IMAGE_JOB_MAX_ATTEMPTS,
+                 retry_seconds: float = IMAGE_JOB_RETRY_SECONDS, lease_seconds: float = IMAGE_JOB_LEASE_SECONDS,
+                 orphan_seconds: float = IMAGE_JOB_ORPHAN_SECONDS):
+        self.path = path
+        self.max_attempts = max(1, max_attempts)
+        self.retry_seconds = retry_seconds
+        self.lease_seconds = lease_seconds
+        self.orphan_seconds = orphan_seconds
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS image_jobs ("
+            "job_id TEXT PRIMARY KEY, story_id TEXT, payload TEXT NOT NULL, state TEXT NOT NULL, "
+            "owner TEXT, lease_until REAL NOT NULL DEFAULT 0, created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS image_assets ("
+            "job_id TEXT NOT NULL, asset TEXT NOT NULL, position INTEGER NOT NULL, spec TEXT NOT NULL, "
+            "state TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0, next_attempt_at REAL NOT NULL DEFAULT 0, "
+            "url TEXT, error TEXT, PRIMARY KEY (job_id, asset))"
+        )
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite3 connections cannot be shared across threads; keep one per thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def enqueue(self, job_id: str, payload: Dict, assets: List[Dict]) -> None:
+        """Record a job and its assets; a job that already exists keeps its progress"""
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT OR IGNORE INTO image_jobs (job_id, payload, state, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (job_id, json.dumps(payload), PENDING, now, now)
+            )
+            # The same story generated again revives a job given up with its first copy
+            conn.execute(
+                "UPDATE image_jobs SET state = ?, created_at = ?, updated_at = ? WHERE job_id = ? AND state = ?",
+                (PENDING, now, now, job_id, CANCELLED)
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO image_assets (job_id, asset, position, spec, state) VALUES (?, ?, ?, ?, ?)",
+                [(job_id, spec["asset"], position, json.dumps(spec), PENDING) for position, spec in enumerate(assets)]
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def attach(self, job_id: str, story_id: str) -> bool:
+        """Remember which cached story the job's images belong to"""
+        cursor = self._conn().execute(
+            "UPDATE image_jobs SET story_id = ?, updated_at = ? WHERE job_id = ?", (story_id, time.time(), job_id)
+        )
+        return cursor.rowcount == 1
+
+    def job(self, job_id: str) -> Optional[Dict]:
+        row = self._conn().execute(
+            "SELECT job_id, story_id, payload, state FROM image_jobs WHERE job_id = ?", (job_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        return {"job_id": row[0], "story_id": row[1], "payload": json.loads(row[2]), "state": row[3]}
+
+    def assets(self, job_id: str) -> List[Dict]:
+        rows = self._conn().execute(
+            "SELECT spec, state, attempts, url, error FROM image_assets WHERE job_id = ? ORDER BY position", (job_id,)
+        ).fetchall()
+        return [{**json.loads(spec), "state": state, "attempts": attempts, "url": url, "error": error}
+                for spec, state, attempts, url, error in rows]
+
+    def urls(self, job_id: str) -> Dict[str, str]:
+        """Uploaded URL per asset for the assets that are done"""
+        rows = self._conn().execute(
+            "SELECT asset, url FROM image_assets WHERE job_id = ? AND state = ?", (job_id, DONE)
+        ).fetchall()
+        return dict(rows)
+
+    def claim(self, job_id: str) -> bool:
+        """Take the job's lease unless another live runner holds it"""
+        now = time.time()
+        cursor = self._conn().execute(
+            "UPDATE image_jobs SET state = ?, owner = ?, lease_until = ?, updated_at = ? "
+            "WHERE job_id = ? AND state IN (?, ?) AND lease_until < ?",
+            (RUNNING, self.owner, now + self.lease_seconds, now, job_id, PENDING, RUNNING, now)
+        )
+        return cursor.rowcount == 1
+
+    def release(self, job_id: str) -> str:
+        """Give up the lease and settle the job's state from its assets; returns the new state"""
+        conn = self._conn()
+        # Assets left running by an interrupted render are tried again (their attempt already counts)
+        conn.execute("UPDATE image_assets SET state = ? WHERE job_id = ? AND state = ?", (PENDING, job_id, RUNNING))
+        counts = dict(conn.execute(
+            "SELECT state, COUNT(*) FROM image_assets WHERE job_id = ? GROUP BY state", (job_id,)
+        ).fetchall())
+        if counts.get(PENDING):
+            state = PENDING
+        elif counts.get(FAILED):
+            state = FAILED
+        else:
+            state = DONE
+        conn.execute(
+            "UPDATE image_jobs SET state = ?, owner = NULL, lease_until = 0, updated_at = ? "
+            "WHERE job_id = ? AND state != ?",
+            (state, time.time(), job_id, CANCELLED)
+        )
+        return state
+
+    def cancel(self, job_id: str) -> None:
+        """Give up on a job whose story will never be served; its finished assets are kept"""
+        conn = self._conn()
+        conn.execute("UPDATE image_assets SET state = ? WHERE job_id = ? AND state = ?", (PENDING, job_id, RUNNING))
+        conn.execute(
+            "UPDATE image_jobs SET state = ?, owner = NULL, lease_until = 0, updated_at = ? "
+            "WHERE job_id = ? AND state IN (?, ?)",
+            (CANCELLED, time.time(), job_id, PENDING, RUNNING)
+        )
+        logger.info(f"Cancelled image job {job_id}")
+
+    def _due_assets(self, job_id: str) -> List[Dict]:
+        rows = self._conn().execute(
+            "SELECT spec FROM image_assets WHERE job_id = ? AND state IN (?, ?) AND next_attempt_at <= ? "
+            "ORDER BY position",
+            (job_id, PENDING, RUNNING, time.time())
+        ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def _start(self, job_id: str, asset: str) -> None:
+        self._conn().execute(
+            "UPDATE image_assets SET state = ?, attempts = attempts + 1 WHERE job_id = ? AND asset = ?",
+            (RUNNING, job_id, asset)
+        )
+
+    def _finish(self, job_id: str, asset: str, url: str) -> None:
+        self._conn().execute(
+            "UPDATE image_assets SET state = ?, url = ?, error = NULL WHERE job_id = ? AND asset = ?",
+            (DONE, url, job_id, asset)
+        )
+
+    def _fail(self, job_id: str, asset: str, error: str) -> None:
+        attempts = self._conn().execute(
+            "SELECT attempts FROM image_assets WHERE job_id = ? AND asset = ?", (job_id, asset)
+        ).fetchone()[0]
+        if attempts >= self.max_attempts:
+            state, next_attempt_at = FAILED, 0
+            logger.error(f"Image {asset} of job {job_id} failed after {attempts} attempts: {error}")
+        else:
+            state, next_attempt_at = PENDING, time.time() + self.retry_seconds * 2 ** (attempts - 1)
+            logger.warning(f"Image {asset} of job {job_id} failed (attempt {attempts}), retrying later: {error}")
+        self._conn().execute(
+            "UPDATE image_assets SET state = ?, next_attempt_at = ?, error = ? WHERE job_id = ? AND asset = ?",
+            (state, next_attempt_at, error, job_id, asset)
+        )
+
+    def run(self, job_id: str, render: Callable[[Dict], Optional[str]]) -> Dict[str, str]:
+        """
+        Render the job's due assets once each with ``render(spec) -> url`` and
+        return the URLs of every asset that is done. Assets that are already
+        done are skipped; a job leased by another runner is left to it.
+        """
+        if not self.claim(job_id):
+            logger.info(f"Image job {job_id} is finished or held by another runner")
+            return self.urls(job_id)
+        try:
+            for spec in self._due_assets(job_id):
+                self._start(job_id, spec["asset"])
+                try:
+                    url = render(spec)
+                except Preempted:
+                    # Pre-generation gave way to users and its story is dropped; nothing will show these images
+                    self.cancel(job_id)
+                    raise
+                except Exception as e:
+                    self._fail(job_id, spec["asset"], str(e))
+                    continue
+                if url:
+                    self._finish(job_id, spec["asset"], url)
+                else:
+                    self._fail(job_id, spec["asset"], "no image generated")
+        finally:
+            self.release(job_id)
+        return self.urls(job_id)
+
+    def expire_orphans(self) -> int:
+        """Cancel unfinished jobs that never got a story within the orphan timeout"""
+        now = time.time()
+        cursor = self._conn().execute(
+            "UPDATE image_jobs SET state = ?, owner = NULL, lease_until = 0, updated_at = ? "
+            "WHERE story_id IS NULL AND state IN (?, ?) AND lease_until < ? AND created_at < ?",
+            (CANCELLED, now, PENDING, RUNNING, now, now - self.orphan_seconds)
+        )
+        if cursor.rowcount:
+            logger.info(f"Cancelled {cursor.rowcount} image jobs that never got a story")
+        return cursor.rowcount
+
+    def next_runnable(self) -> Optional[Dict]:
+        """Oldest unfinished job of a served story that nobody holds and that has an asset due"""
+        self.expire_orphans()
+        now = time.time()
+        row = self._conn().execute(
+            "SELECT j.job_id FROM image_jobs j WHERE j.state IN (?, ?) AND j.story_id IS NOT NULL "
+            "AND j.lease_until < ? AND EXISTS ("
+            "SELECT 1 FROM image_assets a WHERE a.job_id = j.job_id AND a.state IN (?, ?) AND a.next_attempt_at <= ?"
+            ") ORDER BY j.created_at LIMIT 1",
+            (PENDING, RUNNING, now, PENDING, RUNNING, now)
+        ).fetchone()
+        return self.job(row[0]) if row else None
+
+    def stats(self) -> Dict:
+        conn = self._conn()
+        return {
+            "jobs": dict(conn.execute("SELECT state, COUNT(*) FROM image_jobs GROUP BY state").fetchall()),
+            "assets": dict(conn.execute("SELECT state, COUNT(*) FROM image_assets GROUP BY state").fetchall()),
+            "max_attempts": self.max_attempts,
+        }
+
+
+class ImageJobWorker:
+    """Background thread that finishes interrupted jobs and retries failed assets"""
+
+    def __init__(self, queue: ImageJobQueue, runner: Callable[[Dict], None],
+                 poll_seconds: float = IMAGE_JOB_POLL_SECONDS):
+        self.queue = queue
+        self.runner = runner
+        self.poll_seconds = poll_seconds
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, name="image-jobs", daemon=True)
+            self._thread.start()
+
+    def wake(self) -> None:
+        """Look for runnable jobs now instead of at the next poll"""
+        self._wake.set()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def run_pending(self) -> int:
+        """Run every job that is runnable right now; returns how many were run"""
+        ran = 0
+        while not self._stopped.is_set():
+            job = self.queue.next_runnable()
+            if job is None:
+                break
+            logger.info(f"Resuming image job {job['job_id']}")
+            try:
+                self.runner(job)
+            except Exception:
+                logger.exception(f"Image job {job['job_id']} failed")
+                # The job stays runnable; wait for the next poll instead of spinning on it
+                break
+            ran += 1
+        return ran
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            self.run_pending()
+            self._wake.wait(self.poll_seconds)
+            self._wake.clear()
+
+
+_queue: Optional[ImageJobQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_image_jobs() -> ImageJobQueue:
+    """Process-wide job queue at IMAGE_JOBS_PATH"""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = ImageJobQueue(IMAGE_JOBS_PATH)
+        return _queue
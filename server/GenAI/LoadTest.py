@@ -0,0 +1,508 @@
+#!/usr/bin/env python3
+"""
+Load generator that replays learner journeys against the web server.
+
+Each virtual user loops the journey a learner takes in the client: load user
+data, generate a story, fetch it, request the quiz and the summary, then list
+stories. Concurrency is ramped through the given levels and each level
+reports throughput, error rate and latency percentiles per step.
+
+By default the real app is served in-process by uvicorn with the Gemini
+client and the Cloudinary uploader replaced by stand-ins that sleep for a
+configurable latency and return valid payloads, so no quota is spent. In
+that mode the server's event-loop lag and threadpool usage are sampled too,
+and the saturation curve names the bottleneck at the knee. Pool refills and
+background image jobs are switched off so only the journeys' own requests
+reach the model, and everything the server writes goes to a temporary
+directory. With --url the harness drives an already running server (loop
+and pool stats unavailable).
+
+    python LoadTest.py --levels 1,2,4,8,16 --duration 20
+    python LoadTest.py --url http://localhost:8000 --levels 1,4,16 --json report.json
+"""
+import io
+import os
+import re
+import sys
+import json
+import math
+import time
+import random
+import asyncio
+import argparse
+import itertools
+import tempfile
+import threading
+from contextlib import contextmanager
+from functools import partial
+from types import SimpleNamespace
+from typing import Callable, Dict, List, Optional
+
+import httpx
+
+STEPS = ("load_user_data", "generate", "fetch", "quiz", "summary", "list")
+DEFAULT_LEVELS = (1, 2, 4, 8, 16)
+LOOP_PROBE_INTERVAL = 0.05
+# p95 event-loop lag above this means handlers are blocking the loop
+LOOP_LAG_BOTTLENECK = 0.1
+# A level that adds users but less than this much throughput is past the knee
+KNEE_MIN_GAIN = 0.1
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile; 0.0 for no samples"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+# --- Model and CDN stand-ins -------------------------------------------------
+
+_story_counter = itertools.count(1)
+
+
+def _standin_story(prompt: str) -> Dict:
+    interest = re.search(r"Character/Reference: (.+)", prompt)
+    subtopic = re.search(r"story segment about (.+?) of the", prompt)
+    interest = interest.group(1).strip() if interest else "Spider-Man"
+    subtopic = subtopic.group(1).strip() if subtopic else "saving"
+    number = next(_story_counter)
+    return {
+        "plot": {
+            "title": f"{interest}'s {subtopic} Journey #{number}",
+            "setup": f"{interest} needs to learn about {subtopic}.",
+            "locations": {"primary": "Home", "secondary": "Market", "tertiary": "Bank"},
+        },
+        "dialogue": [
+            {"character": interest, "text": f"Step {i + 1}: I set aside part of my allowance for {subtopic}.",
+             "hint": "Save a little every week"}
+            for i in range(5)
+        ],
+        "visuals": {
+            "characters": [{"name": interest, "description": "Learning to plan money"}],
+            "backgrounds": [
+                {"name": "Home", "description": "A desk with a savings chart", "type": "primary"},
+                {"name": "Market", "description": "Shelves full of temptations", "type": "secondary"},
+                {"name": "Bank", "description": "Celebrating a savings goal", "type": "tertiary"},
+            ],
+            "financial_elements": "Savings jar and a weekly budget chart",
+        },
+        "hooks": {"pop_culture": interest, "music": "Upbeat"},
+    }
+
+
+def _standin_quiz(difficulty: str = "beginner", age_group: str = "10-12") -> Dict:
+    return {
+        "topic": "Saving",
+        "difficulty": difficulty,
+        "age_group": age_group,
+        "questions": [
+            {
+                "question": f"Question {i + 1}: what is the best way to reach a savings goal?",
+                "options": [
+                    {"text": "Save a fixed amount every week", "is_correct": True},
+                    {"text": "Spend first and save what is left", "is_correct": False},
+                    {"text": "Borrow from friends", "is_correct": False},
+                    {"text": "Wait for a lucky break", "is_correct": False},
+                ],
+                "explanation": "Regular saving adds up.",
+            }
+            for i in range(5)
+        ],
+    }
+
+
+def _standin_text(prompt: str) -> str:
+    if "financial literacy story segment" in prompt:
+        return json.dumps(_standin_story(prompt))
+    if "Generate three financial literacy quizzes" in prompt:
+        return json.dumps({level: _standin_quiz(level, age) for level, age in
+                           (("beginner", "10-12"), ("intermediate", "12-14"), ("advanced", "14-16"))})
+    if "financial literacy quiz" in prompt:
+        return json.dumps(_standin_quiz())
+    if "JSON summary" in prompt:
+        title = re.search(r"lessons from (.+?)\.\n", prompt)
+        return json.dumps({
+            "topic": title.group(1) if title else "Saving",
+            "learning_summary": {
+                "key_points": ["Set a goal", "Save regularly", "Track progress"],
+                "benefits": ["Less stress", "Reach goals sooner", "Better habits"],
+                "real_world_example": "Saving $10 a week for a $100 game.",
+            },
+        })
+    return "Saved part of the allowance."
+
+
+_png_bytes: Optional[bytes] = None
+
+
+def _standin_png() -> bytes:
+    global _png_bytes
+    if _png_bytes is None:
+        from PIL import Image
+        buffer = io.BytesIO()
+        Image.new("RGB", (8, 8), (255, 200, 0)).save(buffer, format="PNG")
+        _png_bytes = buffer.getvalue()
+    return _png_bytes
+
+
+def _sleep(latency: float) -> None:
+    # The SDK calls are blocking, so the stand-ins block too (+-20% jitter)
+    if latency > 0:
+        time.sleep(latency * random.uniform(0.8, 1.2))
+
+
+class _StandInModels:
+    def __init__(self, model_latency: float, image_latency: float):
+        self.model_latency = model_latency
+        self.image_latency = image_latency
+
+    def generate_content(self, model: str, contents, config=None):
+        _sleep(self.model_latency)
+        return SimpleNamespace(text=_standin_text(str(contents)))
+
+    def generate_content_stream(self, model: str, contents, config=None):
+        _sleep(self.image_latency)
+        inline_data = SimpleNamespace(mime_type="image/png", data=_standin_png())
+        part = SimpleNamespace(inline_data=inline_data, text=None)
+        yield SimpleNamespace(candidates=[SimpleNamespace(content=SimpleNamespace(parts=[part]))])
+
+    def get(self, model: str):
+        return SimpleNamespace(name=model)
+
+
+class StandInClient:
+    """Drop-in for google.genai.Client returning canned payloads after a simulated latency"""
+
+    def __init__(self, api_key: Optional[str] = None, model_latency: float = 0.4, image_latency: float = 1.0, **kwargs):
+        self.models = _StandInModels(model_latency, image_latency)
+
+
+def _standin_upload(path: str, folder: str = "", public_id: str = "", latency: float = 0.15, **kwargs) -> Dict:
+    _sleep(latency)
+    return {"secure_url": f"https://cdn.local/{folder}/{public_id}.png"}
+
+
+@contextmanager
+def standins(model_latency: float = 0.4, image_latency: float = 1.0, cdn_latency: float = 0.15):
+    """Route Gemini and Cloudinary calls made by generators built inside the block to local stand-ins"""
+    import google.genai
+    import cloudinary.uploader
+    saved = (google.genai.Client, cloudinary.uploader.upload)
+    google.genai.Client = partial(StandInClient, model_latency=model_latency, image_latency=image_latency)
+    cloudinary.uploader.upload = partial(_standin_upload, latency=cdn_latency)
+    try:
+        yield
+    finally:
+        google.genai.Client, cloudinary.uploader.upload = saved
+
+
+# --- Server-side sampling ----------------------------------------------------
+
+class ServerMonitor:
+    """Samples event-loop lag and threadpool usage from inside the server's loop"""
+
+    def __init__(self, interval: float = LOOP_PROBE_INTERVAL):
+        self.interval = interval
+        self._samples: List[tuple] = []
+        self.threads_total = 0
+
+    async def run(self) -> None:
+        import anyio.to_thread
+        limiter = anyio.to_thread.current_default_thread_limiter()
+        self.threads_total = int(limiter.total_tokens)
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - started - self.interval)
+            stats = limiter.statistics()
+            self._samples.append((lag, stats.borrowed_tokens, stats.tasks_waiting))
+
+    def drain(self) -> Dict:
+        """Summary of the samples taken since the last drain"""
+        samples, self._samples = self._samples, []
+        lags = [sample[0] for sample in samples]
+        return {
+            "loop_lag_p95": percentile(lags, 95),
+            "loop_lag_max": max(lags, default=0.0),
+            "threads_busy_max": max((sample[1] for sample in samples), default=0),
+            "threads_total": self.threads_total,
+            "thread_waiters_max": max((sample[2] for sample in samples), default=0),
+        }
+
+
+def local_server_env(workdir: str) -> None:
+    """
+    Configure the in-process server. web_server reads these settings at import
+    time, so this must run before it is imported.
+    """
+    if "web_server" in sys.modules:
+        raise RuntimeError("local_server_env must run before web_server is imported")
+    os.environ.setdefault("GEMINI_API", "load-test")
+    # Pool refills and resumed image jobs would add model calls no journey made
+    os.environ["STORY_POOL_DEPTH"] = "0"
+    os.environ["IMAGE_JOBS"] = "false"
+    # Stories, caches and job databases are written under output/ relative to the
+    # working directory; summaries go to SUMMARY_DIR
+    os.environ["SUMMARY_DIR"] = os.path.join(workdir, "output", "summaries")
+    os.chdir(workdir)
+
+
+class LocalServer:
+    """The FastAPI app served by uvicorn on a free local port in a background thread"""
+
+    def __init__(self, monitor: Optional[ServerMonitor] = None):
+        self.monitor = monitor
+        self.server = None
+        self.thread = None
+        self.url = None
+
+    async def _serve(self) -> None:
+        monitor_task = asyncio.create_task(self.monitor.run()) if self.monitor else None
+        try:
+            await self.server.serve()
+        finally:
+            if monitor_task:
+                monitor_task.cancel()
+
+    def start(self, timeout: float = 30.0) -> str:
+        import uvicorn
+        from web_server import app
+        config = uvicorn.Config(app, host="127.0.0.1", port=0, log_level="warning")
+        self.server = uvicorn.Server(config)
+        self.thread = threading.Thread(target=lambda: asyncio.run(self._serve()), daemon=True)
+        self.thread.start()
+        deadline = time.monotonic() + timeout
+        while not self.server.started:
+            if time.monotonic() > deadline or not self.thread.is_alive():
+                raise RuntimeError("Local server did not start")
+            time.sleep(0.05)
+        port = self.server.servers[0].sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}"
+        return self.url
+
+    def stop(self) -> None:
+        if self.server is not None:
+            self.server.should_exit = True
+            self.thread.join(timeout=10)
+
+
+# --- Journeys and levels -----------------------------------------------------
+
+class LevelStats:
+    def __init__(self, users: int):
+        self.users = users
+        self.latencies: Dict[str, List[float]] = {step: [] for step in STEPS}
+        self.errors: Dict[str, int] = {step: 0 for step in STEPS}
+        self.journey_latencies: List[float] = []
+        self.failed_journeys = 0
+        self.elapsed = 0.0
+
+    def record(self, step: str, latency: float, ok: bool) -> None:
+        self.latencies[step].append(latency)
+        if not ok:
+            self.errors[step] += 1
+
+    def journey(self, latency: float, ok: bool) -> None:
+        if ok:
+            self.journey_latencies.append(latency)
+        else:
+            self.failed_journeys += 1
+
+    def report(self) -> Dict:
+        elapsed = self.elapsed or 1e-9
+        requests = sum(len(values) for values in self.latencies.values())
+        steps = {}
+        for step in STEPS:
+            values = self.latencies[step]
+            steps[step] = {
+                "count": len(values),
+                "errors": self.errors[step],
+                "error_rate": self.errors[step] / len(values) if values else 0.0,
+                "p50": percentile(values, 50),
+                "p90": percentile(values, 90),
+                "p99": percentile(values, 99),
+                "max": max(values, default=0.0),
+            }
+        return {
+            "users": self.users,
+            "elapsed": elapsed,
+            "journeys": len(self.journey_latencies),
+            "failed_journeys": self.failed_journeys,
+            "throughput": len(self.journey_latencies) / elapsed,
+            "requests_per_second": requests / elapsed,
+            "journey_p50": percentile(self.journey_latencies, 50),
+            "journey_p95": percentile(self.journey_latencies, 95),
+            "steps": steps,
+        }
+
+
+async def run_journey(client: httpx.AsyncClient, record: Callable[[str, float, bool], None],
+                      difficulty: str = "beginner") -> bool:
+    """One learner journey; stops at the first failed step"""
+    async def step(name: str, method: str, path: str, **kwargs) -> Optional[httpx.Response]:
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, path, **kwargs)
+            ok = response.status_code < 400
+        except httpx.HTTPError:
+            response, ok = None, False
+        record(name, time.perf_counter() - started, ok)
+        return response if ok else None
+
+    if not await step("load_user_data", "POST", "/api/load-user-data"):
+        return False
+    generated = await step("generate", "POST", "/api/generate", json={"difficulty": difficulty})
+    if not generated:
+        return False
+    story_id = generated.json()["storyId"]
+    return bool(
+        await step("fetch", "GET", f"/api/story/{story_id}")
+        and await step("quiz", "POST", "/api/generate-quiz", json={"story_id": story_id, "difficulty": difficulty})
+        and await step("summary", "POST", "/api/generate-summary", json={"story_id": story_id})
+        and await step("list", "GET", "/api/stories", params={"limit": 20})
+    )
+
+
+async def run_level(users: int, duration: float, base_url: str = "http://loadtest",
+                    transport: Optional[httpx.AsyncBaseTransport] = None, think_time: float = 0.0,
+                    timeout: float = 120.0) -> Dict:
+    """Run ``users`` concurrent journey loops for ``duration`` seconds"""
+    stats = LevelStats(users)
+    limits = httpx.Limits(max_connections=max(users, 1), max_keepalive_connections=max(users, 1))
+    async with httpx.AsyncClient(base_url=base_url, transport=transport, timeout=timeout, limits=limits) as client:
+        deadline = time.perf_counter() + duration
+
+        async def user() -> None:
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                ok = await run_journey(client, stats.record)
+                stats.journey(time.perf_counter() - started, ok)
+                if think_time:
+                    await asyncio.sleep(think_time)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(user() for _ in range(users)))
+        stats.elapsed = time.perf_counter() - started
+    return stats.report()
+
+
+async def ramp(levels: List[int], duration: float, monitor: Optional[ServerMonitor] = None, **kwargs) -> List[Dict]:
+    reports = []
+    for users in levels:
+        if monitor:
+            monitor.drain()
+        report = await run_level(users, duration, **kwargs)
+        report["server"] = monitor.drain() if monitor else None
+        reports.append(report)
+        print(f"  {users:>4} users: {report['throughput']:.2f} journeys/s, "
+              f"{report['failed_journeys']} failed, p95 {report['journey_p95']:.2f}s", file=sys.stderr)
+    return reports
+
+
+def saturation(reports: List[Dict]) -> Dict:
+    """Throughput/latency per level, the knee and what limited throughput there"""
+    curve = [{
+        "users": report["users"],
+        "throughput": report["throughput"],
+        "journey_p95": report["journey_p95"],
+        "error_rate": report["failed_journeys"] / max(report["journeys"] + report["failed_journeys"], 1),
+        "loop_lag_p95": (report.get("server") or {}).get("loop_lag_p95"),
+        "thread_waiters_max": (report.get("server") or {}).get("thread_waiters_max"),
+    } for report in reports]
+
+    knee = None
+    for previous, current in zip(curve, curve[1:]):
+        if current["throughput"] < previous["throughput"] * (1 + KNEE_MIN_GAIN):
+            knee = current
+            break
+    knee_users = None
+    if knee is not None:
+        knee_users = curve[curve.index(knee) - 1]["users"]
+
+    point = knee or (curve[-1] if curve else None)
+    if point is None or point["loop_lag_p95"] is None:
+        bottleneck = "unknown"
+    elif point["thread_waiters_max"]:
+        bottleneck = "worker pool"
+    elif point["loop_lag_p95"] >= LOOP_LAG_BOTTLENECK:
+        bottleneck = "event loop"
+    elif knee is None:
+        bottleneck = "not saturated"
+    else:
+        bottleneck = "downstream latency"
+    return {"curve": curve, "knee_users": knee_users, "bottleneck": bottleneck}
+
+
+def format_report(reports: List[Dict], curve: Dict) -> str:
+    lines = []
+    for report in reports:
+        lines.append(f"\n{report['users']} users: {report['journeys']} journeys in {report['elapsed']:.1f}s "
+                     f"({report['throughput']:.2f}/s, {report['requests_per_second']:.1f} req/s), "
+                     f"{report['failed_journeys']} failed")
+        lines.append(f"  {'step':<16}{'count':>7}{'err%':>7}{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}")
+        for step, row in report["steps"].items():
+            lines.append(f"  {step:<16}{row['count']:>7}{row['error_rate'] * 100:>7.1f}"
+                         f"{row['p50'] * 1000:>9.0f}{row['p90'] * 1000:>9.0f}{row['p99'] * 1000:>9.0f}")
+        if report.get("server"):
+            server = report["server"]
+            lines.append(f"  event loop lag p95 {server['loop_lag_p95'] * 1000:.0f} ms (max {server['loop_lag_max'] * 1000:.0f}),"
+                         f" threads busy {server['threads_busy_max']}/{server['threads_total']},"
+                         f" waiting {server['thread_waiters_max']}")
+
+    lines.append("\nSaturation curve (journeys/s)")
+    peak = max((point["throughput"] for point in curve["curve"]), default=0.0) or 1.0
+    for point in curve["curve"]:
+        bar = "#" * int(round(30 * point["throughput"] / peak))
+        lag = "" if point["loop_lag_p95"] is None else f"  loop lag p95 {point['loop_lag_p95'] * 1000:.0f} ms"
+        lines.append(f"  {point['users']:>4} | {bar:<30} {point['throughput']:6.2f}  p95 {point['journey_p95']:.2f}s{lag}")
+    knee = f"knee at {curve['knee_users']} users" if curve["knee_users"] is not None else "no knee in the tested range"
+    lines.append(f"  {knee}; bottleneck: {curve['bottleneck']}")
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replay learner journeys against the web server")
+    parser.add_argument("--url", help="drive a running server instead of an in-process one with stand-ins")
+    parser.add_argument("--levels", default=",".join(map(str, DEFAULT_LEVELS)), help="comma-separated user counts")
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds per level")
+    parser.add_argument("--think-time", type=float, default=0.0, help="seconds between journeys per user")
+    parser.add_argument("--timeout", type=float, default=120.0, help="per-request timeout")
+    parser.add_argument("--model-latency", type=float, default=0.4, help="stand-in text model latency")
+    parser.add_argument("--image-latency", type=float, default=1.0, help="stand-in image model latency")
+    parser.add_argument("--cdn-latency", type=float, default=0.15, help="stand-in CDN upload latency")
+    parser.add_argument("--json", help="also write the full report to this file")
+    args = parser.parse_args()
+    levels = [int(level) for level in args.levels.split(",") if level.strip()]
+    options = {"think_time": args.think_time, "timeout": args.timeout}
+
+    if args.url:
+        reports = asyncio.run(ramp(levels, args.duration, base_url=args.url, **options))
+    else:
+        cwd = os.getcwd()
+        with tempfile.TemporaryDirectory(prefix="loadtest-") as workdir:
+            local_server_env(workdir)
+            monitor = ServerMonitor()
+            server = LocalServer(monitor)
+            try:
+                with standins(args.model_latency, args.image_latency, args.cdn_latency):
+                    url = server.start()
+                    try:
+                        reports = asyncio.run(ramp(levels, args.duration, monitor=monitor, base_url=url, **options))
+                    finally:
+                        server.stop()
+            finally:
+                os.chdir(cwd)
+
+    curve = saturation(reports)
+    print(format_report(reports, curve))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"levels": reports, "saturation": curve}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""
+Process-wide logging setup.
+
+Records are handed to a queue on the calling thread and formatted and written
+by a QueueListener thread, so request handlers never block on stderr. Each
+record carries the request id and story id of the request that produced it.
+LOG_FORMAT=json (the default) writes one JSON object per line; LOG_FORMAT=text
+keeps the classic format for local development.
+
+High-volume INFO/DEBUG lines can be sampled with LOG_INFO_SAMPLE_RATE. The
+decision is made per request id, so a sampled request keeps all of its lines;
+warnings and errors are never dropped.
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import zlib
+import queue
+import atexit
+import random
+import logging
+import logging.handlers
+import contextvars
+from typing import Dict, Optional
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+LOG_INFO_SAMPLE_RATE = float(os.getenv("LOG_INFO_SAMPLE_RATE", "1.0"))
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+request_id_var: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("request_id", default=None)
+story_id_var: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("story_id", default=None)
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional[logging.Handler] = None
+
+
+def bind_story(story_id: Optional[str]) -> None:
+    """Tag the remaining log lines of the current request with a story id"""
+    story_id_var.set(story_id)
+
+
+class ContextFilter(logging.Filter):
+    """Copies the request and story ids onto the record on the calling thread"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        record.story_id = story_id_var.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps a ``rate`` fraction of INFO and DEBUG records, chosen per request"""
+
+    def __init__(self, rate: float = LOG_INFO_SAMPLE_RATE):
+        super().__init__()
+        self.rate = rate
+        self.dropped = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.rate >= 1.0 or record.levelno >= logging.WARNING:
+            return True
+        request_id = getattr(record, "request_id", None)
+        if request_id:
+            keep = zlib.crc32(request_id.encode("utf-8")) % 10000 < self.rate * 10000
+        else:
+            keep = random.random() < self.rate
+        if not keep:
+            self.dropped += 1
+        return keep
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """Resolves the message and traceback on the caller's thread, leaves formatting to the listener"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for field in ("request_id", "story_id"):
+            value = getattr(record, field, None)
+            if value:
+                entry[field] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+def configure_logging(level: str = LOG_LEVEL, fmt: str = LOG_FORMAT,
+                      sample_rate: float = LOG_INFO_SAMPLE_RATE, stream=None) -> logging.Handler:
+    """Route the root logger through a queue; calling it again replaces the previous setup"""
+    global _listener, _queue_handler
+    shutdown_logging()
+
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(JsonFormatter() if fmt == "json" else logging.Formatter(TEXT_FORMAT))
+
+    handler = _QueueHandler(queue.SimpleQueue())
+    handler.addFilter(ContextFilter())
+    handler.addFilter(SamplingFilter(sample_rate))
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level)
+
+    _listener = logging.handlers.QueueListener(handler.queue, output, respect_handler_level=True)
+    _listener.start()
+    _queue_handler = handler
+    return handler
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the listener thread"""
+    global _listener, _queue_handler
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+    if _queue_handler is not None:
+        logging.getLogger().removeHandler(_queue_handler)
+        _queue_handler = None
+
+
+atexit.register(shutdown_logging)
+
+
+class RequestContextMiddleware:
+    """
+    ASGI middleware that gives every request an id (X-Request-ID, generated
+    when the client sends none) and writes one access line when it finishes.
+    """
+
+    def __init__(self, app, logger_name: str = "web_server.access"):
+        self.app = app
+        self.logger = logging.getLogger(logger_name)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        incoming = next((value for key, value in scope.get("headers", ()) if key == b"x-request-id"), None)
+        request_id = incoming.decode("latin-1")[:64] if incoming else uuid.uuid4().hex
+        request_token = request_id_var.set(request_id)
+        story_token = story_id_var.set(None)
+        scope.setdefault("state", {})
+        status = {"code": 500}
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                message = {**message, "headers": list(message.get("headers", [])) + [(b"x-request-id", request_id.encode("latin-1"))]}
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            story_id_var.set(scope["state"].get("story_id") or scope.get("path_params", {}).get("story_id"))
+            self.logger.info(f"{scope.get('method')} {scope.get('path')} {status['code']} "
+                             f"{(time.perf_counter() - started) * 1000:.1f}ms")
+            story_id_var.reset(story_token)
+            request_id_var.reset(request_token)
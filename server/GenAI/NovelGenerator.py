@@ -1,36 +1,47 @@
 import os
+import copy
 import json
 import io
+import hashlib
 import datetime, traceback
 import mimetypes
 import random
 import logging
-from PIL import Image
+import threading
+from collections import OrderedDict
 from dotenv import load_dotenv
-from google import genai
-from google.genai import types
-from google.genai.errors import ClientError
 from pydantic import BaseModel, Field, ValidationError
 from typing import List, Dict, Optional
-import cloudinary
-import cloudinary.uploader
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+from startup import lazy_import
+from StoryIndex import StoryIndex
+from StoryArchive import STORY_ARCHIVE, get_archive
+from WorkScheduler import IMAGES, scheduler, work_class_var
+from ImageJobs import IMAGE_JOBS, get_image_jobs, image_job_id
+
+# Heavy dependencies are imported on first use so importing this module stays cheap
+genai = lazy_import("google.genai")
+types = lazy_import("google.genai.types")
+errors = lazy_import("google.genai.errors")
+Image = lazy_import("PIL.Image")
+cloudinary = lazy_import("cloudinary", "cloudinary.uploader")
+
 logger = logging.getLogger(__name__)
 
 load_dotenv()
 API_KEY = os.getenv("GEMINI_API")
 
-# Configure Cloudinary
-cloudinary.config(
-    cloud_name=os.getenv('CLOUD_NAME'),
-    api_key=os.getenv('CLOUDINARY_API_KEY'),
-    api_secret=os.getenv('CLOUDINARY_API_SECRET')
-)
+_cloudinary_configured = False
+
+def configure_cloudinary():
+    """Configure Cloudinary once, on the first upload"""
+    global _cloudinary_configured
+    if not _cloudinary_configured:
+        cloudinary.config(
+            cloud_name=os.getenv('CLOUD_NAME'),
+            api_key=os.getenv('CLOUDINARY_API_KEY'),
+            api_secret=os.getenv('CLOUDINARY_API_SECRET')
+        )
+        _cloudinary_configured = True
 
 # Pydantic Models
 class Character(BaseModel):
@@ -81,6 +92,11 @@ class GameState(BaseModel):
     selected_interest: Optional[Dict[str, str]] = None
     user_data: Optional[Dict] = None
 
+def images_fingerprint(generated_images: Optional[Dict]) -> str:
+    """Hash of a story's generated_images; the frontend view only changes when this does"""
+    canonical = json.dumps(generated_images or {}, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+
 class FinancialNovelGenerator:
     def __init__(self):
         try:
@@ -99,6 +115,12 @@ class FinancialNovelGenerator:
             logger.error(traceback.format_exc())
             raise
 
+    def fork(self) -> "FinancialNovelGenerator":
+        """Generator sharing this one's client but with its own game state, for concurrent requests"""
+        forked = copy.copy(self)
+        forked.game_state = self.game_state.model_copy(deep=True)
+        return forked
+
     def load_user_data(self):
         """Load user preferences from interests.json file"""
         try:
@@ -180,10 +202,11 @@ class FinancialNovelGenerator:
         interest = random.choice(interests[category])
         return {"category": category, "interest": interest}
 
-    def upload_to_cloudinary(self, image: Image, folder: str, public_id: str) -> str:
+    def upload_to_cloudinary(self, image: "Image.Image", folder: str, public_id: str) -> str:
         """Upload image to Cloudinary with error handling"""
         if not image:
             raise ValueError("Image cannot be None")
+        configure_cloudinary()
         
         sanitized_id = public_id.lower().replace(' ', '_').replace('&', 'and')
         sanitized_id = ''.join(c for c in sanitized_id if c.isalnum() or c == '_')
@@ -303,10 +326,11 @@ class FinancialNovelGenerator:
             
             # Make API call with error handling
             try:
-                response = self.client.models.generate_content(
-                    model='gemini-2.0-flash-001',
-                    contents=prompt_template,
-                )
+                with scheduler.slot():
+                    response = self.client.models.generate_content(
+                        model='gemini-2.0-flash-001',
+                        contents=prompt_template,
+                    )
                 
                 if not response or not hasattr(response, 'text') or not response.text:
                     raise ValueError("Invalid or empty response from API")
@@ -326,8 +350,8 @@ class FinancialNovelGenerator:
                 logger.info(f"Successfully generated story: {validated_story.plot.title}")
                 return validated_story
                 
-            except ClientError as e:
-                error_code = getattr(e, 'status_code', 'UNKNOWN')
+            except errors.ClientError as e:
+                error_code = getattr(e, 'status_code', None) or getattr(e, 'code', 'UNKNOWN')
                 error_message = str(e)
                 logger.error(f"Gemini API error (code: {error_code}): {error_message}")
                 
@@ -373,17 +397,73 @@ class FinancialNovelGenerator:
         frontend_stories_dir = os.path.join("output", "frontend_stories")
         os.makedirs(frontend_stories_dir, exist_ok=True)
         
-        frontend_story = self.format_story_for_frontend(story_data)
+        frontend_story = stored_frontend_view(story_id, story_data)
         frontend_filename = f"frontend_story_{story_id}.json"
         filepath = os.path.join(frontend_stories_dir, frontend_filename)
         
         with open(filepath, 'w', encoding='utf-8') as f:
             json.dump(frontend_story, f, indent=2)
+        if STORY_ARCHIVE:
+            get_archive("frontend_stories").put(story_id, frontend_story)
         
         return filepath
 
+    def image_assets(self, story_data: StoryData, timestamp: str) -> List[Dict]:
+        """The images a story needs, with the Cloudinary folder and public id of each"""
+        assets = [{"asset": "cover", "kind": "cover", "name": story_data.plot.title,
+                   "folder": "covers", "public_id": f"cover_{timestamp}"}]
+        for character in story_data.visuals.characters[:5]:
+            assets.append({
+                "asset": f"character:{character.name}", "kind": "character", "name": character.name,
+                "description": character.description, "folder": "characters",
+                "public_id": f"{character.name.lower().replace(' ', '')}{timestamp}"
+            })
+        for bg in story_data.visuals.backgrounds:
+            assets.append({
+                "asset": f"background:{bg.type}", "kind": "background", "name": bg.name,
+                "description": bg.description, "bg_type": bg.type, "folder": "backgrounds",
+                "public_id": f"{bg.type}{bg.name.lower().replace(' ', '')}_{timestamp}"
+            })
+        return assets
+
+    def render_image_asset(self, story_data: StoryData, asset: Dict) -> Optional[str]:
+        """Generate and upload one image; returns its URL, or None when the model returned no image"""
+        logger.info(f"Generating {asset['kind']} image: {asset['name']}")
+        if asset["kind"] == "cover":
+            image = self.generate_story_cover(story_data)
+        elif asset["kind"] == "character":
+            image = self.generate_character_image(asset["name"], asset["description"])
+        else:
+            image = self.generate_background_image(asset["name"], asset["description"], asset["bg_type"])
+        if not image:
+            logger.warning(f"Failed to generate {asset['kind']} image: {asset['name']}")
+            return None
+        return self.upload_to_cloudinary(image, asset["folder"], asset["public_id"])
+
     def generate_all_images_for_story(self, story_data: StoryData, timestamp: str) -> Dict:
         """Generate and upload all story images to Cloudinary"""
+        assets = self.image_assets(story_data, timestamp)
+        if IMAGE_JOBS:
+            # Tracked as a durable job: uploaded assets are never redone, and
+            # whatever is missing after a crash or failure is finished later
+            jobs = get_image_jobs()
+            job_id = image_job_id(story_data.model_dump())
+            jobs.enqueue(job_id, {
+                "story": story_data.model_dump(exclude={"generated_images"}),
+                "selected_interest": self.game_state.selected_interest,
+                "timestamp": timestamp
+            }, assets)
+            urls = jobs.run(job_id, lambda asset: self.render_image_asset(story_data, asset))
+        else:
+            urls = {}
+            for asset in assets:
+                try:
+                    url = self.render_image_asset(story_data, asset)
+                    if url:
+                        urls[asset["asset"]] = url
+                except Exception as e:
+                    logger.error(f"Error processing {asset['kind']} {asset['name']}: {e}")
+        
         image_paths = {
             "characters": {},
             "backgrounds": {
@@ -392,58 +472,22 @@ class FinancialNovelGenerator:
                 "tertiary": None
             },
         }
-        
-        # Generate and upload cover image
-        cover_image = self.generate_story_cover(story_data)
-        if cover_image:
-            cover_id = f"cover_{timestamp}"
-            cover_url = self.upload_to_cloudinary(cover_image, "covers", cover_id)
-            image_paths["cover"] = cover_url
-        
-        # Generate and upload character images
-        for character in story_data.visuals.characters[:5]:
-            try:
-                logger.info(f"Generating image for character: {character.name}")
-                character_image = self.generate_character_image(
-                    character.name, 
-                    character.description
-                )
-                if character_image:
-                    char_id = f"{character.name.lower().replace(' ', '')}{timestamp}"
-                    try:
-                        char_url = self.upload_to_cloudinary(character_image, "characters", char_id)
-                        image_paths["characters"][character.name] = char_url
-                    except Exception as e:
-                        logger.error(f"Failed to upload character image for {character.name}: {e}")
-                else:
-                    logger.warning(f"Failed to generate image for character: {character.name}")
-            except Exception as e:
-                logger.error(f"Error processing character {character.name}: {e}")
-                continue
-        
-        # Generate and upload background images for each type
-        for bg in story_data.visuals.backgrounds:
-            try:
-                logger.info(f"Generating {bg.type} background: {bg.name}")
-                bg_image = self.generate_background_image(bg.name, bg.description, bg.type)
-                if bg_image:
-                    bg_id = f"{bg.type}{bg.name.lower().replace(' ', '')}_{timestamp}"
-                    try:
-                        bg_url = self.upload_to_cloudinary(bg_image, "backgrounds", bg_id)
-                        image_paths["backgrounds"][bg.type] = bg_url
-                    except Exception as e:
-                        logger.error(f"Failed to upload background image for {bg.name}: {e}")
-                else:
-                    logger.warning(f"Failed to generate background image: {bg.name}")
-            except Exception as e:
-                logger.error(f"Error processing background {bg.name}: {e}")
+        for asset in assets:
+            url = urls.get(asset["asset"])
+            if not url:
                 continue
+            if asset["kind"] == "cover":
+                image_paths["cover"] = url
+            elif asset["kind"] == "character":
+                image_paths["characters"][asset["name"]] = url
+            else:
+                image_paths["backgrounds"][asset["bg_type"]] = url
         
         # Update story data with image paths
         story_data.generated_images = image_paths
         return image_paths
 
-    def generate_character_image(self, character_name: str, character_description: str) -> Optional[Image.Image]:
+    def generate_character_image(self, character_name: str, character_description: str) -> Optional["Image.Image"]:
         """Generate a character image using Gemini"""
         selected_interest = self.game_state.selected_interest or {
             "category": "Comics & Anime",
@@ -464,7 +508,7 @@ class FinancialNovelGenerator:
         """
         return self._generate_image(prompt, f"character{character_name}")
 
-    def generate_background_image(self, bg_name: str, bg_description: str, bg_type: str) -> Optional[Image.Image]:
+    def generate_background_image(self, bg_name: str, bg_description: str, bg_type: str) -> Optional["Image.Image"]:
         """Generate a background image using Gemini"""
         selected_interest = self.game_state.selected_interest or {
             "category": "Comics & Anime",
@@ -492,9 +536,9 @@ class FinancialNovelGenerator:
         return self._generate_image(prompt, f"background{bg_type}_{bg_name}")
 
 
-    def _generate_image(self, prompt: str, image_type: str) -> Optional[Image.Image]:
+    def _generate_image(self, prompt: str, image_type: str) -> Optional["Image.Image"]:
         """Core image generation function"""
-        print(f"Generating {image_type}")
+        logger.info(f"Generating {image_type}")
 
         # Use the provided prompt directly since each calling function handles its own selected_interest
         try:
@@ -513,24 +557,26 @@ class FinancialNovelGenerator:
                 response_modalities=["image", "text"],
             )
 
-            for chunk in self.client.models.generate_content_stream(
-                model=model,
-                contents=contents,
-                config=generate_content_config,
-            ):
-                if not chunk.candidates or not chunk.candidates[0].content or not chunk.candidates[0].content.parts:
-                    continue
-
-                if chunk.candidates[0].content.parts[0].inline_data:
-                    inline_data = chunk.candidates[0].content.parts[0].inline_data
-                    file_extension = mimetypes.guess_extension(inline_data.mime_type)
-                    temp_image = Image.open(io.BytesIO(inline_data.data))
-                    return temp_image
+            # Images never outrank the work they belong to (pool stories stay pre-generation)
+            with scheduler.slot(max(work_class_var.get(), IMAGES)):
+                for chunk in self.client.models.generate_content_stream(
+                    model=model,
+                    contents=contents,
+                    config=generate_content_config,
+                ):
+                    if not chunk.candidates or not chunk.candidates[0].content or not chunk.candidates[0].content.parts:
+                        continue
+
+                    if chunk.candidates[0].content.parts[0].inline_data:
+                        inline_data = chunk.candidates[0].content.parts[0].inline_data
+                        file_extension = mimetypes.guess_extension(inline_data.mime_type)
+                        temp_image = Image.open(io.BytesIO(inline_data.data))
+                        return temp_image
 
             return None
 
-        except ClientError as e:
-            error_code = getattr(e, 'status_code', 'UNKNOWN')
+        except errors.ClientError as e:
+            error_code = getattr(e, 'status_code', None) or getattr(e, 'code', 'UNKNOWN')
             logger.error(f"Gemini API error generating {image_type} (code: {error_code}): {e}")
             if error_code == 429:
                 logger.warning("Rate limit exceeded for image generation")
@@ -540,7 +586,7 @@ class FinancialNovelGenerator:
             logger.error(traceback.format_exc())
             return None
         
-    def generate_story_cover(self, story_data: StoryData) -> Optional[Image.Image]:
+    def generate_story_cover(self, story_data: StoryData) -> Optional["Image.Image"]:
         """Generate a cover image for the story"""
         selected_interest = self.game_state.selected_interest or {
             "category": "Comics & Anime",
@@ -614,6 +660,22 @@ class FinancialNovelGenerator:
         filepath = os.path.join(output_dir, filename)
         with open(filepath, 'w', encoding='utf-8') as f:
             json.dump(data.dict(), f, indent=2)
+        if STORY_ARCHIVE:
+            get_archive("stories").put(filename.replace(".json", ""), data.model_dump())
+
+        selected_interest = self.game_state.selected_interest or {}
+        try:
+            StoryIndex(output_dir).append(StoryIndex.make_entry(
+                filename,
+                data.plot.title,
+                interest_area=selected_interest.get("category"),
+                interest=selected_interest.get("interest"),
+                concept=self.game_state.selected_concept.get("topic"),
+                difficulty=self.game_state.difficulty
+            ))
+        except OSError as e:
+            # The story itself is saved; `python StoryIndex.py rebuild` can recover the entry
+            logger.error(f"Failed to update story index for {filename}: {e}")
         return filepath
 
     def get_story_with_images(self, story_id: Optional[str] = None) -> Dict:
@@ -622,7 +684,7 @@ class FinancialNovelGenerator:
         if isinstance(story_data, StoryData):
             return {
                 "story": story_data.dict(),
-                "frontend_format": self.format_story_for_frontend(story_data)
+                "frontend_format": stored_frontend_view(story_id, story_data)
             }
         return {"error": "Story not found"}
 
@@ -635,38 +697,45 @@ class FinancialNovelGenerator:
         self.game_state = updated_state
         return self.game_state
 
-    def list_available_stories(self) -> Dict:
-        """List all available stories with their metadata"""
+    def list_available_stories(self, interest_area: Optional[str] = None, concept: Optional[str] = None,
+                               difficulty: Optional[str] = None, since: Optional[str] = None,
+                               until: Optional[str] = None, offset: int = 0,
+                               limit: Optional[int] = None) -> Dict:
+        """List available stories from the story index, with optional filters and pagination"""
         stories_dir = os.path.join("output", "stories")
         if not os.path.exists(stories_dir):
             return {"error": "No stories directory found"}
 
-        json_files = [f for f in os.listdir(stories_dir) if f.endswith('.json')]
-        if not json_files:
+        index = StoryIndex(stories_dir)
+        if not index.exists():
+            # Stories saved before the index existed; build it once from the files
+            index.rebuild()
+
+        result = index.query(interest_area=interest_area, concept=concept, difficulty=difficulty,
+                             since=since, until=until, offset=offset, limit=limit)
+        if not result["total"]:
             return {"error": "No stories found"}
 
-        json_files.sort(reverse=True)
-        stories = []
-        
-        for file in json_files:
-            try:
-                with open(os.path.join(stories_dir, file), 'r') as f:
-                    story_data = StoryData(**json.load(f))
-                    stories.append({
-                        "story_id": file.replace(".json", ""),
-                        "title": story_data.plot.title,
-                        "concept": "savings",  # Hardcoded for now as specified
-                        "interest_area": self.game_state.selected_interest["category"] if self.game_state.selected_interest else "Default",
-                        "timestamp": file.split("_")[-1].replace(".json", "")
-                    })
-            except Exception as e:
-                print(f"Error loading story {file}: {e}")
-        return {"stories": stories}
+        default_area = self.game_state.selected_interest["category"] if self.game_state.selected_interest else "Default"
+        result["stories"] = [
+            {
+                "story_id": entry["story_id"],
+                "title": entry["title"],
+                "concept": entry.get("concept") or "savings",
+                "interest_area": entry.get("interest_area") or default_area,
+                "difficulty": entry.get("difficulty"),
+                "timestamp": entry["timestamp"],
+                "created_at": entry.get("created_at")
+            }
+            for entry in result["stories"]
+        ]
+        return result
 
-    def format_story_for_frontend(self, story_data: StoryData) -> Dict:
+    @staticmethod
+    def format_story_for_frontend(story_data: StoryData) -> Dict:
         """Transform story data into frontend-friendly format with multiple backgrounds"""
         formatted_story = {
-            "plot": story_data.plot.dict(),
+            "plot": story_data.plot.model_dump(),
             "dialogue_scenes": []
         }
         
@@ -685,10 +754,46 @@ class FinancialNovelGenerator:
                 background_type = "tertiary"
                 
             scene = {
-                "dialogue": dialogue.dict(),
+                "dialogue": dialogue.model_dump(),
                 "background_image": backgrounds.get(background_type),
                 "character_image": character_images.get(dialogue.character)
             }
             formatted_story["dialogue_scenes"].append(scene)
         
-        return formatted_story
\ No newline at end of file
+        return formatted_story
+
+def frontend_view(story_data: StoryData) -> Dict:
+    """Frontend view of a story tagged with the images it was built from"""
+    return {
+        "images_hash": images_fingerprint(story_data.generated_images),
+        "view": FinancialNovelGenerator.format_story_for_frontend(story_data)
+    }
+
+# Views built by save_frontend_story and get_story_with_images, per story id ({"images_hash", "view"})
+FRONTEND_VIEW_CACHE_SIZE = int(os.getenv("FRONTEND_VIEW_CACHE_SIZE", "128"))
+_frontend_views: "OrderedDict[str, Dict]" = OrderedDict()
+_frontend_views_lock = threading.Lock()
+
+def stored_frontend_view(story_id: Optional[str], story_data: StoryData) -> Dict:
+    """Frontend view of a story, rebuilt only when its generated_images change"""
+    if story_id is None:
+        return FinancialNovelGenerator.format_story_for_frontend(story_data)
+    images_hash = images_fingerprint(story_data.generated_images)
+    with _frontend_views_lock:
+        record = _frontend_views.get(story_id)
+        if record is not None and record["images_hash"] == images_hash:
+            _frontend_views.move_to_end(story_id)
+            return record["view"]
+    view = FinancialNovelGenerator.format_story_for_frontend(story_data)
+    with _frontend_views_lock:
+        _frontend_views[story_id] = {"images_hash": images_hash, "view": view}
+        _frontend_views.move_to_end(story_id)
+        while len(_frontend_views) > FRONTEND_VIEW_CACHE_SIZE:
+            _frontend_views.popitem(last=False)
+    return view
+
+
+if __name__ == "__main__":
+    # python NovelGenerator.py [--worker | <json params>]
+    from worker import main
+    main(default_method="generate_story")
@@ -0,0 +1,243 @@
+"""
+On-demand cProfile traces for single requests.
+
+A request is profiled when it carries ``X-Profile: 1`` with the admin token
+or when profiling has been switched on through the admin endpoint (optionally
+only for one path prefix). Both stay off unless ADMIN_TOKEN is set. Traces are saved as pstats files under output/profiles, named with
+the story id the request produced or read, and listed in index.jsonl.
+
+cProfile follows a single thread. The middleware profiles the event loop,
+and handlers that hand work to the threadpool wrap it in ``profile_thread``
+so the worker thread is profiled too and merged into the request's trace.
+Coroutines that interleave with the profiled request on the event loop also
+show up in its trace. Only one request is profiled at a time; others pass
+through untouched. When profiling is off and no header is sent the
+middleware only scans the request headers.
+
+    python -m pstats output/profiles/<id>_<story id>.prof
+"""
+import io
+import os
+import hmac
+import re
+import json
+import time
+import uuid
+import pstats
+import cProfile
+import logging
+import datetime
+import threading
+import contextvars
+from typing import Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join("output", "profiles"))
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "50"))
+PROFILE_HEADER = b"x-profile"
+ADMIN_TOKEN_HEADER = b"x-admin-token"
+INDEX_FILENAME = "index.jsonl"
+PROFILE_ID_PATTERN = re.compile(r"^[0-9TZ]+-[0-9a-f]{8}$")
+
+
+# Worker-thread profiles of the request being profiled, if any
+_thread_profiles: contextvars.ContextVar[Optional[List[cProfile.Profile]]] = contextvars.ContextVar(
+    "thread_profiles", default=None
+)
+
+
+def profile_thread(fn, *args, **kwargs):
+    """Run ``fn`` in a threadpool worker, profiled when the request that started it is"""
+    profiles = _thread_profiles.get()
+    if profiles is None:
+        return fn(*args, **kwargs)
+    profile = cProfile.Profile()
+    profile.enable()
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        profile.disable()
+        profiles.append(profile)
+
+
+def admin_token() -> Optional[str]:
+    """Admin endpoints and header-triggered profiling require this token and are disabled without it"""
+    return os.getenv("ADMIN_TOKEN") or None
+
+
+def admin_authorized(supplied: Optional[bytes]) -> bool:
+    """Whether ``supplied`` is the configured admin token; always False when none is configured"""
+    token = admin_token()
+    return token is not None and supplied is not None and hmac.compare_digest(supplied, token.encode("utf-8"))
+
+
+def _header(scope: Dict, name: bytes) -> Optional[bytes]:
+    for key, value in scope.get("headers", ()):
+        if key == name:
+            return value
+    return None
+
+
+class RequestProfiler:
+    def __init__(self, root: str = PROFILE_DIR, keep: int = PROFILE_KEEP):
+        self.root = root
+        self.keep = keep
+        self.enabled = False
+        self.path_prefix: Optional[str] = None
+        self.index_path = os.path.join(root, INDEX_FILENAME)
+        self._active = threading.Lock()
+        self._lock = threading.Lock()
+
+    def configure(self, enabled: bool, path_prefix: Optional[str] = None) -> Dict:
+        self.enabled = enabled
+        self.path_prefix = path_prefix or None
+        logger.info(f"Request profiling {'enabled' if enabled else 'disabled'}"
+                    + (f" for {self.path_prefix}" if enabled and self.path_prefix else ""))
+        return self.state()
+
+    def state(self) -> Dict:
+        return {"enabled": self.enabled, "path_prefix": self.path_prefix, "keep": self.keep}
+
+    def wants(self, scope: Dict) -> bool:
+        """Whether this request should be profiled"""
+        if self.enabled:
+            return not self.path_prefix or scope.get("path", "").startswith(self.path_prefix)
+        flag = _header(scope, PROFILE_HEADER)
+        if flag is None or flag.strip().lower() not in (b"1", b"true", b"yes"):
+            return False
+        return admin_authorized(_header(scope, ADMIN_TOKEN_HEADER))
+
+    def try_begin(self) -> bool:
+        """Claim the profiler; False while another request is being profiled"""
+        return self._active.acquire(blocking=False)
+
+    def end(self) -> None:
+        self._active.release()
+
+    @staticmethod
+    def new_id() -> str:
+        stamp = datetime.datetime.now(datetime.timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+        return f"{stamp}-{uuid.uuid4().hex[:8]}"
+
+    def save(self, profile_id: str, profile: cProfile.Profile, method: str, path: str,
+             status: Optional[int], duration: float, story_id: Optional[str] = None,
+             thread_profiles: Sequence[cProfile.Profile] = ()) -> Dict:
+        os.makedirs(self.root, exist_ok=True)
+        safe_story = re.sub(r"[^A-Za-z0-9-]", "", story_id or "") or "no-story"
+        filename = f"{profile_id}_{safe_story}.prof"
+        if thread_profiles:
+            stats = pstats.Stats(profile)
+            for thread_profile in thread_profiles:
+                stats.add(thread_profile)
+            stats.dump_stats(os.path.join(self.root, filename))
+        else:
+            profile.dump_stats(os.path.join(self.root, filename))
+        entry = {
+            "id": profile_id,
+            "file": filename,
+            "story_id": story_id,
+            "method": method,
+            "path": path,
+            "status": status,
+            "duration_ms": round(duration * 1000, 1),
+            "created_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        }
+        with self._lock:
+            with open(self.index_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+            self._prune()
+        logger.info(f"Saved profile {filename} for {method} {path} ({entry['duration_ms']} ms)")
+        return entry
+
+    def _read(self) -> List[Dict]:
+        if not os.path.exists(self.index_path):
+            return []
+        entries = []
+        with open(self.index_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except json.JSONDecodeError:
+                    logger.warning(f"Skipping malformed profile index line in {self.index_path}")
+        return entries
+
+    def _prune(self) -> None:
+        """Keep the newest ``keep`` profiles (caller must hold the lock)"""
+        entries = self._read()
+        if len(entries) <= self.keep:
+            return
+        for entry in entries[:-self.keep]:
+            try:
+                os.remove(os.path.join(self.root, entry["file"]))
+            except FileNotFoundError:
+                pass
+        temp_path = self.index_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            for entry in entries[-self.keep:]:
+                f.write(json.dumps(entry) + "\n")
+        os.replace(temp_path, self.index_path)
+
+    def list(self, limit: int = 20) -> List[Dict]:
+        """Most recent profiles first"""
+        with self._lock:
+            entries = self._read()
+        return list(reversed(entries))[:limit]
+
+    def find(self, profile_id: str) -> Optional[Dict]:
+        if not PROFILE_ID_PATTERN.match(profile_id):
+            return None
+        return next((entry for entry in self.list(limit=self.keep) if entry["id"] == profile_id), None)
+
+    def path_for(self, entry: Dict) -> str:
+        return os.path.join(self.root, entry["file"])
+
+    def report(self, entry: Dict, limit: int = 40, sort: str = "cumulative") -> str:
+        """Text table of the top functions in a saved profile"""
+        stream = io.StringIO()
+        stats = pstats.Stats(self.path_for(entry), stream=stream)
+        stats.strip_dirs().sort_stats(sort).print_stats(limit)
+        return stream.getvalue()
+
+
+class ProfilingMiddleware:
+    """ASGI middleware that wraps selected requests in cProfile"""
+
+    def __init__(self, app, profiler: RequestProfiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.profiler.wants(scope) or not self.profiler.try_begin():
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = self.profiler.new_id()
+        status = {}
+        scope.setdefault("state", {})
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                message = {**message, "headers": list(message.get("headers", [])) + [(b"x-profile-id", profile_id.encode())]}
+            await send(message)
+
+        profile = cProfile.Profile()
+        thread_profiles: List[cProfile.Profile] = []
+        token = _thread_profiles.set(thread_profiles)
+        started = time.perf_counter()
+        try:
+            profile.enable()
+            try:
+                await self.app(scope, receive, send_with_id)
+            finally:
+                profile.disable()
+                _thread_profiles.reset(token)
+            story_id = scope["state"].get("story_id") or scope.get("path_params", {}).get("story_id")
+            try:
+                self.profiler.save(profile_id, profile, scope.get("method", ""), scope.get("path", ""),
+                                   status.get("code"), time.perf_counter() - started, story_id, thread_profiles)
+            except OSError as e:
+                logger.warning(f"Could not save profile {profile_id}: {e}")
+        finally:
+            self.profiler.end()
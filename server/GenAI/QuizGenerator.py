@@ -1,19 +1,28 @@
 from pydantic import BaseModel, ValidationError
-from typing import List, Dict
-from google import genai
-from google.genai.errors import ClientError
+from typing import List, Dict, Optional
+from startup import lazy_import
+from QuizTemplates import build_local_quiz
+from WorkScheduler import scheduler
 import os
 import json
+import time
 import logging
 import traceback
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger(__name__)
 
+genai = lazy_import("google.genai")
+errors = lazy_import("google.genai.errors")
+
+# After a 429, skip the model and build quizzes locally for this many seconds
+QUIZ_RATE_LIMIT_COOLDOWN = float(os.getenv("QUIZ_RATE_LIMIT_COOLDOWN", "30"))
+QUIZ_MODES = ("model", "instant")
+AGE_GROUPS = {
+    "beginner": "10-12",
+    "intermediate": "12-14",
+    "advanced": "14-16"
+}
+
 class QuizOption(BaseModel):
     text: str
     is_correct: bool
@@ -28,6 +37,12 @@ class Quiz(BaseModel):
     difficulty: str
     age_group: str
     questions: List[QuizQuestion]
+    source: Optional[str] = None  # "local:<bank version>" for template-built quizzes
+
+def local_quiz(story_data: dict, difficulty: str, concept: Optional[str] = None) -> Quiz:
+    """Build a quiz from the template bank in milliseconds, without the model"""
+    age_group = AGE_GROUPS.get((difficulty or "beginner").lower(), "10-12")
+    return Quiz(**build_local_quiz(story_data, difficulty, age_group, concept))
 
 class QuizGenerator:
     def __init__(self):
@@ -36,6 +51,7 @@ class QuizGenerator:
             if not api_key:
                 raise ValueError("GEMINI_API environment variable is not set")
             self.client = genai.Client(api_key=api_key)
+            self.rate_limited_until = 0.0
             logger.info("QuizGenerator initialized successfully")
         except Exception as e:
             logger.error(f"Failed to initialize QuizGenerator: {e}")
@@ -44,12 +60,7 @@ class QuizGenerator:
 
     def determine_age_group(self, difficulty: str) -> str:
         """Determine age group based on difficulty level"""
-        age_groups = {
-            "beginner": "10-12",
-            "intermediate": "12-14",
-            "advanced": "14-16"
-        }
-        return age_groups.get(difficulty.lower(), "10-12")
+        return AGE_GROUPS.get(difficulty.lower(), "10-12")
 
     def _validate_inputs(self, story_data: dict, difficulty: str) -> None:
         """Validate input parameters"""
@@ -117,17 +128,35 @@ class QuizGenerator:
             ]
         }
 
-    def generate_quiz(self, story_data: dict, difficulty: str) -> Quiz:
+    def _fallback_quiz(self, story_data: dict, difficulty: str, concept: Optional[str] = None) -> Quiz:
+        """Template-built quiz for the story, or the fixed default quiz when there is no usable story"""
+        if isinstance(story_data, dict) and story_data.get("plot"):
+            try:
+                return local_quiz(story_data, difficulty, concept)
+            except Exception as e:
+                logger.error(f"Local quiz synthesis failed: {e}")
+        return Quiz(**self._get_default_quiz(difficulty, self.determine_age_group(difficulty)))
+
+    def generate_quiz(self, story_data: dict, difficulty: str, mode: str = "model",
+                      concept: Optional[str] = None) -> Quiz:
         """
         Generate a quiz based on story data
         
         Args:
             story_data: Dictionary containing story information with 'plot' and 'visuals' keys
             difficulty: One of 'beginner', 'intermediate', or 'advanced'
+            mode: 'model' to ask Gemini, 'instant' to build the quiz locally from templates
+            concept: Financial topic being taught (inferred from the story when omitted)
             
         Returns:
             Quiz object with questions and answers
         """
+        if mode == "instant":
+            return self._fallback_quiz(story_data, difficulty, concept)
+        if time.monotonic() < self.rate_limited_until:
+            logger.info("Quiz model is rate limited, building quiz locally")
+            return self._fallback_quiz(story_data, difficulty, concept)
+        
         try:
             # Validate inputs
             self._validate_inputs(story_data, difficulty)
@@ -175,10 +204,11 @@ class QuizGenerator:
             
             # Make API call with error handling
             try:
-                response = self.client.models.generate_content(
-            model='gemini-2.0-flash-lite',
-            contents=prompt
-        )
+                with scheduler.slot():
+                    response = self.client.models.generate_content(
+                        model='gemini-2.0-flash-lite',
+                        contents=prompt
+                    )
         
                 if not response or not hasattr(response, 'text'):
                     raise ValueError("Invalid response from API")
@@ -190,33 +220,30 @@ class QuizGenerator:
                 logger.info(f"Successfully generated quiz with {len(quiz.questions)} questions")
                 return quiz
                 
-            except ClientError as e:
-                error_code = getattr(e, 'status_code', 'UNKNOWN')
+            except errors.ClientError as e:
+                error_code = getattr(e, 'status_code', None) or getattr(e, 'code', 'UNKNOWN')
                 error_message = str(e)
                 logger.error(f"Gemini API error (code: {error_code}): {error_message}")
                 
                 # Handle specific API errors
                 if error_code == 429:
-                    logger.warning("Rate limit exceeded, returning default quiz")
+                    logger.warning("Rate limit exceeded, building quizzes locally for a while")
+                    self.rate_limited_until = time.monotonic() + QUIZ_RATE_LIMIT_COOLDOWN
                 elif error_code == 401:
                     logger.error("API key invalid or expired")
                 elif error_code == 400:
                     logger.error("Invalid request to API")
                 
-                # Return default quiz on API errors
-                default_data = self._get_default_quiz(difficulty, age_group)
-                return Quiz(**default_data)
+                return self._fallback_quiz(story_data, difficulty, concept)
                 
             except Exception as e:
                 logger.error(f"Unexpected error in API call: {e}")
-                default_data = self._get_default_quiz(difficulty, age_group)
-                return Quiz(**default_data)
+                return self._fallback_quiz(story_data, difficulty, concept)
                 
         except ValueError as e:
             logger.error(f"Validation error in generate_quiz: {e}")
             # Return default quiz
-            default_data = self._get_default_quiz(difficulty, self.determine_age_group(difficulty))
-            return Quiz(**default_data)
+            return self._fallback_quiz(story_data, difficulty, concept)
             
         except ValidationError as e:
             logger.error(f"Pydantic validation error: {e}")
@@ -235,17 +262,108 @@ class QuizGenerator:
                 pass
             
             # Return default quiz
-            default_data = self._get_default_quiz(difficulty, self.determine_age_group(difficulty))
-            return Quiz(**default_data)
+            return self._fallback_quiz(story_data, difficulty, concept)
             
         except json.JSONDecodeError as e:
             logger.error(f"JSON parsing error: {e}")
             logger.error(traceback.format_exc())
-            default_data = self._get_default_quiz(difficulty, self.determine_age_group(difficulty))
-            return Quiz(**default_data)
+            return self._fallback_quiz(story_data, difficulty, concept)
             
         except Exception as e:
             logger.error(f"Unexpected error generating quiz: {e}")
             logger.error(traceback.format_exc())
-            default_data = self._get_default_quiz(difficulty, self.determine_age_group(difficulty))
-            return Quiz(**default_data)
+            return self._fallback_quiz(story_data, difficulty, concept)
+
+    def generate_quiz_set(self, story_data: dict, mode: str = "model",
+                          concept: Optional[str] = None) -> Dict[str, Quiz]:
+        """
+        Generate beginner, intermediate and advanced quizzes for a story in one model call.
+        Any difficulty the model leaves out or gets wrong is built locally instead.
+        """
+        if mode == "instant" or time.monotonic() < self.rate_limited_until:
+            return {difficulty: self._fallback_quiz(story_data, difficulty, concept) for difficulty in AGE_GROUPS}
+        
+        quizzes: Dict[str, Quiz] = {}
+        try:
+            self._validate_inputs(story_data, "beginner")
+            plot_title = story_data.get("plot", {}).get("title", "Financial Literacy")
+            financial_elements = story_data.get("visuals", {}).get("financial_elements", "financial concepts")
+            levels = "\n".join(
+                f"        - {difficulty}: age group {age_group} years" for difficulty, age_group in AGE_GROUPS.items()
+            )
+            
+            prompt = f"""
+        Generate three financial literacy quizzes based on this story, one for each difficulty level:
+{levels}
+        Story content: {json.dumps(story_data, indent=2)[:1000]}
+        
+        For each difficulty create exactly 5 multiple-choice questions following these rules:
+        - Questions should test understanding of {plot_title} and {financial_elements}
+        - Each question must have 4 options with exactly one correct answer
+        - Include clear explanations for wrong answers
+        - Match the vocabulary and reasoning to the age group of that difficulty
+
+            Don't ask questions from the story directly. Instead, create real-life situations where the same characters
+            are involved in financial decisions. Questions should test understanding of the financial topic.
+        
+        Return as JSON with this structure:
+        {{
+            "beginner": {{
+                "topic": "Financial concept name",
+                "difficulty": "beginner",
+                "age_group": "10-12",
+                "questions": [
+                    {{
+                        "question": "Question text",
+                        "options": [
+                            {{"text": "Option 1", "is_correct": true}},
+                            {{"text": "Option 2", "is_correct": false}},
+                            {{"text": "Option 3", "is_correct": false}},
+                            {{"text": "Option 4", "is_correct": false}}
+                        ],
+                        "explanation": "Detailed explanation for wrong answers"
+                    }}
+                ]
+            }},
+            "intermediate": {{ ...same structure, "age_group": "12-14" }},
+            "advanced": {{ ...same structure, "age_group": "14-16" }}
+        }}
+        """
+            
+            logger.info(f"Generating quizzes for all difficulties: {plot_title}")
+            with scheduler.slot():
+                response = self.client.models.generate_content(
+                    model='gemini-2.0-flash-lite',
+                    contents=prompt,
+                    config={"response_mime_type": "application/json"}
+                )
+            if not response or not getattr(response, 'text', None):
+                raise ValueError("Invalid response from API")
+            
+            quiz_set = self._parse_json_response(response.text)
+            for difficulty, age_group in AGE_GROUPS.items():
+                try:
+                    quiz_data = dict(quiz_set.get(difficulty) or {}, difficulty=difficulty, age_group=age_group)
+                    quizzes[difficulty] = Quiz(**quiz_data)
+                except (ValidationError, TypeError) as e:
+                    logger.warning(f"Invalid {difficulty} quiz in batched response: {e}")
+        
+        except errors.ClientError as e:
+            error_code = getattr(e, 'status_code', None) or getattr(e, 'code', 'UNKNOWN')
+            logger.error(f"Gemini API error (code: {error_code}): {e}")
+            if error_code == 429:
+                self.rate_limited_until = time.monotonic() + QUIZ_RATE_LIMIT_COOLDOWN
+        except Exception as e:
+            logger.error(f"Error generating quiz set: {e}")
+            logger.error(traceback.format_exc())
+        
+        for difficulty in AGE_GROUPS:
+            if difficulty not in quizzes:
+                quizzes[difficulty] = self._fallback_quiz(story_data, difficulty, concept)
+        return quizzes
+
+
+if __name__ == "__main__":
+    # python QuizGenerator.py [--worker | <json params>]
+    from worker import main
+    main(default_method="generate_quiz")
@@ -0,0 +1,70 @@
+"""
+Server-side quiz grading.
+
+When a quiz is created it is split into a public copy (question ids and
+option texts, no answers) for clients and a compact answer key
+(question id -> correct option index and explanation) kept on the server.
+Grading a submission is a dictionary lookup per answered question.
+"""
+from typing import Dict, List
+
+
+class GradingError(ValueError):
+    """Submission that does not fit the quiz; reported to the client as a 400"""
+
+
+def question_id(index: int) -> str:
+    return f"q{index + 1}"
+
+
+def build_answer_key(quiz: Dict) -> Dict:
+    """{"total": n, "questions": {question id: {"correct_option", "explanation"}}}"""
+    questions = {}
+    for index, question in enumerate(quiz.get("questions", [])):
+        correct = [i for i, option in enumerate(question.get("options", [])) if option.get("is_correct")]
+        questions[question_id(index)] = {
+            "correct_option": correct[0] if correct else None,
+            "options": len(question.get("options", [])),
+            "explanation": question.get("explanation", ""),
+        }
+    return {"total": len(questions), "questions": questions}
+
+
+def public_quiz(quiz: Dict) -> Dict:
+    """Quiz as sent to clients: question ids and option texts, without answers or explanations"""
+    public = {key: value for key, value in quiz.items() if key != "questions"}
+    public["questions"] = [
+        {
+            "id": question_id(index),
+            "question": question.get("question", ""),
+            "options": [{"text": option.get("text", "")} for option in question.get("options", [])],
+        }
+        for index, question in enumerate(quiz.get("questions", []))
+    ]
+    return public
+
+
+def grade(answer_key: Dict, answers: Dict[str, int]) -> Dict:
+    """
+    Grade ``answers`` (question id -> chosen option index). Only the answered
+    questions are graded, so clients may check one question at a time.
+    """
+    questions = answer_key["questions"]
+    results: List[Dict] = []
+    score = 0
+    for qid, selected in answers.items():
+        entry = questions.get(qid)
+        if entry is None:
+            raise GradingError(f"Unknown question id: {qid}")
+        if isinstance(selected, bool) or not isinstance(selected, int) or not 0 <= selected < entry["options"]:
+            raise GradingError(f"Invalid option for {qid}: {selected!r}")
+        correct = selected == entry["correct_option"]
+        score += correct
+        results.append({
+            "id": qid,
+            "selected_option": selected,
+            "correct": correct,
+            "correct_option": entry["correct_option"],
+            "explanation": entry["explanation"],
+        })
+    return {"score": score, "graded": len(results), "total": answer_key["total"], "results": results}
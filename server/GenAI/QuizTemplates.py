@@ -0,0 +1,148 @@
+"""
+Local quiz synthesis from a versioned template bank (quiz_bank.json).
+
+Builds five multiple-choice questions from a story's dialogue hints,
+visuals.financial_elements and the concept being taught, with no network
+call. Used when the model is unavailable and for the explicit "instant"
+quiz mode.
+"""
+import os
+import re
+import json
+import random
+import logging
+import threading
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+QUIZ_BANK_PATH = os.getenv("QUIZ_BANK_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "quiz_bank.json"))
+QUESTIONS_PER_QUIZ = 5
+OPTIONS_PER_QUESTION = 4
+MAX_OPTION_CHARS = 140
+
+_bank: Optional[Dict] = None
+_bank_lock = threading.Lock()
+
+
+def load_bank(path: Optional[str] = None) -> Dict:
+    """Template bank, loaded once per process"""
+    global _bank
+    if path:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    with _bank_lock:
+        if _bank is None:
+            with open(QUIZ_BANK_PATH, "r", encoding="utf-8") as f:
+                _bank = json.load(f)
+            logger.info(f"Loaded quiz template bank v{_bank['version']}")
+        return _bank
+
+
+def _clip(text: str, limit: int = MAX_OPTION_CHARS) -> str:
+    text = " ".join(str(text).split())
+    return text if len(text) <= limit else text[:limit - 3].rstrip() + "..."
+
+
+def _story_text(story_data: Dict) -> str:
+    plot = story_data.get("plot", {}) or {}
+    parts = [plot.get("title", ""), plot.get("setup", ""),
+             (story_data.get("visuals", {}) or {}).get("financial_elements", "")]
+    parts.extend(line.get("hint", "") for line in story_data.get("dialogue", []) or [])
+    return " ".join(parts).lower()
+
+
+def resolve_concept(bank: Dict, story_data: Dict, concept: Optional[str] = None) -> str:
+    """Bank concept for an explicit topic name, else the best keyword match in the story"""
+    concepts = bank["concepts"]
+    if concept:
+        key = concept.strip().lower()
+        for name, entry in concepts.items():
+            if key == name or key == entry["display"].lower() or name in key:
+                return name
+
+    text = _story_text(story_data)
+    scores = {
+        name: sum(len(re.findall(r"\b" + re.escape(keyword), text)) for keyword in entry["keywords"])
+        for name, entry in concepts.items()
+    }
+    best = max(scores, key=scores.get) if scores else "general"
+    return best if scores.get(best) else "general"
+
+
+def _question(rng: random.Random, text: str, answer: str, distractors: List[str], explanation: str) -> Dict:
+    wrong = rng.sample(distractors, OPTIONS_PER_QUESTION - 1)
+    options = [{"text": _clip(answer), "is_correct": True}] + [{"text": _clip(d), "is_correct": False} for d in wrong]
+    rng.shuffle(options)
+    return {"question": text, "options": options, "explanation": explanation}
+
+
+def build_local_quiz(story_data: Dict, difficulty: str, age_group: str, concept: Optional[str] = None,
+                     bank: Optional[Dict] = None) -> Dict:
+    """
+    Quiz dict (the shape of QuizGenerator.Quiz) built from templates. The same
+    story, difficulty and bank version always produce the same quiz.
+    """
+    bank = bank or load_bank()
+    story_data = story_data or {}
+    difficulty = (difficulty or "beginner").lower()
+    concept_name = resolve_concept(bank, story_data, concept)
+    entry = bank["concepts"][concept_name]
+    display = entry["display"]
+
+    plot = story_data.get("plot", {}) or {}
+    title = plot.get("title") or "the story"
+    dialogue = story_data.get("dialogue", []) or []
+    characters = [line.get("character") for line in dialogue if line.get("character")]
+    characters += [c.get("name") for c in (story_data.get("visuals", {}) or {}).get("characters", []) if c.get("name")]
+    character = characters[0] if characters else "Alex"
+
+    rng = random.Random(f"{bank['version']}|{title}|{difficulty}|{concept_name}")
+    questions: List[Dict] = []
+
+    hints = [line["hint"] for line in dialogue if line.get("hint")]
+    if hints:
+        questions.append(_question(
+            rng,
+            f'Which tip from "{title}" would help {character} most with {display.lower()}?',
+            rng.choice(hints),
+            bank["bad_advice"],
+            "This tip comes straight from the story; the other choices are habits that make money problems worse."
+        ))
+
+    financial_elements = (story_data.get("visuals", {}) or {}).get("financial_elements")
+    if financial_elements:
+        questions.append(_question(
+            rng,
+            f'Which of these appears in "{title}" to explain {display.lower()}?',
+            financial_elements,
+            bank["unrelated_elements"],
+            f"The story uses {_clip(financial_elements, 80)} to show how {display.lower()} works."
+        ))
+
+    templates = list(entry.get(difficulty, [])) + list(entry.get("any", []))
+    if concept_name != "general":
+        templates += bank["concepts"]["general"]["any"]
+    seen = set()
+    for template in templates:
+        if len(questions) >= QUESTIONS_PER_QUIZ:
+            break
+        text = template["question"].replace("{character}", character)
+        if text in seen:
+            continue
+        seen.add(text)
+        questions.append(_question(
+            rng,
+            text,
+            template["answer"],
+            template["distractors"],
+            template["explanation"]
+        ))
+
+    return {
+        "topic": display,
+        "difficulty": difficulty,
+        "age_group": age_group,
+        "questions": questions[:QUESTIONS_PER_QUIZ],
+        "source": f"local:{bank['version']}"
+    }
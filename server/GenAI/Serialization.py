@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Response serialization for large story payloads: a fast JSON response class
+and the gzip threshold, plus a benchmark of bytes on the wire and
+serialization CPU per request.
+
+    python Serialization.py [story.json] [--runs N]
+"""
+import os
+import sys
+import gzip
+import json
+import time
+from typing import Callable, Dict, List, Optional
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson  # noqa: F401  (ORJSONResponse only fails at render time without it)
+    from fastapi.responses import ORJSONResponse as FastJSONResponse
+except ImportError:  # orjson is optional; fall back to the stdlib encoder
+    FastJSONResponse = JSONResponse
+
+# Bodies smaller than this are sent uncompressed; gzip overhead is not worth it
+GZIP_MINIMUM_SIZE = int(os.getenv("GZIP_MINIMUM_SIZE", "1024"))
+GZIP_COMPRESS_LEVEL = int(os.getenv("GZIP_COMPRESS_LEVEL", "6"))
+
+
+def _default_encode(payload: Dict) -> bytes:
+    """What FastAPI does for a returned dict: jsonable_encoder, then JSONResponse.render"""
+    return JSONResponse(jsonable_encoder(payload)).body
+
+
+def _fast_encode(payload: Dict) -> bytes:
+    """Returning FastJSONResponse directly skips jsonable_encoder"""
+    return FastJSONResponse(payload).body
+
+
+def _cpu_per_call_ms(func: Callable[[], object], runs: int) -> float:
+    started = time.process_time()
+    for _ in range(runs):
+        func()
+    return round((time.process_time() - started) * 1000 / runs, 3)
+
+
+def benchmark(payload: Dict, runs: int = 200) -> Dict:
+    """Serialization CPU (ms per request) and response size (bytes) for each encoder"""
+    encoders = [("default", _default_encode)]
+    if FastJSONResponse is not JSONResponse:
+        encoders.append(("fast", _fast_encode))
+
+    results: List[Dict] = []
+    for name, encode in encoders:
+        body = encode(payload)
+        compressed = gzip.compress(body, compresslevel=GZIP_COMPRESS_LEVEL)
+        results.append({
+            "encoder": name,
+            "serialize_cpu_ms": _cpu_per_call_ms(lambda: encode(payload), runs),
+            "gzip_cpu_ms": _cpu_per_call_ms(lambda: gzip.compress(body, compresslevel=GZIP_COMPRESS_LEVEL), runs),
+            "bytes": len(body),
+            "gzip_bytes": len(compressed),
+        })
+    return {"runs": runs, "results": results}
+
+
+_CHARACTERS = ["Maya", "Jordan", "Coach Rivera", "Sam"]
+_LINES = [
+    ("The tour starts in three weeks and I have ${n} saved. Is that enough?",
+     "Compare what you have with what the goal costs."),
+    ("Let's write down every ticket, snack and bus fare before we spend a cent.",
+     "Listing expenses first shows where the money will go."),
+    ("My paycheck from the shoe store was ${n}, but half of it vanished by Friday.",
+     "Tracking spending reveals small purchases that add up."),
+    ("What if we put ${n} aside each week in a jar labelled 'tour'?",
+     "Saving a fixed amount regularly builds a habit."),
+    ("Those limited-edition sneakers cost ${n}. Do I need them or just want them?",
+     "Separate needs from wants before buying."),
+    ("The bank lobby has a poster about compound interest. Money that earns money?",
+     "Interest rewards saving early."),
+    ("If the bus breaks down again we'll need ${n} for repairs we didn't plan for.",
+     "An emergency fund covers surprises without borrowing."),
+    ("I checked three stores and the same headphones ranged from ${n} to double that.",
+     "Comparison shopping stretches a budget."),
+    ("We went over on food this week, so let's trim ${n} from next week's fun money.",
+     "A budget is adjusted, not abandoned, when plans change."),
+    ("Splitting the hotel four ways brings it down to ${n} each. That I can handle.",
+     "Sharing costs can make big expenses manageable."),
+]
+
+
+def _synthetic_story() -> Dict:
+    """A story shaped like the generator's output, with varied text so gzip ratios stay realistic"""
+    from NovelGenerator import StoryData
+
+    dialogue = []
+    for i in range(40):
+        text, hint = _LINES[(i * 7) % len(_LINES)]
+        dialogue.append({
+            "character": _CHARACTERS[i % len(_CHARACTERS)],
+            "text": text.replace("{n}", str(15 + (i * 37) % 240)),
+            "hint": hint,
+        })
+    base_url = "https://res.cloudinary.com/demo/image/upload"
+    return StoryData(
+        plot={
+            "title": "The Budget Heist",
+            "setup": ("Maya's band has been invited on a summer tour, but the van, the hotels and the food all "
+                      "cost money nobody has counted. With three weeks to go, the band members track their "
+                      "earnings, cut what they can live without and build a budget that gets them to the "
+                      "final concert."),
+            "locations": {"primary": "City rooftop", "secondary": "Bank lobby", "tertiary": "Concert hall"},
+        },
+        dialogue=dialogue,
+        visuals={
+            "characters": [
+                {"name": "Maya", "description": "Teen guitarist with a red jacket, braided hair and a notebook of receipts"},
+                {"name": "Jordan", "description": "Drummer in a faded band tee who always carries a calculator"},
+                {"name": "Coach Rivera", "description": "Former accountant in a grey cardigan who mentors the band"},
+                {"name": "Sam", "description": "Bassist with round glasses who runs the band's savings jar"},
+            ],
+            "backgrounds": [
+                {"name": "City rooftop", "description": "Rooftop rehearsal space with string lights at dusk",
+                 "type": "primary"},
+                {"name": "Bank lobby", "description": "Marble lobby with teller windows and savings posters",
+                 "type": "secondary"},
+                {"name": "Concert hall", "description": "Packed hall with neon stage lights and a merch stand",
+                 "type": "tertiary"},
+            ],
+            "financial_elements": "Budget tracker, savings jar, receipts, tour cost spreadsheet",
+        },
+        hooks={"pop_culture": "Battle-of-the-bands reality show", "music": "Upbeat synth-pop"},
+        generated_images={
+            "characters": {name: f"{base_url}/{name.lower().replace(' ', '_')}_1.png" for name in _CHARACTERS},
+            "backgrounds": {kind: f"{base_url}/{kind}home_1.png" for kind in ("primary", "secondary", "tertiary")},
+        },
+    ).model_dump()
+
+
+def sample_payload(path: Optional[str] = None) -> Dict:
+    """
+    A /api/generate response: a saved story (or a synthetic one of realistic
+    size), its template quiz as sent to clients and a summary in the model's shape.
+    """
+    from QuizGenerator import local_quiz
+    from QuizGrading import public_quiz
+    from Summarizer import Summarizer
+
+    if path:
+        with open(path, "r", encoding="utf-8") as f:
+            story = json.load(f)
+    else:
+        story = _synthetic_story()
+    quiz = public_quiz(local_quiz(story, "beginner").model_dump())
+    summary = Summarizer(topic=story["plot"]["title"], learning_summary={
+        "key_points": [
+            "A budget is a plan that matches spending to the money you expect to have",
+            "Tracking every expense shows where money actually goes",
+            "Regular saving toward a goal makes large costs reachable",
+        ],
+        "benefits": [
+            "Fewer surprises when bills or emergencies arrive",
+            "Clear choices between needs and wants",
+            "Confidence that a goal like the tour is affordable",
+        ],
+        "real_world_example": "Setting aside $20 from each paycheck in a labelled jar until the concert tickets are paid for",
+    }).model_dump()
+    return {"success": True, "storyId": "benchmark", "story": story, "quiz": quiz, "summary": summary}
+
+
+def main() -> None:
+    args = sys.argv[1:]
+    runs = 200
+    if "--runs" in args:
+        position = args.index("--runs")
+        runs = int(args[position + 1])
+        del args[position:position + 2]
+
+    report = benchmark(sample_payload(args[0] if args else None), runs=runs)
+    print(f"Serialization benchmark ({report['runs']} runs per encoder)")
+    print(f"  {'encoder':<10}{'cpu ms':>10}{'gzip ms':>10}{'bytes':>10}{'gzip bytes':>12}")
+    for row in report["results"]:
+        print(f"  {row['encoder']:<10}{row['serialize_cpu_ms']:>10.3f}{row['gzip_cpu_ms']:>10.3f}"
+              f"{row['bytes']:>10}{row['gzip_bytes']:>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+Compact archive of generated stories.
+
+Stories are stored as length-prefixed, zlib-compressed JSON records appended
+to segment files. An offset index maps each story id to its record, and
+reads go through mmap so fetching one story touches only its bytes.
+Writes are serialized within a process; use one writing process per archive
+directory.
+
+Segment layout:  b"FTA1" then records of  <u32 length><u32 crc32><payload>
+Index layout:    index.jsonl, one {"id", "segment", "offset", "length"} per line
+
+    python StoryArchive.py import output/stories [archive_dir]
+    python StoryArchive.py export out_dir [archive_dir]
+    python StoryArchive.py rebuild-index [archive_dir]
+    python StoryArchive.py stats [archive_dir]
+
+archive_dir defaults to the stories archive the server uses
+(STORY_ARCHIVE_DIR/stories).
+"""
+import os
+import sys
+import json
+import mmap
+import zlib
+import struct
+import logging
+import threading
+from typing import Dict, Iterator, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; the stdlib encoder produces the same records
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+STORY_ARCHIVE = os.getenv("STORY_ARCHIVE", "false").lower() in ("1", "true", "yes")
+STORY_ARCHIVE_DIR = os.getenv("STORY_ARCHIVE_DIR", os.path.join("output", "archive"))
+SEGMENT_MAX_BYTES = int(os.getenv("STORY_ARCHIVE_SEGMENT_BYTES", str(64 * 1024 * 1024)))
+
+MAGIC = b"FTA1"
+HEADER = struct.Struct("<II")
+INDEX_FILENAME = "index.jsonl"
+
+
+class ArchiveError(Exception):
+    pass
+
+
+def _encode(record: Dict) -> bytes:
+    if orjson is not None:
+        data = orjson.dumps(record)
+    else:
+        data = json.dumps(record, separators=(",", ":")).encode("utf-8")
+    return zlib.compress(data, 6)
+
+
+def _decode(payload: bytes) -> Dict:
+    data = zlib.decompress(payload)
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+class StoryArchive:
+    def __init__(self, root: str = STORY_ARCHIVE_DIR, segment_max_bytes: int = SEGMENT_MAX_BYTES):
+        self.root = root
+        self.segment_max_bytes = segment_max_bytes
+        self.index_path = os.path.join(root, INDEX_FILENAME)
+        self._index: Dict[str, Tuple[int, int, int]] = {}
+        self._maps: Dict[int, mmap.mmap] = {}
+        self._files: Dict[int, object] = {}
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+        if os.path.exists(self.index_path):
+            self._load_index()
+        elif self._segments():
+            self.rebuild_index()
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.root, f"segment-{segment:05d}.fta")
+
+    def _segments(self):
+        return sorted(
+            int(name[len("segment-"):-len(".fta")])
+            for name in os.listdir(self.root)
+            if name.startswith("segment-") and name.endswith(".fta")
+        )
+
+    def _load_index(self) -> None:
+        with open(self.index_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    self._index[entry["id"]] = (entry["segment"], entry["offset"], entry["length"])
+                except (json.JSONDecodeError, KeyError):
+                    logger.warning(f"Skipping malformed archive index line in {self.index_path}")
+
+    def __contains__(self, story_id: object) -> bool:
+        return story_id in self._index
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def ids(self):
+        return list(self._index)
+
+    def put(self, story_id: str, data: Dict) -> None:
+        """Append a record; a later put for the same id replaces the earlier one"""
+        payload = _encode({"id": story_id, "data": data})
+        record = HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+        with self._lock:
+            segments = self._segments()
+            segment = segments[-1] if segments else 0
+            path = self._segment_path(segment)
+            size = os.path.getsize(path) if os.path.exists(path) else 0
+            if size and size + len(record) > self.segment_max_bytes:
+                segment, size = segment + 1, 0
+                path = self._segment_path(segment)
+
+            with open(path, "ab") as f:
+                if size == 0:
+                    f.write(MAGIC)
+                    size = len(MAGIC)
+                f.write(record)
+            offset = size + HEADER.size
+
+            with open(self.index_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"id": story_id, "segment": segment, "offset": offset, "length": len(payload)}) + "\n")
+            self._index[story_id] = (segment, offset, len(payload))
+
+    def _map(self, segment: int, end: int) -> mmap.mmap:
+        mapped = self._maps.get(segment)
+        if mapped is None or len(mapped) < end:
+            # The active segment grows after it is mapped; remap to see new records
+            if mapped is not None:
+                mapped.close()
+                self._files.pop(segment).close()
+            f = open(self._segment_path(segment), "rb")
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._files[segment] = f
+            self._maps[segment] = mapped
+        return mapped
+
+    def get(self, story_id: str) -> Optional[Dict]:
+        location = self._index.get(story_id)
+        if location is None:
+            return None
+        segment, offset, length = location
+        with self._lock:
+            mapped = self._map(segment, offset + length)
+            length_prefix, crc = HEADER.unpack_from(mapped, offset - HEADER.size)
+            payload = mapped[offset:offset + length]
+        if length_prefix != length or zlib.crc32(payload) != crc:
+            raise ArchiveError(f"Corrupt archive record for {story_id} in segment {segment}")
+        return _decode(payload)["data"]
+
+    @staticmethod
+    def _record_at(data: bytes, position: int) -> Optional[bytes]:
+        """Payload of the intact record starting at ``position``, or None"""
+        if position + HEADER.size > len(data):
+            return None
+        length, crc = HEADER.unpack_from(data, position)
+        start = position + HEADER.size
+        if not length or start + length > len(data):
+            return None
+        payload = data[start:start + length]
+        return payload if zlib.crc32(payload) == crc else None
+
+    def _scan_segment(self, segment: int) -> Iterator[Tuple[int, bytes]]:
+        """
+        Yield (offset, payload) for every intact record. A torn record (a write
+        cut short by a crash) is skipped by searching forward for the next
+        record whose checksum verifies, so records appended after it are kept.
+        """
+        with open(self._segment_path(segment), "rb") as f:
+            data = f.read()
+        if not data.startswith(MAGIC):
+            raise ArchiveError(f"Segment {segment} is not a story archive")
+        position = len(MAGIC)
+        while position + HEADER.size <= len(data):
+            payload = self._record_at(data, position)
+            if payload is None:
+                torn = position
+                position += 1
+                while position + HEADER.size <= len(data) and self._record_at(data, position) is None:
+                    position += 1
+                logger.warning(f"Skipped torn record at offset {torn} in segment {segment} "
+                               f"({position - torn} bytes)")
+                continue
+            yield position + HEADER.size, payload
+            position += HEADER.size + len(payload)
+
+    def records(self) -> Iterator[Tuple[str, Dict]]:
+        """Sequential scan of the live record for every story (bulk reads and analytics)"""
+        live = {location: story_id for story_id, location in self._index.items()}
+        for segment in self._segments():
+            for offset, payload in self._scan_segment(segment):
+                story_id = live.get((segment, offset, len(payload)))
+                if story_id is not None:
+                    yield story_id, _decode(payload)["data"]
+
+    def rebuild_index(self) -> int:
+        """Recreate the offset index by scanning the segment files"""
+        index: Dict[str, Tuple[int, int, int]] = {}
+        for segment in self._segments():
+            for offset, payload in self._scan_segment(segment):
+                index[_decode(payload)["id"]] = (segment, offset, len(payload))
+
+        temp_path = self.index_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            for story_id, (segment, offset, length) in index.items():
+                f.write(json.dumps({"id": story_id, "segment": segment, "offset": offset, "length": length}) + "\n")
+        with self._lock:
+            os.replace(temp_path, self.index_path)
+            self._index = index
+        return len(index)
+
+    def stats(self) -> Dict:
+        segments = self._segments()
+        return {
+            "stories": len(self._index),
+            "segments": len(segments),
+            "bytes": sum(os.path.getsize(self._segment_path(segment)) for segment in segments),
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            for mapped in self._maps.values():
+                mapped.close()
+            for f in self._files.values():
+                f.close()
+            self._maps.clear()
+            self._files.clear()
+
+
+_archives: Dict[str, StoryArchive] = {}
+_archives_lock = threading.Lock()
+
+
+def archive_root(name: str) -> str:
+    """Directory of the archive called ``name`` (STORY_ARCHIVE_DIR/<name>)"""
+    return os.path.join(STORY_ARCHIVE_DIR, name)
+
+
+def get_archive(name: str) -> StoryArchive:
+    """Process-wide archive under STORY_ARCHIVE_DIR/<name>"""
+    with _archives_lock:
+        if name not in _archives:
+            _archives[name] = StoryArchive(archive_root(name))
+        return _archives[name]
+
+
+def import_json(archive: StoryArchive, source_dir: str) -> int:
+    """Append every <story_id>.json file in source_dir to the archive"""
+    count = 0
+    for filename in sorted(os.listdir(source_dir)):
+        if not filename.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(source_dir, filename), "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Skipping {filename}: {e}")
+            continue
+        archive.put(filename[:-len(".json")], data)
+        count += 1
+    return count
+
+
+def export_json(archive: StoryArchive, target_dir: str) -> int:
+    """Write each archived story back out as <story_id>.json (the save_to_json format)"""
+    os.makedirs(target_dir, exist_ok=True)
+    count = 0
+    for story_id, data in archive.records():
+        with open(os.path.join(target_dir, f"{story_id}.json"), "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+        count += 1
+    return count
+
+
+def main() -> None:
+    usage = ("Usage: python StoryArchive.py import <json_dir> [archive_dir] | export <json_dir> [archive_dir]"
+             " | rebuild-index [archive_dir] | stats [archive_dir]")
+    args = sys.argv[1:]
+    if not args:
+        print(usage)
+        sys.exit(2)
+
+    command = args[0]
+    if command in ("import", "export"):
+        if len(args) < 2:
+            print(usage)
+            sys.exit(2)
+        archive = StoryArchive(args[2] if len(args) > 2 else archive_root("stories"))
+        if command == "import":
+            print(f"Imported {import_json(archive, args[1])} stories into {archive.root}")
+        else:
+            print(f"Exported {export_json(archive, args[1])} stories to {args[1]}")
+    elif command == "rebuild-index":
+        archive = StoryArchive(args[1] if len(args) > 1 else archive_root("stories"))
+        print(f"Indexed {archive.rebuild_index()} stories in {archive.index_path}")
+    elif command == "stats":
+        archive = StoryArchive(args[1] if len(args) > 1 else archive_root("stories"))
+        print(json.dumps(archive.stats()))
+    else:
+        print(usage)
+        sys.exit(2)
+    archive.close()
+
+
+if __name__ == "__main__":
+    main()
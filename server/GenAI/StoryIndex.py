@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Append-only manifest of saved stories.
+
+Each line of ``index.jsonl`` in the stories directory describes one story
+file, so listing stories never has to open or validate the story files
+themselves. If the index is lost or stale, rebuild it from the files:
+
+    python StoryIndex.py rebuild [stories_dir]
+"""
+import os
+import sys
+import json
+import logging
+import datetime
+import threading
+from typing import Dict, List, Optional
+from StoryQuery import matches, parse_time_range
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILENAME = "index.jsonl"
+_append_lock = threading.Lock()
+
+
+def timestamp_from_filename(filename: str) -> str:
+    """Timestamp suffix used by list_available_stories (story_<date>_<time>.json -> <time>)"""
+    return filename.split("_")[-1].replace(".json", "")
+
+
+class StoryIndex:
+    def __init__(self, stories_dir: str = os.path.join("output", "stories")):
+        self.stories_dir = stories_dir
+        self.path = os.path.join(stories_dir, INDEX_FILENAME)
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    @staticmethod
+    def make_entry(filename: str, title: str, interest_area: Optional[str] = None,
+                   interest: Optional[str] = None, concept: Optional[str] = None,
+                   difficulty: Optional[str] = None, created_at: Optional[str] = None) -> Dict:
+        return {
+            "story_id": filename.replace(".json", ""),
+            "filename": filename,
+            "title": title,
+            "interest_area": interest_area,
+            "interest": interest,
+            "concept": concept,
+            "difficulty": difficulty,
+            "timestamp": timestamp_from_filename(filename),
+            "created_at": created_at or datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        }
+
+    def append(self, entry: Dict) -> None:
+        """Append one entry; a single short write keeps concurrent appends line-atomic"""
+        os.makedirs(self.stories_dir, exist_ok=True)
+        line = json.dumps(entry) + "\n"
+        with _append_lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+
+    def read(self) -> List[Dict]:
+        """Latest entry per story, newest story first"""
+        entries: Dict[str, Dict] = {}
+        if not self.exists():
+            return []
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    entries[entry["story_id"]] = entry
+                except (json.JSONDecodeError, KeyError):
+                    # A torn final line from a crash; the rest of the index is still usable
+                    logger.warning(f"Skipping malformed index line in {self.path}")
+        return sorted(entries.values(), key=lambda e: e["filename"], reverse=True)
+
+    def query(self, interest_area: Optional[str] = None, concept: Optional[str] = None,
+              difficulty: Optional[str] = None, since: Optional[str] = None, until: Optional[str] = None,
+              offset: int = 0, limit: Optional[int] = None) -> Dict:
+        """
+        Filter and paginate index entries. since/until are ISO dates or datetimes
+        compared with created_at as instants (see StoryQuery.parse_time_range);
+        malformed bounds raise QueryError.
+        """
+        entries = self.read()
+        if interest_area:
+            entries = [e for e in entries if e.get("interest_area") == interest_area]
+        if concept:
+            entries = [e for e in entries if e.get("concept") == concept]
+        if difficulty:
+            entries = [e for e in entries if e.get("difficulty") == difficulty]
+        if since or until:
+            since_at, until_at = parse_time_range(since, until)
+            entries = [e for e in entries if matches(e, since=since_at, until=until_at)]
+
+        total = len(entries)
+        offset = max(0, offset)
+        page = entries[offset:offset + limit] if limit is not None else entries[offset:]
+        return {"stories": page, "total": total, "offset": offset, "limit": limit}
+
+    def rebuild(self) -> int:
+        """Recreate the index from the story files and return the number of stories indexed"""
+        from NovelGenerator import StoryData
+
+        entries = []
+        if os.path.isdir(self.stories_dir):
+            for filename in sorted(os.listdir(self.stories_dir)):
+                if not filename.endswith(".json"):
+                    continue
+                filepath = os.path.join(self.stories_dir, filename)
+                try:
+                    with open(filepath, "r", encoding="utf-8") as f:
+                        story = StoryData(**json.load(f))
+                except Exception as e:
+                    logger.warning(f"Skipping unreadable story {filename}: {e}")
+                    continue
+                created_at = datetime.datetime.fromtimestamp(
+                    os.path.getmtime(filepath), datetime.timezone.utc).isoformat(timespec="seconds")
+                entries.append(self.make_entry(filename, story.plot.title, created_at=created_at))
+
+        os.makedirs(self.stories_dir, exist_ok=True)
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            for entry in entries:
+                f.write(json.dumps(entry) + "\n")
+        with _append_lock:
+            os.replace(temp_path, self.path)
+        logger.info(f"Rebuilt story index with {len(entries)} stories")
+        return len(entries)
+
+
+def main() -> None:
+    if len(sys.argv) < 2 or sys.argv[1] != "rebuild":
+        print("Usage: python StoryIndex.py rebuild [stories_dir]")
+        sys.exit(2)
+    stories_dir = sys.argv[2] if len(sys.argv) > 2 else os.path.join("output", "stories")
+    count = StoryIndex(stories_dir).rebuild()
+    print(f"Indexed {count} stories in {os.path.join(stories_dir, INDEX_FILENAME)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+import os
+import time
+import queue
+import logging
+import threading
+import traceback
+from collections import deque, Counter
+from typing import Callable, Dict, NamedTuple, Optional
+from WorkScheduler import Preempted
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POOL_DEPTH = int(os.getenv("STORY_POOL_DEPTH", "2"))
+DEFAULT_POOL_MAX_AGE = float(os.getenv("STORY_POOL_MAX_AGE_SECONDS", "3600"))
+DEFAULT_POOL_MAX_KEYS = int(os.getenv("STORY_POOL_MAX_KEYS", "20"))
+
+
+class PoolKey(NamedTuple):
+    category: str
+    interest: str
+    topic: str
+    subtopic: str
+    difficulty: str
+
+    @classmethod
+    def from_state(cls, selected_interest: Optional[Dict], selected_concept: Optional[Dict],
+                   difficulty: Optional[str]) -> "PoolKey":
+        """Build a pool key from the generator's game state"""
+        selected_interest = selected_interest or {}
+        selected_concept = selected_concept or {}
+        return cls(
+            category=str(selected_interest.get("category", "Comics & Anime")),
+            interest=str(selected_interest.get("interest", "Spider-Man")),
+            topic=str(selected_concept.get("topic", "Budgeting")),
+            subtopic=str(selected_concept.get("subtopic", "")),
+            difficulty=str(difficulty or "beginner").lower(),
+        )
+
+
+class StoryPool:
+    """
+    Pool of pre-generated stories (with quiz, summary and images) keyed by
+    interest, concept and difficulty.
+
+    Entries are produced by ``producer(key)`` on a single background worker
+    thread. Only keys that have been requested are refilled, and at most
+    ``max_keys`` of the most requested keys are kept warm.
+    """
+
+    def __init__(self, producer: Callable[[PoolKey], Optional[Dict]],
+                 depth: int = DEFAULT_POOL_DEPTH,
+                 max_age_seconds: float = DEFAULT_POOL_MAX_AGE,
+                 max_keys: int = DEFAULT_POOL_MAX_KEYS):
+        self.producer = producer
+        self.depth = max(0, depth)
+        self.max_age_seconds = max_age_seconds
+        self.max_keys = max_keys
+
+        self._entries: Dict[PoolKey, deque] = {}
+        self._demand: Counter = Counter()
+        self._lock = threading.Lock()
+        self._refill_queue: "queue.Queue[Optional[PoolKey]]" = queue.Queue()
+        self._pending: set = set()
+        self._worker: Optional[threading.Thread] = None
+
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.refills = 0
+        self.refill_failures = 0
+        self.preempted = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.depth > 0
+
+    def _is_fresh(self, created_at: float) -> bool:
+        return time.monotonic() - created_at <= self.max_age_seconds
+
+    def _drop_expired(self, key: PoolKey) -> None:
+        """Remove stale entries for a key (caller must hold the lock)"""
+        entries = self._entries.get(key)
+        while entries and not self._is_fresh(entries[0][0]):
+            entries.popleft()
+            self.expired += 1
+
+    def pop(self, key: PoolKey) -> Optional[Dict]:
+        """Take a fresh pre-generated entry for the key, or None on a miss"""
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            self._demand[key] += 1
+            self._drop_expired(key)
+            entries = self._entries.get(key)
+            if entries:
+                self.hits += 1
+                _, entry = entries.popleft()
+                logger.info(f"Story pool hit for {key}")
+                return entry
+            self.misses += 1
+        logger.info(f"Story pool miss for {key}")
+        return None
+
+    def put(self, key: PoolKey, entry: Dict) -> None:
+        """Add a ready-to-serve entry for the key"""
+        with self._lock:
+            self._entries.setdefault(key, deque()).append((time.monotonic(), entry))
+
+    def size(self, key: PoolKey) -> int:
+        with self._lock:
+            self._drop_expired(key)
+            return len(self._entries.get(key, ()))
+
+    def _is_popular(self, key: PoolKey) -> bool:
+        """Check whether the key is among the most requested keys (caller must hold the lock)"""
+        popular = {k for k, _ in self._demand.most_common(self.max_keys)}
+        return key in popular
+
+    def request_refill(self, key: PoolKey) -> None:
+        """Schedule a background refill of the key up to the configured depth"""
+        if not self.enabled:
+            return
+
+        with self._lock:
+            if key in self._pending or not self._is_popular(key):
+                return
+            self._pending.add(key)
+        self._ensure_worker()
+        self._refill_queue.put(key)
+
+    def _ensure_worker(self) -> None:
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="story-pool-refill", daemon=True)
+                self._worker.start()
+
+    def _run(self) -> None:
+        while True:
+            key = self._refill_queue.get()
+            if key is None:
+                self._refill_queue.task_done()
+                return
+            try:
+                self._refill(key)
+            finally:
+                with self._lock:
+                    self._pending.discard(key)
+                self._refill_queue.task_done()
+
+    def _refill(self, key: PoolKey) -> None:
+        while self.size(key) < self.depth:
+            try:
+                entry = self.producer(key)
+            except Preempted:
+                # Interactive traffic needs the model; the next request for the key retries
+                self.preempted += 1
+                logger.info(f"Story pool refill for {key} preempted by interactive work")
+                return
+            except Exception as e:
+                logger.error(f"Story pool refill failed for {key}: {e}")
+                logger.error(traceback.format_exc())
+                entry = None
+
+            if not entry:
+                self.refill_failures += 1
+                return
+
+            self.put(key, entry)
+            self.refills += 1
+            logger.info(f"Story pool refilled {key} ({self.size(key)}/{self.depth})")
+
+    def wait_idle(self) -> None:
+        """Block until all scheduled refills have finished"""
+        self._refill_queue.join()
+
+    def stop(self) -> None:
+        """Stop the background worker after pending refills"""
+        if self._worker and self._worker.is_alive():
+            self._refill_queue.put(None)
+            self._worker.join()
+
+    def stats(self) -> Dict:
+        """Pool depth, freshness and hit-rate metrics"""
+        with self._lock:
+            for key in list(self._entries):
+                self._drop_expired(key)
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "depth": self.depth,
+                "max_age_seconds": self.max_age_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "expired": self.expired,
+                "refills": self.refills,
+                "refill_failures": self.refill_failures,
+                "preempted": self.preempted,
+                "pending_refills": len(self._pending),
+                "keys": [
+                    {**key._asdict(), "ready": len(entries), "requests": self._demand[key]}
+                    for key, entries in self._entries.items()
+                ],
+            }
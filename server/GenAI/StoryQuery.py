@@ -0,0 +1,177 @@
+"""
+Cursor pagination, filtering and field projection for the story read endpoints.
+"""
+import json
+import base64
+import binascii
+import datetime
+from typing import Dict, List, Optional, Tuple
+from CacheBackend import CacheBackend
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+class QueryError(ValueError):
+    """Invalid cursor, filter or field list; reported to the client as a 400"""
+
+
+def build_story_meta(story_data: Dict, selected_interest: Optional[Dict], selected_concept: Optional[Dict],
+                     difficulty: Optional[str]) -> Dict:
+    """Small listing record stored next to each story so listing never loads story bodies"""
+    selected_interest = selected_interest or {}
+    selected_concept = selected_concept or {}
+    return {
+        "title": story_data.get("plot", {}).get("title", "Untitled"),
+        "category": selected_interest.get("category"),
+        "interest": selected_interest.get("interest"),
+        "topic": selected_concept.get("topic"),
+        "difficulty": (difficulty or "").lower() or None,
+        "created_at": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+    }
+
+
+def encode_cursor(story_id: str, position: int) -> str:
+    """Cursor after ``story_id``, carrying its cache position so the next page is a range read"""
+    payload = {"after": story_id, "pos": position}
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, Optional[int]]:
+    """(story id, cache position); the position is None for cursors issued without one"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        after, position = payload["after"], payload.get("pos")
+    except (binascii.Error, ValueError, KeyError, TypeError, AttributeError):
+        raise QueryError("Invalid cursor")
+    if not isinstance(after, str) or not (position is None or (isinstance(position, int) and position >= 0)):
+        raise QueryError("Invalid cursor")
+    return after, position
+
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """Split a ``fields=a,b.c`` parameter into dotted paths (None means everything)"""
+    if not fields:
+        return None
+    paths = [path.strip() for path in fields.split(",") if path.strip()]
+    if not paths:
+        raise QueryError("fields must name at least one field")
+    return paths
+
+
+def project(payload: Dict, paths: Optional[List[str]], always: Tuple[str, ...] = ()) -> Dict:
+    """Keep only the requested dotted paths (plus ``always`` keys); missing paths are skipped"""
+    if paths is None:
+        return payload
+    result = {key: payload[key] for key in always if key in payload}
+    for path in paths:
+        parts = path.split(".")
+        value = payload
+        for part in parts:
+            if not isinstance(value, dict) or part not in value:
+                break
+            value = value[part]
+        else:
+            target = result
+            for part in parts[:-1]:
+                target = target.setdefault(part, {})
+                if not isinstance(target, dict):
+                    break
+            else:
+                target[parts[-1]] = value
+    return result
+
+
+def parse_time(value: Optional[str], name: str, end_of_day: bool = False) -> Optional[datetime.datetime]:
+    """
+    ISO date or datetime filter as an aware datetime (naive values are UTC). A
+    bare date means the start of that day, or its end when ``end_of_day``.
+    """
+    if not value:
+        return None
+    # An unencoded "+" in a query string arrives as a space
+    text = value.strip().replace(" ", "+") if "T" in value else value.strip()
+    try:
+        if len(text) == 10:
+            day = datetime.date.fromisoformat(text)
+            moment = datetime.datetime.combine(day, datetime.time.max if end_of_day else datetime.time.min)
+        else:
+            moment = datetime.datetime.fromisoformat(text)
+    except ValueError:
+        raise QueryError(f"{name} must be an ISO date or datetime")
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=datetime.timezone.utc)
+    return moment
+
+
+def parse_time_range(since: Optional[str], until: Optional[str]) -> Tuple[Optional[datetime.datetime],
+                                                                          Optional[datetime.datetime]]:
+    """since/until query parameters as inclusive bounds; a date-only ``until`` covers that whole day"""
+    return parse_time(since, "since"), parse_time(until, "until", end_of_day=True)
+
+
+def _created_at(meta: Dict) -> Optional[datetime.datetime]:
+    try:
+        created_at = datetime.datetime.fromisoformat(meta["created_at"])
+    except (KeyError, TypeError, ValueError):
+        return None
+    return created_at if created_at.tzinfo else created_at.replace(tzinfo=datetime.timezone.utc)
+
+
+def matches(meta: Dict, category: Optional[str] = None, difficulty: Optional[str] = None,
+            since: Optional[datetime.datetime] = None, until: Optional[datetime.datetime] = None) -> bool:
+    """Filter check for one story; since/until are bounds from parse_time_range"""
+    if category and meta.get("category") != category:
+        return False
+    if difficulty and meta.get("difficulty") != difficulty.lower():
+        return False
+    if since or until:
+        created_at = _created_at(meta)
+        if created_at is None:
+            return False
+        if since and created_at < since:
+            return False
+        if until and created_at > until:
+            return False
+    return True
+
+
+def paginate(store: CacheBackend, meta_for, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None,
+             category: Optional[str] = None, difficulty: Optional[str] = None, since: Optional[str] = None,
+             until: Optional[str] = None) -> Tuple[List[Tuple[str, Dict]], Optional[str]]:
+    """
+    Return one page of (id, meta) pairs in insertion order plus the cursor for
+    the next page (None on the last page). Pages are read from the cursor's
+    position with ranged reads on the cache, so deep pages cost no more than
+    the first.
+    """
+    if limit < 1 or limit > MAX_PAGE_SIZE:
+        raise QueryError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+    since_at, until_at = parse_time_range(since, until)
+    filters = {"category": category, "difficulty": difficulty, "since": since_at, "until": until_at}
+
+    position = 0
+    if cursor:
+        after, position = decode_cursor(cursor)
+        if position is None:
+            position = store.position(after)
+            if position is None:
+                raise QueryError("Invalid cursor")
+
+    # Unfiltered pages need one extra key to know whether a next page exists
+    batch_size = MAX_PAGE_SIZE if any(filters.values()) else limit + 1
+    page: List[Tuple[str, Dict]] = []
+    last_position = position
+    while True:
+        batch = store.keys_after(position, batch_size)
+        for position, story_id in batch:
+            meta = meta_for(story_id)
+            if meta is None or not matches(meta, **filters):
+                continue
+            if len(page) == limit:
+                return page, encode_cursor(page[-1][0], last_position)
+            page.append((story_id, meta))
+            last_position = position
+        if len(batch) < batch_size:
+            return page, None
@@ -1,35 +1,59 @@
 from pydantic import BaseModel
 from typing import Dict, List, Optional
-from google import genai
-from google.genai.errors import ClientError
+from startup import lazy_import
+from SummaryCache import SummaryCache, SUMMARY_CACHE, summary_key
+from WorkScheduler import scheduler
 import os
 import json
 import logging
 import traceback
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger(__name__)
 
+genai = lazy_import("google.genai")
+errors = lazy_import("google.genai.errors")
+
+# Rough characters-per-token ratio for Gemini models on English text
+CHARS_PER_TOKEN = 4
+# Dialogue above this many estimated tokens is summarized in chunks
+CHUNK_TOKEN_LIMIT = int(os.getenv("SUMMARY_CHUNK_TOKENS", "1500"))
+CHUNK_MAX_WORKERS = int(os.getenv("SUMMARY_CHUNK_WORKERS", "4"))
+# Saved summaries and the summary cache live here (the repo's output/summaries by default)
+SUMMARY_DIR = os.getenv("SUMMARY_DIR", os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "output", "summaries"))
+MAX_REDUCE_PASSES = 3
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate used to choose between single-shot and chunked summarization"""
+    if not text:
+        return 0
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+
 class Summarizer(BaseModel):
     topic: str
     learning_summary: Dict[str, List[str] | str]
 
 
 class Summarize:
-    def __init__(self):
+    def __init__(self, chunk_token_limit: int = CHUNK_TOKEN_LIMIT, max_workers: int = CHUNK_MAX_WORKERS,
+                 cache: Optional[SummaryCache] = None):
         try:
+            self.chunk_token_limit = chunk_token_limit
+            self.max_workers = max_workers
             api_key = os.getenv("GEMINI_API")
             if not api_key:
                 raise ValueError("GEMINI_API environment variable is not set")
             self.client = genai.Client(api_key=api_key)
             
-            base_dir = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
-            self.summary_dir = os.path.join(base_dir, "output", "summaries")
+            self.summary_dir = SUMMARY_DIR
             os.makedirs(self.summary_dir, exist_ok=True)
+            if cache is None and SUMMARY_CACHE:
+                cache = SummaryCache(self.summary_dir)
+            self.cache = cache
             logger.info("Summarizer initialized successfully")
         except Exception as e:
             logger.error(f"Failed to initialize Summarizer: {e}")
@@ -80,6 +104,77 @@ class Summarize:
         
         raise ValueError(f"Could not parse JSON from response: {response_text[:200]}...")
 
+    def _chunk_dialogue(self, dialogue_texts: List[str], max_tokens: int) -> List[List[str]]:
+        """Split dialogue lines into consecutive windows of at most max_tokens estimated tokens"""
+        chunks: List[List[str]] = []
+        current: List[str] = []
+        current_tokens = 0
+        
+        for text in dialogue_texts:
+            tokens = estimate_tokens(text)
+            if current and current_tokens + tokens > max_tokens:
+                chunks.append(current)
+                current, current_tokens = [], 0
+            current.append(text)
+            current_tokens += tokens
+        
+        if current:
+            chunks.append(current)
+        return chunks
+
+    def _summarize_chunk(self, plot_title: str, index: int, total: int, lines: List[str]) -> str:
+        """Condense one window of dialogue into the financial actions it contains"""
+        prompt = f"""
+            This is part {index + 1} of {total} of the financial literacy story "{plot_title}".
+            
+            Dialogue:
+            {chr(10).join(lines)}
+            
+            In at most three short sentences of plain text, describe the financial actions,
+            decisions and lessons in this part. Do not return JSON.
+            """
+        try:
+            with scheduler.slot():
+                response = self.client.models.generate_content(
+                    model="gemini-2.0-flash-lite",
+                    contents=prompt,
+                )
+            if not response or not getattr(response, 'text', None):
+                raise ValueError("Invalid response from API")
+            return response.text.strip()
+        except Exception as e:
+            # Keep the reduce step going with a clipped copy of the raw chunk
+            logger.warning(f"Chunk {index + 1}/{total} summary failed, using raw dialogue: {e}")
+            budget = (self.chunk_token_limit // max(total, 1)) * CHARS_PER_TOKEN
+            return ', '.join(lines)[:max(budget, 200)]
+
+    def _condense_dialogue(self, plot_title: str, dialogue_texts: List[str]) -> str:
+        """
+        Map-reduce long dialogue into a bounded 'Actions' text.
+        
+        Chunks are summarized concurrently; if the combined chunk summaries are
+        still over the token limit they are chunked and summarized again.
+        """
+        texts = dialogue_texts
+        condensed = ', '.join(texts)
+        for _ in range(MAX_REDUCE_PASSES):
+            chunks = self._chunk_dialogue(texts, self.chunk_token_limit)
+            logger.info(f"Summarizing {len(texts)} lines in {len(chunks)} chunks for: {plot_title}")
+            
+            # Pool threads don't inherit context variables; each chunk runs in a copy of ours
+            # so its model call keeps the caller's scheduling class and user
+            contexts = [contextvars.copy_context() for _ in chunks]
+            with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(chunks)))) as executor:
+                texts = list(executor.map(
+                    lambda args: contexts[args[0]].run(self._summarize_chunk, plot_title, args[0], len(chunks), args[1]),
+                    enumerate(chunks)
+                ))
+            
+            condensed = ' '.join(texts)
+            if len(chunks) == 1 or estimate_tokens(condensed) <= self.chunk_token_limit:
+                break
+        return condensed
+
     def generate_summary(self, story_data: Dict, selected_interest: Optional[Dict] = None) -> Dict:
         """
         Generate a summary from story data
@@ -109,6 +204,13 @@ class Summarize:
                     }
                 }
             
+            key = summary_key(story_data, selected_interest)
+            if self.cache is not None:
+                cached = self.cache.get(key)
+                if cached is not None:
+                    logger.info(f"Summary cache hit for: {story_data['plot'].get('title', plot_title)}")
+                    return cached
+            
             plot = story_data["plot"]
             dialogue = story_data["dialogue"]
             visuals = story_data["visuals"]
@@ -133,13 +235,17 @@ class Summarize:
                 elif isinstance(d, str):
                     dialogue_texts.append(d)
             
+            actions = ', '.join(dialogue_texts) if dialogue_texts else 'Financial planning activities'
+            if estimate_tokens(actions) > self.chunk_token_limit:
+                actions = self._condense_dialogue(plot_title, dialogue_texts)
+            
             prompt = f"""
             Generate a JSON summary of financial lessons from {plot_title}.
             
             Story Context:
             - Plot: {plot.get('setup', 'Financial education story')}
             - Elements: {visuals.get('financial_elements', 'Financial concepts')}
-            - Actions: {', '.join(dialogue_texts) if dialogue_texts else 'Financial planning activities'}{interest_context}
+            - Actions: {actions}{interest_context}
             
             Return only valid JSON in this exact format:
             {{
@@ -164,20 +270,24 @@ class Summarize:
             
             # Make API call with error handling
             try:
-                response = self.client.models.generate_content(
-                    model="gemini-2.0-flash-lite",
-                    contents=prompt,
-                )
+                with scheduler.slot():
+                    response = self.client.models.generate_content(
+                        model="gemini-2.0-flash-lite",
+                        contents=prompt,
+                    )
             
                 if not response or not hasattr(response, 'text'):
                     raise ValueError("Invalid response from API")
             
                 summary_data = self._parse_json_response(response.text)
                 logger.info(f"Successfully generated summary for: {plot_title}")
+                # Only model output is cached; fallbacks are retried on the next request
+                if self.cache is not None:
+                    self.cache.put(key, summary_data)
                 return summary_data
 
-            except ClientError as e:
-                error_code = getattr(e, 'status_code', 'UNKNOWN')
+            except errors.ClientError as e:
+                error_code = getattr(e, 'status_code', None) or getattr(e, 'code', 'UNKNOWN')
                 error_message = str(e)
                 logger.error(f"Gemini API error (code: {error_code}): {error_message}")
                 
@@ -223,3 +333,9 @@ class Summarize:
                 "real_world_example": "Basic example demonstrating the financial concept in everyday life"
                 }
             }
+
+
+if __name__ == "__main__":
+    # python Summarizer.py [--worker | <json params>]
+    from worker import main
+    main(default_method="generate_summary")
@@ -0,0 +1,181 @@
+"""
+Two-tier store for generated learning summaries.
+
+Summaries are keyed by a stable hash of the normalized story content the
+summary prompt reads, plus the interest context. Lookups check an in-memory
+LRU first and then <root>/<story hash>-<interest hash>.json on disk, so a
+repeat request for an unchanged story never reaches the model. Invalidating a
+story drops every interest variant of it from both tiers.
+"""
+import os
+import json
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from HttpCaching import content_hash
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_CACHE = os.getenv("SUMMARY_CACHE", "true").lower() in ("1", "true", "yes")
+SUMMARY_CACHE_SIZE = int(os.getenv("SUMMARY_CACHE_SIZE", "256"))
+# Bump when the summary prompt changes so stale summaries are not served
+SUMMARY_PROMPT_VERSION = "1"
+
+
+def _normalize(text) -> str:
+    return " ".join(str(text or "").split())
+
+
+def story_hash(story_data: Dict) -> str:
+    """Hash of the story fields the summary prompt reads; formatting and unrelated fields are ignored"""
+    plot = story_data.get("plot", {}) or {}
+    dialogue = []
+    for line in story_data.get("dialogue", []) or []:
+        if isinstance(line, dict) and "text" in line:
+            dialogue.append(_normalize(line["text"]))
+        elif isinstance(line, str):
+            dialogue.append(_normalize(line))
+    return content_hash({
+        "version": SUMMARY_PROMPT_VERSION,
+        "title": _normalize(plot.get("title")),
+        "setup": _normalize(plot.get("setup")),
+        "elements": _normalize((story_data.get("visuals", {}) or {}).get("financial_elements")),
+        "dialogue": dialogue,
+    })[:24]
+
+
+def interest_hash(selected_interest: Optional[Dict]) -> str:
+    """Hash of the interest context; only interest and category reach the prompt"""
+    interest = category = ""
+    if isinstance(selected_interest, dict):
+        interest = _normalize(selected_interest.get("interest")).lower()
+        category = _normalize(selected_interest.get("category")).lower()
+    if not (interest and category):
+        interest = category = ""
+    return content_hash({"interest": interest, "category": category})[:12]
+
+
+def summary_key(story_data: Dict, selected_interest: Optional[Dict] = None) -> str:
+    return f"{story_hash(story_data)}-{interest_hash(selected_interest)}"
+
+
+class SummaryCache:
+    def __init__(self, root: str, max_entries: int = SUMMARY_CACHE_SIZE):
+        self.root = root
+        self.max_entries = max_entries
+        self._memory: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, f"{key}.json")
+
+    def _remember(self, key: str, summary: Dict) -> None:
+        """Insert into the memory tier (caller must hold the lock)"""
+        self._memory[key] = summary
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, key: str, count_miss: bool = True) -> Optional[Dict]:
+        """Cached summary or None; a lookup that generation repeats passes count_miss=False"""
+        with self._lock:
+            summary = self._memory.get(key)
+            if summary is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return summary
+
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                summary = json.load(f)["summary"]
+        except FileNotFoundError:
+            summary = None
+        except (OSError, json.JSONDecodeError, KeyError, TypeError) as e:
+            logger.warning(f"Ignoring unreadable cached summary {key}: {e}")
+            summary = None
+
+        with self._lock:
+            if summary is None:
+                if count_miss:
+                    self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._remember(key, summary)
+            return summary
+
+    def put(self, key: str, summary: Dict) -> None:
+        temp_path = self._path(key) + f".{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump({"key": key, "summary": summary}, f)
+            os.replace(temp_path, self._path(key))
+        except OSError as e:
+            logger.warning(f"Could not persist summary {key}: {e}")
+        with self._lock:
+            self._remember(key, summary)
+            self.writes += 1
+
+    def invalidate(self, key: str) -> bool:
+        """Drop one summary from both tiers"""
+        with self._lock:
+            removed = self._memory.pop(key, None) is not None
+        try:
+            os.remove(self._path(key))
+            removed = True
+        except FileNotFoundError:
+            pass
+        if removed:
+            with self._lock:
+                self.invalidations += 1
+        return removed
+
+    def invalidate_story(self, story_data: Dict) -> int:
+        """Drop every interest variant of a story's summary; returns how many were removed"""
+        prefix = story_hash(story_data) + "-"
+        with self._lock:
+            keys = {key for key in self._memory if key.startswith(prefix)}
+        keys.update(name[:-len(".json")] for name in os.listdir(self.root)
+                    if name.startswith(prefix) and name.endswith(".json"))
+        return sum(self.invalidate(key) for key in keys)
+
+    def clear(self) -> int:
+        with self._lock:
+            self._memory.clear()
+        removed = 0
+        for name in os.listdir(self.root):
+            if name.endswith(".json"):
+                try:
+                    os.remove(os.path.join(self.root, name))
+                    removed += 1
+                except FileNotFoundError:
+                    pass
+        with self._lock:
+            self.invalidations += removed
+        return removed
+
+    def stats(self) -> Dict:
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                "memory_entries": len(self._memory),
+                "max_entries": self.max_entries,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "writes": self.writes,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
@@ -0,0 +1,174 @@
+"""
+Priority scheduling for model calls.
+
+Every blocking Gemini call takes a slot from the process-wide scheduler.
+When slots are short, queued calls are granted by priority class (interactive
+story text, then quiz/summary, then images, then pool pre-generation) and,
+within a class, round-robin between users so one user's burst cannot crowd
+out others. Lower classes are capped at a share of the slots, so text calls
+always find free capacity even while a burst of image calls is running.
+Queued pre-generation work is preempted (cancelled with Preempted) as soon
+as interactive work is waiting.
+
+The class and user come from context variables set by the caller with
+``work_context``; run_in_threadpool copies them into the worker thread.
+"""
+import os
+import time
+import logging
+import threading
+import contextvars
+from collections import Counter, OrderedDict, deque
+from contextlib import contextmanager
+from typing import Deque, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = 0
+FOLLOWUP = 1
+IMAGES = 2
+PREGENERATION = 3
+CLASS_NAMES = {INTERACTIVE: "interactive", FOLLOWUP: "quiz_summary", IMAGES: "images", PREGENERATION: "pregeneration"}
+
+MODEL_SLOTS = int(os.getenv("MODEL_CONCURRENCY", "8"))
+# Fraction of the slots each class may hold at once
+IMAGE_SLOT_SHARE = float(os.getenv("MODEL_IMAGE_SHARE", "0.5"))
+PREGENERATION_SLOT_SHARE = float(os.getenv("MODEL_PREGENERATION_SHARE", "0.25"))
+
+work_class_var: contextvars.ContextVar[int] = contextvars.ContextVar("work_class", default=INTERACTIVE)
+work_user_var: contextvars.ContextVar[str] = contextvars.ContextVar("work_user", default="anonymous")
+
+
+class Preempted(BaseException):
+    """
+    Queued pre-generation work was dropped in favour of interactive work.
+
+    Like asyncio.CancelledError this is a BaseException, so the generators'
+    catch-all fallbacks don't turn a preempted call into a fallback story.
+    """
+
+
+@contextmanager
+def work_context(work_class: int, user: Optional[str] = None):
+    """Run the block's model calls (including those in threadpool workers it starts) as ``work_class``"""
+    class_token = work_class_var.set(work_class)
+    user_token = work_user_var.set(user) if user else None
+    try:
+        yield
+    finally:
+        work_class_var.reset(class_token)
+        if user_token is not None:
+            work_user_var.reset(user_token)
+
+
+class _Ticket:
+    __slots__ = ("work_class", "user", "granted", "preempted", "queued_at")
+
+    def __init__(self, work_class: int, user: str):
+        self.work_class = work_class
+        self.user = user
+        self.granted = False
+        self.preempted = False
+        self.queued_at = time.monotonic()
+
+
+class WorkScheduler:
+    def __init__(self, slots: int = MODEL_SLOTS, image_share: float = IMAGE_SLOT_SHARE,
+                 pregeneration_share: float = PREGENERATION_SLOT_SHARE):
+        self.slots = max(1, slots)
+        self.class_limits = {
+            INTERACTIVE: self.slots,
+            FOLLOWUP: self.slots,
+            IMAGES: max(1, int(self.slots * image_share)),
+            PREGENERATION: max(1, int(self.slots * pregeneration_share)),
+        }
+        self._cond = threading.Condition()
+        self._running: Counter = Counter()
+        # class -> user -> FIFO of tickets; user order is the round-robin order
+        self._queues: Dict[int, "OrderedDict[str, Deque[_Ticket]]"] = {c: OrderedDict() for c in CLASS_NAMES}
+
+        self.granted: Counter = Counter()
+        self.preempted: Counter = Counter()
+        self._wait_total: Counter = Counter()
+
+    def _queued(self, work_class: int) -> int:
+        return sum(len(tickets) for tickets in self._queues[work_class].values())
+
+    def _dispatch(self) -> None:
+        """Grant free slots to the best queued tickets (caller holds the lock)"""
+        granted_any = False
+        while sum(self._running.values()) < self.slots:
+            ticket = None
+            for work_class in sorted(CLASS_NAMES):
+                users = self._queues[work_class]
+                if not users or self._running[work_class] >= self.class_limits[work_class]:
+                    continue
+                user, tickets = next(iter(users.items()))
+                ticket = tickets.popleft()
+                # Next grant in this class goes to the next user in line
+                del users[user]
+                if tickets:
+                    users[user] = tickets
+                break
+            if ticket is None:
+                break
+            ticket.granted = True
+            self._running[ticket.work_class] += 1
+            self.granted[ticket.work_class] += 1
+            self._wait_total[ticket.work_class] += time.monotonic() - ticket.queued_at
+            granted_any = True
+        if granted_any:
+            self._cond.notify_all()
+
+    def _preempt_pregeneration(self) -> None:
+        users = self._queues[PREGENERATION]
+        for tickets in users.values():
+            for ticket in tickets:
+                ticket.preempted = True
+                self.preempted[PREGENERATION] += 1
+        if users:
+            logger.info(f"Preempted {self._queued(PREGENERATION)} queued pre-generation calls")
+            users.clear()
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, work_class: Optional[int] = None, user: Optional[str] = None):
+        """Hold a model-call slot for the block; raises Preempted for dropped pre-generation work"""
+        ticket = _Ticket(work_class_var.get() if work_class is None else work_class, user or work_user_var.get())
+        with self._cond:
+            self._queues[ticket.work_class].setdefault(ticket.user, deque()).append(ticket)
+            self._dispatch()
+            if ticket.work_class == INTERACTIVE and not ticket.granted:
+                self._preempt_pregeneration()
+            while not ticket.granted:
+                if ticket.preempted:
+                    raise Preempted(f"{CLASS_NAMES[ticket.work_class]} call preempted")
+                self._cond.wait()
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._running[ticket.work_class] -= 1
+                self._dispatch()
+
+    def stats(self) -> Dict:
+        with self._cond:
+            return {
+                "slots": self.slots,
+                "classes": {
+                    name: {
+                        "limit": self.class_limits[work_class],
+                        "running": self._running[work_class],
+                        "queued": self._queued(work_class),
+                        "queued_users": len(self._queues[work_class]),
+                        "granted": self.granted[work_class],
+                        "preempted": self.preempted[work_class],
+                        "avg_wait_seconds": (self._wait_total[work_class] / self.granted[work_class]
+                                             if self.granted[work_class] else 0.0),
+                    }
+                    for work_class, name in CLASS_NAMES.items()
+                },
+            }
+
+
+scheduler = WorkScheduler()
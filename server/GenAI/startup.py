@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Helpers for fast startup: deferred imports, deferred construction, an
+import-time profile report and a warmup runner.
+
+    python startup.py web_server        # per-package import-time report
+"""
+import sys
+import time
+import types
+import importlib
+import threading
+import subprocess
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+class LazyModule(types.ModuleType):
+    """
+    Module placeholder that imports the real module on first attribute access.
+
+    Attribute writes are forwarded too, so ``patch('QuizGenerator.genai.Client')``
+    keeps working exactly as it does on an eagerly imported module.
+    """
+
+    def __init__(self, name: str, *submodules: str):
+        super().__init__(name)
+        self.__dict__["_lazy_submodules"] = submodules
+        self.__dict__["_lazy_module"] = None
+
+    def _load(self) -> types.ModuleType:
+        module = self.__dict__["_lazy_module"]
+        if module is None:
+            module = importlib.import_module(self.__name__)
+            for submodule in self.__dict__["_lazy_submodules"]:
+                importlib.import_module(submodule)
+            self.__dict__["_lazy_module"] = module
+        return module
+
+    def __getattr__(self, name: str):
+        return getattr(self._load(), name)
+
+    def __setattr__(self, name: str, value) -> None:
+        setattr(self._load(), name, value)
+
+    def __delattr__(self, name: str) -> None:
+        delattr(self._load(), name)
+
+    def __dir__(self) -> List[str]:
+        return dir(self._load())
+
+
+def lazy_import(name: str, *submodules: str) -> LazyModule:
+    """Return a placeholder for ``name``; ``submodules`` are imported alongside it on first use"""
+    return LazyModule(name, *submodules)
+
+
+class LazyInstance:
+    """
+    Proxy that builds an object with ``factory()`` on first use and then
+    forwards attribute access, writes and deletes to it.
+    """
+
+    def __init__(self, factory: Callable[[], object]):
+        object.__setattr__(self, "_lazy_factory", factory)
+        object.__setattr__(self, "_lazy_instance", None)
+        object.__setattr__(self, "_lazy_lock", threading.Lock())
+
+    def _get(self):
+        instance = object.__getattribute__(self, "_lazy_instance")
+        if instance is None:
+            with object.__getattribute__(self, "_lazy_lock"):
+                instance = object.__getattribute__(self, "_lazy_instance")
+                if instance is None:
+                    instance = object.__getattribute__(self, "_lazy_factory")()
+                    object.__setattr__(self, "_lazy_instance", instance)
+        return instance
+
+    def __getattr__(self, name: str):
+        return getattr(self._get(), name)
+
+    def __setattr__(self, name: str, value) -> None:
+        setattr(self._get(), name, value)
+
+    def __delattr__(self, name: str) -> None:
+        delattr(self._get(), name)
+
+
+def is_initialized(obj) -> bool:
+    """True once a LazyInstance has built its object (always True for plain objects)"""
+    if isinstance(obj, LazyInstance):
+        return object.__getattribute__(obj, "_lazy_instance") is not None
+    return obj is not None
+
+
+class Warmup:
+    """
+    Runs named warmup steps once and records how each one went.
+
+    ``status`` moves from not_started to running to done (or failed when a
+    required step raised). Optional steps may fail without failing warmup.
+    """
+
+    def __init__(self, steps: List[Tuple[str, Callable[[], object], bool]]):
+        self.steps = steps
+        self.status = "not_started"
+        self.results: Dict[str, Dict] = {}
+        self.duration_ms: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def done(self) -> bool:
+        return self.status == "done"
+
+    def step_ok(self, name: str) -> bool:
+        return self.results.get(name, {}).get("ok", False)
+
+    def run(self) -> Dict:
+        with self._lock:
+            if self.status in ("running", "done"):
+                return self.state()
+            self.status = "running"
+
+        started = time.perf_counter()
+        failed = False
+        for name, step, required in self.steps:
+            step_started = time.perf_counter()
+            try:
+                step()
+                self.results[name] = {"ok": True}
+            except Exception as e:
+                self.results[name] = {"ok": False, "error": str(e)}
+                failed = failed or required
+            self.results[name]["duration_ms"] = round((time.perf_counter() - step_started) * 1000, 1)
+
+        self.duration_ms = round((time.perf_counter() - started) * 1000, 1)
+        self.status = "failed" if failed else "done"
+        return self.state()
+
+    def run_in_background(self) -> threading.Thread:
+        thread = threading.Thread(target=self.run, name="warmup", daemon=True)
+        thread.start()
+        return thread
+
+    def state(self) -> Dict:
+        return {"status": self.status, "duration_ms": self.duration_ms, "steps": dict(self.results)}
+
+
+def import_time_report(module: str, top: int = 15, python: Optional[str] = None) -> Dict:
+    """
+    Import ``module`` in a fresh interpreter with ``-X importtime`` and sum the
+    self time per top-level package.
+    """
+    result = subprocess.run(
+        [python or sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True
+    )
+    per_package: Dict[str, int] = defaultdict(int)
+    total_us = 0
+    for line in result.stderr.splitlines():
+        parts = line[len("import time:"):].split("|")
+        if not line.startswith("import time:") or len(parts) != 3:
+            continue
+        try:
+            self_us, cumulative_us = int(parts[0]), int(parts[1])
+        except ValueError:
+            continue  # header line
+        name = parts[2].strip()
+        per_package[name.split(".")[0]] += self_us
+        if name == module:
+            total_us = cumulative_us
+
+    ranked: List[Tuple[str, int]] = sorted(per_package.items(), key=lambda item: item[1], reverse=True)
+    return {
+        "module": module,
+        "total_ms": round(total_us / 1000, 1),
+        "packages": [{"package": name, "self_ms": round(us / 1000, 1)} for name, us in ranked[:top]],
+    }
+
+
+def main() -> None:
+    module = sys.argv[1] if len(sys.argv) > 1 else "web_server"
+    report = import_time_report(module)
+    print(f"Import time for {report['module']}: {report['total_ms']}ms")
+    for entry in report["packages"]:
+        print(f"  {entry['self_ms']:>9.1f}ms  {entry['package']}")
+
+
+if __name__ == "__main__":
+    main()
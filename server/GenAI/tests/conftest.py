@@ -17,6 +17,12 @@ os.environ["GEMINI_API"] = "test_api_key_12345"
 os.environ["CLOUD_NAME"] = "test_cloud"
 os.environ["CLOUDINARY_API_KEY"] = "test_cloudinary_key"
 os.environ["CLOUDINARY_API_SECRET"] = "test_cloudinary_secret"
+# Keep the background story pool from calling the model during tests
+os.environ["STORY_POOL_DEPTH"] = "0"
+# Summaries are persisted under output/summaries; tests opt in with a temp dir
+os.environ["SUMMARY_CACHE"] = "false"
+# Image jobs are persisted under output/; tests use their own queue files
+os.environ["IMAGE_JOBS"] = "false"
 
 from fastapi.testclient import TestClient
 from web_server import app
@@ -220,12 +226,20 @@ def temp_interests_file(tmp_path):
 @pytest.fixture(autouse=True)
 def reset_cache():
     """Reset caches before each test"""
-    from web_server import story_cache, quiz_cache, summary_cache
+    from web_server import story_cache, quiz_cache, summary_cache, story_meta_cache, frontend_cache, answer_key_cache, quiz_variant_cache
     story_cache.clear()
     quiz_cache.clear()
     summary_cache.clear()
+    story_meta_cache.clear()
+    frontend_cache.clear()
+    answer_key_cache.clear()
+    quiz_variant_cache.clear()
     yield
     story_cache.clear()
     quiz_cache.clear()
     summary_cache.clear()
+    story_meta_cache.clear()
+    frontend_cache.clear()
+    answer_key_cache.clear()
+    quiz_variant_cache.clear()
 
@@ -48,6 +48,7 @@ class TestAPIEndpoints:
             hooks=Hooks(**sample_story_data["hooks"])
         )
         
+        mock_generator.fork.return_value = mock_generator
         mock_generator.load_user_data.return_value = None
         mock_generator.game_state.difficulty = "beginner"
         mock_generator.game_state.selected_interest = {"category": "Comics & Anime", "interest": "Spider-Man"}
@@ -70,6 +71,60 @@ class TestAPIEndpoints:
         assert "quiz" in data
         assert "summary" in data
     
+    @patch('web_server.generator')
+    @patch('web_server.quiz_generator')
+    @patch('web_server.summarizer')
+    def test_generate_endpoint_pool_hit(self, mock_summarizer, mock_quiz_gen, mock_generator,
+                                        client, sample_story_data, sample_quiz_data, sample_summary_data):
+        """Test story generation served from the pre-generated pool"""
+        from StoryPool import StoryPool, PoolKey
+        
+        mock_generator.fork.return_value = mock_generator
+        mock_generator.load_user_data.return_value = None
+        mock_generator.game_state.difficulty = "beginner"
+        mock_generator.game_state.selected_interest = {"category": "Comics & Anime", "interest": "Spider-Man"}
+        mock_generator.game_state.selected_concept = {"topic": "Budgeting", "subtopic": "Budgets"}
+        
+        pool = StoryPool(MagicMock(return_value=None), depth=1)
+        key = PoolKey.from_state(
+            mock_generator.game_state.selected_interest,
+            mock_generator.game_state.selected_concept,
+            "beginner"
+        )
+        pool.put(key, {"story": sample_story_data, "quiz": sample_quiz_data, "summary": sample_summary_data})
+        
+        with patch('web_server.story_pool', pool):
+            response = client.post("/api/generate", json={"difficulty": "beginner"})
+            pool.wait_idle()
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert data["story"]["plot"]["title"] == sample_story_data["plot"]["title"]
+        mock_generator.generate_story_segment.assert_not_called()
+        mock_quiz_gen.generate_quiz.assert_not_called()
+        assert pool.stats()["hits"] == 1
+        
+        from web_server import story_meta_cache, frontend_cache
+        assert story_meta_cache[data["storyId"]]["content_hash"]
+        assert frontend_cache[data["storyId"]]["view"]["plot"]["title"] == sample_story_data["plot"]["title"]
+        
+        from web_server import answer_key_cache
+        assert "is_correct" not in str(data["quiz"])
+        assert answer_key_cache[data["storyId"]]["total"] == len(sample_quiz_data["questions"])
+    
+    def test_request_id_header(self, client):
+        """Test every response carries a request id, echoing the client's when sent"""
+        assert len(client.get("/api/pool/stats").headers["x-request-id"]) == 32
+        assert client.get("/api/pool/stats", headers={"X-Request-ID": "trace-1"}).headers["x-request-id"] == "trace-1"
+    
+    def test_pool_stats_endpoint(self, client):
+        """Test story pool metrics endpoint"""
+        response = client.get("/api/pool/stats")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["success"] is True
+        assert "hit_rate" in data["pool"]
+    
     def test_generate_endpoint_invalid_difficulty(self, client):
         """Test generate endpoint with invalid difficulty"""
         response = client.post("/api/generate", json={"difficulty": "invalid"})
@@ -120,6 +175,107 @@ class TestAPIEndpoints:
         data = response.json()
         assert "topic" in data
     
+    @patch('web_server.quiz_generator')
+    def test_generate_quiz_instant_mode(self, mock_quiz_gen, client, sample_story_data):
+        """Test instant mode builds the quiz locally without the model"""
+        response = client.post(
+            "/api/generate-quiz",
+            json={"story_data": sample_story_data, "difficulty": "intermediate", "mode": "instant"}
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert len(data["questions"]) == 5
+        assert data["source"].startswith("local:")
+        mock_quiz_gen.generate_quiz.assert_not_called()
+        
+        response = client.post("/api/generate-quiz", json={"story_data": sample_story_data, "mode": "turbo"})
+        assert response.status_code == 400
+        
+        response = client.post(
+            "/api/generate-quiz",
+            json={"story_data": sample_story_data, "difficulty": "expert", "mode": "instant"}
+        )
+        assert response.status_code == 400
+    
+    def test_ad_hoc_all_difficulties_stores_one_answer_key(self, client, sample_story_data, monkeypatch):
+        """Test quizzes for ad-hoc story data only keep the key of the quiz they return"""
+        import web_server
+        answer_keys = {}
+        monkeypatch.setattr(web_server, "answer_key_cache", answer_keys)
+        response = client.post(
+            "/api/generate-quiz",
+            json={"story_data": sample_story_data, "difficulty": "advanced", "all_difficulties": True, "mode": "instant"}
+        )
+        assert response.status_code == 200
+        assert list(answer_keys) == [response.json()["quiz_id"]]
+    
+    def test_quiz_grading_flow(self, client, sample_story_data):
+        """Test quizzes are served without answers and graded on the server"""
+        response = client.post(
+            "/api/generate-quiz",
+            json={"story_data": sample_story_data, "mode": "instant"}
+        )
+        quiz = response.json()
+        assert "is_correct" not in response.text
+        question = quiz["questions"][0]
+        
+        results = []
+        for option in range(len(question["options"])):
+            graded = client.post(f"/api/quiz/{quiz['quiz_id']}/grade", json={"answers": {question["id"]: option}})
+            assert graded.status_code == 200
+            results.append(graded.json())
+        assert sum(r["score"] for r in results) == 1
+        assert all(r["results"][0]["explanation"] for r in results)
+        
+        bad = client.post(f"/api/quiz/{quiz['quiz_id']}/grade", json={"answers": {"q99": 0}})
+        assert bad.status_code == 400
+        missing = client.post("/api/quiz/unknown/grade", json={"answers": {"q1": 0}})
+        assert missing.status_code == 404
+    
+    def test_quiz_grading_burst(self, client, sample_story_data):
+        """Test many concurrent submissions grade consistently"""
+        from concurrent.futures import ThreadPoolExecutor
+        from web_server import answer_key_cache
+        from QuizGenerator import local_quiz
+        from QuizGrading import build_answer_key
+        
+        key = build_answer_key(local_quiz(sample_story_data, "beginner").model_dump())
+        answer_key_cache["burst"] = key
+        answers = {qid: entry["correct_option"] for qid, entry in key["questions"].items()}
+        
+        def submit(_):
+            return client.post("/api/quiz/burst/grade", json={"answers": answers}).json()["score"]
+        
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            scores = list(pool.map(submit, range(200)))
+        assert scores == [5] * 200
+    
+    @patch('web_server.quiz_generator')
+    def test_generate_quiz_all_difficulties(self, mock_quiz_gen, client, sample_story_data, sample_quiz_data):
+        """Test one batched generation makes later difficulty switches cache hits"""
+        from QuizGenerator import Quiz
+        from web_server import story_cache
+        story_cache["s"] = sample_story_data
+        mock_quiz_gen.generate_quiz_set.return_value = {
+            level: Quiz(**dict(sample_quiz_data, difficulty=level))
+            for level in ("beginner", "intermediate", "advanced")
+        }
+        
+        first = client.post("/api/generate-quiz", json={"story_id": "s", "difficulty": "beginner", "all_difficulties": True})
+        assert first.status_code == 200
+        assert first.json()["cached"] is False
+        assert first.json()["quiz_id"] == "s:beginner"
+        
+        switched = client.post("/api/generate-quiz", json={"story_id": "s", "difficulty": "advanced"})
+        data = switched.json()
+        assert data["cached"] is True
+        assert data["difficulty"] == "advanced"
+        assert mock_quiz_gen.generate_quiz_set.call_count == 1
+        mock_quiz_gen.generate_quiz.assert_not_called()
+        
+        graded = client.post(f"/api/quiz/{data['quiz_id']}/grade", json={"answers": {"q1": 0}})
+        assert graded.status_code == 200
+    
     def test_generate_quiz_endpoint_no_data(self, client):
         """Test quiz generation endpoint with no data"""
         response = client.post("/api/generate-quiz", json={})
@@ -130,6 +286,7 @@ class TestAPIEndpoints:
     def test_generate_summary_endpoint_with_story_data(self, mock_summarizer, client,
                                                         sample_story_data, sample_summary_data):
         """Test summary generation endpoint with story data"""
+        mock_summarizer.cache = None
         mock_summarizer.generate_summary.return_value = sample_summary_data
         
         response = client.post(
@@ -144,6 +301,244 @@ class TestAPIEndpoints:
         assert "topic" in data
         assert "learning_summary" in data
     
+    @patch('web_server.summarizer')
+    def test_summary_cache_endpoints(self, mock_summarizer, client, tmp_path, sample_story_data, sample_summary_data):
+        """Test summary cache stats and per-story invalidation"""
+        from web_server import story_cache
+        from SummaryCache import SummaryCache, summary_key
+        cache = SummaryCache(str(tmp_path))
+        mock_summarizer.cache = cache
+        story_cache["summary-story"] = sample_story_data
+        cache.put(summary_key(sample_story_data), sample_summary_data)
+        cache.get(summary_key(sample_story_data))
+        
+        stats = client.get("/api/summary/stats").json()
+        assert stats["summary_cache"]["memory_hits"] == 1
+        
+        response = client.delete("/api/summary/cache/summary-story")
+        assert response.status_code == 200
+        assert response.json()["removed"] == 1
+        assert cache.get(summary_key(sample_story_data)) is None
+        
+        assert client.delete("/api/summary/cache/missing").status_code == 404
+        assert client.delete("/api/summary/cache").json()["removed"] == 0
+    
+    @patch('web_server.summarizer')
+    @patch('web_server.quiz_generator')
+    @patch('web_server.generator')
+    def test_profile_generate_request(self, mock_generator, mock_quiz_gen, mock_summarizer, client, tmp_path,
+                                      monkeypatch, sample_story_data, sample_quiz_data, sample_summary_data):
+        """Test X-Profile saves a trace named after the generated story and the admin API serves it"""
+        from web_server import profiler
+        from NovelGenerator import StoryData
+        from QuizGenerator import Quiz
+        monkeypatch.setattr(profiler, "root", str(tmp_path))
+        monkeypatch.setattr(profiler, "index_path", str(tmp_path / "index.jsonl"))
+        mock_generator.fork.return_value = mock_generator
+        mock_generator.game_state.difficulty = "beginner"
+        mock_generator.game_state.selected_interest = {"category": "Comics & Anime", "interest": "Spider-Man"}
+        mock_generator.game_state.selected_concept = {"topic": "Budgeting", "subtopic": "Saving"}
+        mock_generator.generate_story_segment.return_value = StoryData(**sample_story_data)
+        mock_quiz_gen.generate_quiz.return_value = Quiz(**sample_quiz_data)
+        mock_summarizer.generate_summary.return_value = sample_summary_data
+        monkeypatch.setenv("ADMIN_TOKEN", "secret")
+        admin = {"X-Admin-Token": "secret"}
+        
+        assert "x-profile-id" not in client.post("/api/generate", json={}).headers
+        response = client.post("/api/generate", json={}, headers={"X-Profile": "1", **admin})
+        assert response.status_code == 200
+        profile_id = response.headers["x-profile-id"]
+        
+        profiles = client.get("/api/admin/profiles", headers=admin).json()["profiles"]
+        assert len(profiles) == 1
+        assert profiles[0]["id"] == profile_id
+        assert profiles[0]["story_id"] == response.json()["storyId"]
+        assert profiles[0]["file"].endswith(f"_{response.json()['storyId']}.prof")
+        
+        raw = client.get(f"/api/admin/profiles/{profile_id}", headers=admin)
+        assert raw.status_code == 200
+        assert raw.headers["content-type"] == "application/octet-stream"
+        text = client.get(f"/api/admin/profiles/{profile_id}", params={"format": "text"}, headers=admin)
+        assert "generate_story" in text.text
+        # Generation runs in the threadpool; its frames are merged into the request's trace
+        import pstats
+        functions = {name for _, _, name in pstats.Stats(str(tmp_path / profiles[0]["file"])).stats}
+        assert {"create_story", "build_answer_key", "frontend_view"} <= functions
+        assert client.get("/api/admin/profiles/20260101T000000000000Z-deadbeef", headers=admin).status_code == 404
+    
+    def test_profiling_toggle_and_admin_token(self, client, tmp_path, monkeypatch):
+        """Test the admin toggle profiles matching paths and admin endpoints honour ADMIN_TOKEN"""
+        from web_server import profiler
+        monkeypatch.setattr(profiler, "root", str(tmp_path))
+        monkeypatch.setattr(profiler, "index_path", str(tmp_path / "index.jsonl"))
+        monkeypatch.delenv("ADMIN_TOKEN", raising=False)
+        toggle = {"enabled": True, "path_prefix": "/api/stories"}
+        assert client.post("/api/admin/profiling", json=toggle).status_code == 403
+        assert client.get("/api/admin/profiles").status_code == 403
+        
+        monkeypatch.setenv("ADMIN_TOKEN", "secret")
+        assert client.get("/api/admin/profiles").status_code == 403
+        assert client.get("/api/admin/profiles", headers={"X-Admin-Token": "wrong"}).status_code == 403
+        try:
+            state = client.post("/api/admin/profiling", json=toggle, headers={"X-Admin-Token": "secret"}).json()
+            assert state["profiling"]["enabled"] is True
+            assert "x-profile-id" in client.get("/api/stories").headers
+            assert "x-profile-id" not in client.get("/api/pool/stats").headers
+        finally:
+            profiler.configure(False)
+        assert client.get("/api/admin/profiles", headers={"X-Admin-Token": "secret"}).status_code == 200
+    
+    def test_generation_shed_when_overloaded(self, client, sample_story_data, sample_summary_data):
+        """Test a full generation queue returns 503 with Retry-After while reads keep working"""
+        from web_server import story_cache
+        from Admission import AdmissionController
+        busy = AdmissionController("generate", limit=1, queue_size=0, deadline=30.0, expected_seconds=12.0)
+        busy._active = 1  # every slot taken by a long-running generation
+        story_cache["read-story"] = sample_story_data
+        
+        with patch('web_server.story_admission', busy):
+            response = client.post("/api/generate", json={"difficulty": "beginner"})
+            assert response.status_code == 503
+            assert response.headers["retry-after"] == "12"
+            assert response.json()["reason"] == "queue_full"
+            
+            assert client.get("/api/story/read-story").status_code == 200
+            assert client.get("/api/stories").status_code == 200
+        
+        with patch('web_server.followup_admission', busy):
+            response = client.post("/api/generate-summary", json={"story_id": "read-story"})
+            assert response.status_code == 503
+            assert "retry-after" in response.headers
+    
+    @patch('web_server.summarizer')
+    def test_cached_summary_bypasses_admission(self, mock_summarizer, client, tmp_path,
+                                               sample_story_data, sample_summary_data):
+        """Test stored summaries are served while the quiz/summary queue is full"""
+        from web_server import story_cache
+        from Admission import AdmissionController
+        from SummaryCache import SummaryCache, summary_key
+        busy = AdmissionController("quiz_summary", limit=1, queue_size=0, deadline=30.0, expected_seconds=3.0)
+        busy._active = 1
+        cache = SummaryCache(str(tmp_path))
+        mock_summarizer.cache = cache
+        story_cache["summarized-story"] = sample_story_data
+        cache.put(summary_key(sample_story_data), sample_summary_data)
+        
+        with patch('web_server.followup_admission', busy):
+            response = client.post("/api/generate-summary", json={"story_id": "summarized-story"})
+            assert response.status_code == 200
+            assert response.json() == sample_summary_data
+            mock_summarizer.generate_summary.assert_not_called()
+            
+            cache.clear()
+            assert client.post("/api/generate-summary", json={"story_id": "summarized-story"}).status_code == 503
+        assert cache.stats()["misses"] == 0
+    
+    def test_admission_stats_endpoint(self, client):
+        """Test queue metrics for both admission controllers"""
+        data = client.get("/api/admission/stats").json()
+        assert set(data["admission"]) == {"generate", "quiz_summary"}
+        assert {"active", "waiting", "rejected_queue_full", "rejected_deadline", "timed_out"} <= set(data["admission"]["generate"])
+    
+    @patch('web_server.summarizer')
+    def test_summary_scheduled_as_followup_for_user(self, mock_summarizer, client, sample_story_data, sample_summary_data):
+        """Test summary model calls run in the quiz/summary class on behalf of the requesting user"""
+        from WorkScheduler import FOLLOWUP, work_class_var, work_user_var
+        seen = {}
+
+        def fake_summary(story_data, selected_interest):
+            seen.update(work_class=work_class_var.get(), user=work_user_var.get())
+            return sample_summary_data
+
+        mock_summarizer.cache = None
+        mock_summarizer.generate_summary.side_effect = fake_summary
+        response = client.post("/api/generate-summary", json={"story_data": sample_story_data},
+                               headers={"X-User-Id": "learner-7"})
+        assert response.status_code == 200
+        assert seen == {"work_class": FOLLOWUP, "user": "learner-7"}
+
+    def test_scheduler_stats_endpoint(self, client):
+        """Test per-class model scheduling metrics"""
+        data = client.get("/api/scheduler/stats").json()
+        assert set(data["scheduler"]["classes"]) == {"interactive", "quiz_summary", "images", "pregeneration"}
+        assert {"limit", "running", "queued", "preempted"} <= set(data["scheduler"]["classes"]["images"])
+    
+    @patch('web_server.generator')
+    def test_resumed_image_job_updates_story(self, mock_generator, client, sample_story_data):
+        """Test images finished by the job worker reach the cached story, its frontend view and ETag"""
+        from web_server import resume_image_job, story_cache, story_meta_cache
+        mock_generator.fork.return_value = mock_generator
+        images = {"cover": "https://cdn/cover.png", "characters": {"Spider-Man": "https://cdn/spidey.png"},
+                  "backgrounds": {"primary": "https://cdn/home.png", "secondary": None, "tertiary": None}}
+        mock_generator.generate_all_images_for_story.return_value = images
+        story_cache["resumed-story"] = dict(sample_story_data, generated_images={})
+        story_meta_cache["resumed-story"] = {"title": "The Savings Challenge", "content_hash": "stale"}
+        before = client.get("/api/story/resumed-story").headers["etag"]
+
+        resume_image_job({"job_id": "job-1", "story_id": "resumed-story", "payload": {
+            "story": sample_story_data, "timestamp": "20240101_000000",
+            "selected_interest": {"category": "Comics & Anime", "interest": "Spider-Man"}
+        }})
+
+        args = mock_generator.generate_all_images_for_story.call_args[0]
+        assert args[0].plot.title == sample_story_data["plot"]["title"]
+        assert args[1] == "20240101_000000"
+        assert story_cache["resumed-story"]["generated_images"] == images
+        assert client.get("/api/story/resumed-story").headers["etag"] != before
+        frontend = client.get("/api/story/resumed-story/frontend").json()["frontend"]
+        assert "https://cdn/spidey.png" in {scene["character_image"] for scene in frontend["dialogue_scenes"]}
+
+    @patch('web_server.generator')
+    def test_resumed_image_job_for_missing_story_is_cancelled(self, mock_generator, client, monkeypatch):
+        """Test a job whose story left the cache is cancelled without rendering its images"""
+        import web_server
+        worker = MagicMock()
+        monkeypatch.setattr(web_server, "image_job_worker", worker)
+
+        web_server.resume_image_job({"job_id": "job-gone", "story_id": "evicted-story", "payload": {}})
+
+        mock_generator.generate_all_images_for_story.assert_not_called()
+        worker.queue.cancel.assert_called_once_with("job-gone")
+
+    @patch('web_server.quiz_generator')
+    def test_preempted_pool_entry_cancels_image_job(self, mock_quiz_gen, sample_story_data, monkeypatch):
+        """Test a pooled story dropped by preemption does not leave its image job to be resumed"""
+        import web_server
+        from ImageJobs import image_job_id
+        from NovelGenerator import StoryData
+        from StoryPool import PoolKey
+        from WorkScheduler import Preempted
+        pool_generator = MagicMock()
+        pool_generator.generate_story_segment.return_value = StoryData(**sample_story_data)
+        worker = MagicMock()
+        monkeypatch.setattr(web_server, "_pool_generator", pool_generator)
+        monkeypatch.setattr(web_server, "image_job_worker", worker)
+        mock_quiz_gen.generate_quiz.side_effect = Preempted("pregeneration call preempted")
+
+        with pytest.raises(Preempted):
+            web_server.produce_pool_entry(PoolKey.from_state(None, None, "beginner"))
+        worker.queue.cancel.assert_called_once_with(image_job_id(sample_story_data))
+
+    def test_image_job_worker_built_at_startup(self, monkeypatch):
+        """Test the job queue is opened by the startup hook rather than at import"""
+        import web_server
+        queue, worker_cls = MagicMock(), MagicMock()
+        monkeypatch.setattr(web_server, "IMAGE_JOBS", True)
+        monkeypatch.setattr(web_server, "get_image_jobs", lambda: queue)
+        monkeypatch.setattr(web_server, "ImageJobWorker", worker_cls)
+        monkeypatch.setattr(web_server, "image_job_worker", None)
+        
+        with TestClient(web_server.app):
+            worker_cls.assert_called_once_with(queue, web_server.resume_image_job)
+            worker_cls.return_value.start.assert_called_once()
+            assert web_server.image_job_worker is worker_cls.return_value
+    
+    def test_image_job_stats_disabled(self, client):
+        """Test the stats endpoint reports when durable image jobs are off"""
+        data = client.get("/api/image-jobs/stats").json()
+        assert data["enabled"] is False
+        assert data["image_jobs"] is None
+    
     def test_get_story_endpoint_not_found(self, client):
         """Test get story endpoint with non-existent ID"""
         response = client.get("/api/story/nonexistent-id")
@@ -163,6 +558,30 @@ class TestAPIEndpoints:
         assert data["success"] is True
         assert "story" in data
     
+    def test_frontend_story_endpoint(self, client, sample_story_data):
+        """Test the frontend view is served from cache and rebuilt when images change"""
+        from web_server import story_cache, frontend_cache
+        from NovelGenerator import images_fingerprint
+        story_cache["s"] = sample_story_data
+        frontend_cache["s"] = {
+            "images_hash": images_fingerprint(sample_story_data.get("generated_images")),
+            "view": {"plot": {"title": "Precomputed"}, "dialogue_scenes": []}
+        }
+        
+        response = client.get("/api/story/s/frontend")
+        assert response.status_code == 200
+        assert response.json()["frontend"]["plot"]["title"] == "Precomputed"
+        etag = response.headers["etag"]
+        
+        story_cache["s"] = dict(sample_story_data, generated_images={"backgrounds": {"secondary": "new.png", "tertiary": "new.png"}})
+        response = client.get("/api/story/s/frontend", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        view = response.json()["frontend"]
+        assert view["plot"]["title"] == sample_story_data["plot"]["title"]
+        assert view["dialogue_scenes"][0]["background_image"] == "new.png"
+        
+        assert client.get("/api/story/missing/frontend").status_code == 404
+    
     def test_latest_story_endpoint_no_stories(self, client):
         """Test latest story endpoint with no cached stories"""
         response = client.get("/api/latest-story")
@@ -200,6 +619,127 @@ class TestAPIEndpoints:
         assert "stories" in data
         assert len(data["stories"]) >= 2
 
+    def test_list_stories_pagination(self, client, sample_story_data):
+        """Test cursor pagination and fields projection on the story list"""
+        from web_server import story_cache
+        for i in range(5):
+            story_cache[f"story{i}"] = sample_story_data
+        
+        response = client.get("/api/stories", params={"limit": 2, "fields": "title"})
+        data = response.json()
+        assert [story["id"] for story in data["stories"]] == ["story0", "story1"]
+        assert set(data["stories"][0]) == {"id", "title"}
+        
+        ids = [story["id"] for story in data["stories"]]
+        while data["next_cursor"]:
+            data = client.get("/api/stories", params={"limit": 2, "cursor": data["next_cursor"]}).json()
+            ids.extend(story["id"] for story in data["stories"])
+        assert ids == [f"story{i}" for i in range(5)]
+        
+        assert client.get("/api/stories", params={"cursor": "bogus"}).status_code == 400
+    
+    def test_list_stories_filters(self, client, sample_story_data):
+        """Test filtering the story list by category and difficulty"""
+        from web_server import story_cache, story_meta_cache
+        story_cache["a"] = sample_story_data
+        story_meta_cache["a"] = {"title": "A", "category": "Music Artists", "difficulty": "beginner",
+                                 "created_at": "2025-01-01T00:00:00+00:00"}
+        story_cache["b"] = sample_story_data
+        story_meta_cache["b"] = {"title": "B", "category": "Comics & Anime", "difficulty": "advanced",
+                                 "created_at": "2025-02-01T00:00:00+00:00"}
+        
+        data = client.get("/api/stories", params={"category": "Music Artists"}).json()
+        assert [story["id"] for story in data["stories"]] == ["a"]
+        data = client.get("/api/stories", params={"difficulty": "advanced", "since": "2025-01-15"}).json()
+        assert [story["id"] for story in data["stories"]] == ["b"]
+        data = client.get("/api/stories", params={"until": "2025-02-01"}).json()
+        assert [story["id"] for story in data["stories"]] == ["a", "b"]
+        assert client.get("/api/stories", params={"since": "last week"}).status_code == 400
+        assert client.get("/api/latest-story", params={"until": "2025-02-31"}).status_code == 400
+        
+        data = client.get("/api/latest-story", params={"category": "Music Artists", "fields": "story.plot.title"}).json()
+        assert data["storyId"] == "a"
+        assert data["story"] == {"plot": {"title": sample_story_data["plot"]["title"]}}
+        assert "quiz" not in data
+    
+    def test_get_story_fields(self, client, sample_story_data):
+        """Test fields projection on a single story"""
+        from web_server import story_cache, quiz_cache
+        story_cache["s"] = sample_story_data
+        quiz_cache["s"] = {"topic": "Test"}
+        
+        data = client.get("/api/story/s", params={"fields": "quiz"}).json()
+        assert data == {"success": True, "quiz": {"topic": "Test"}}
+    
+    def test_get_story_etag(self, client, sample_story_data):
+        """Test conditional GET on a story returns 304 for a matching ETag"""
+        from web_server import story_cache
+        story_cache["s"] = sample_story_data
+        
+        response = client.get("/api/story/s")
+        etag = response.headers["etag"]
+        assert etag.startswith('W/"')
+        assert "max-age" in response.headers["cache-control"]
+        
+        response = client.get("/api/story/s", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+        
+        projected = client.get("/api/story/s", params={"fields": "quiz"}, headers={"If-None-Match": etag})
+        assert projected.status_code == 200
+        assert projected.headers["etag"] != etag
+    
+    def test_latest_story_etag_changes_with_new_story(self, client, sample_story_data):
+        """Test the latest-story ETag changes when a newer story is cached"""
+        from web_server import story_cache
+        story_cache["first"] = sample_story_data
+        
+        etag = client.get("/api/latest-story").headers["etag"]
+        assert client.get("/api/latest-story", headers={"If-None-Match": etag}).status_code == 304
+        
+        story_cache["second"] = sample_story_data
+        response = client.get("/api/latest-story", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.json()["storyId"] == "second"
+        assert response.headers["cache-control"] == "private, no-cache"
+    
+    def test_large_responses_are_gzipped(self, client, sample_story_data):
+        """Test story payloads are compressed when the client accepts gzip"""
+        from web_server import story_cache
+        story = dict(sample_story_data, dialogue=sample_story_data["dialogue"] * 50)
+        story_cache["big"] = story
+        
+        response = client.get("/api/story/big", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.json()["story"]["plot"] == story["plot"]
+        # One weak tag validates both encodings of the same story
+        etag = response.headers["etag"]
+        assert etag.startswith("W/")
+        identity = client.get("/api/story/big", headers={"Accept-Encoding": "identity", "If-None-Match": etag})
+        assert identity.status_code == 304
+        
+        small = client.get("/", headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in small.headers
+
+    
+    def test_tutor_stream_endpoint(self, client):
+        """Test tutor answers are streamed as server-sent events"""
+        async def fake_stream(query, chat_history, session_id=None):
+            for token in ["Saving ", "money ", "helps."]:
+                yield token
+        
+        with patch('web_server.tutor.stream_response', side_effect=fake_stream):
+            response = client.post("/api/tutor/stream", json={"query": "Why save money?"})
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = [e for e in response.text.split("\n\n") if e]
+        tokens = [json.loads(e[len("data: "):])["token"] for e in events if e.startswith("data: ")]
+        assert "".join(tokens) == "Saving money helps."
+        assert events[-1].startswith("event: done")
+        assert "ttft_ms" in events[-1]
+
 
 @pytest.mark.integration
 class TestAPIErrorHandling:
@@ -208,6 +748,7 @@ class TestAPIErrorHandling:
     @patch('web_server.generator')
     def test_generate_endpoint_api_error(self, mock_generator, client):
         """Test generate endpoint with API error"""
+        mock_generator.fork.return_value = mock_generator
         mock_generator.load_user_data.side_effect = Exception("API Error")
         
         response = client.post("/api/generate", json={"difficulty": "beginner"})
@@ -239,3 +780,62 @@ class TestAPIErrorHandling:
         )
         assert response.status_code == 404
 
+
+
+@pytest.mark.integration
+class TestReadiness:
+    """Tests for readiness and warmup endpoints"""
+    
+    @pytest.fixture
+    def fresh_warmup(self):
+        """Warmup runner with mocked steps"""
+        from startup import Warmup
+        steps = {"generators": MagicMock(), "model_connection": MagicMock(side_effect=Exception("offline"))}
+        warmup = Warmup([
+            ("generators", steps["generators"], True),
+            ("model_connection", steps["model_connection"], False),
+        ])
+        with patch('web_server.warmup', warmup):
+            yield warmup, steps
+    
+    def test_ready_without_warmup_requirement(self, client, fresh_warmup):
+        """Test readiness only needs cache and storage when warmup is not required"""
+        response = client.get("/ready")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["ready"] is True
+        assert data["warm"] is False
+        assert data["checks"]["cache"]["ok"] is True
+        assert data["checks"]["storage"]["ok"] is True
+        assert set(data["checks"]["generators"]) == {"story", "quiz", "summary", "tutor"}
+    
+    def test_ready_waits_for_warmup(self, client, fresh_warmup):
+        """Test workers report 503 until warmup has finished"""
+        with patch('web_server.WARMUP_ON_STARTUP', True):
+            response = client.get("/ready")
+            assert response.status_code == 503
+            assert response.json()["ready"] is False
+            
+            warmup_response = client.post("/api/warmup")
+            assert warmup_response.status_code == 200
+            assert warmup_response.json()["success"] is True
+            
+            response = client.get("/ready")
+            assert response.status_code == 200
+            assert response.json()["warm"] is True
+    
+    def test_warmup_records_optional_failures(self, client, fresh_warmup):
+        """Test optional step failures are reported without failing warmup"""
+        warmup, steps = fresh_warmup
+        data = client.post("/api/warmup").json()
+        steps["generators"].assert_called_once()
+        assert data["warmup"]["status"] == "done"
+        assert data["warmup"]["steps"]["model_connection"]["ok"] is False
+        assert "offline" in data["warmup"]["steps"]["model_connection"]["error"]
+    
+    def test_ready_reports_cache_failure(self, client, fresh_warmup):
+        """Test an unreachable cache backend makes the worker not ready"""
+        with patch('web_server.story_cache.ping', side_effect=ConnectionError("down")):
+            response = client.get("/ready")
+        assert response.status_code == 503
+        assert response.json()["checks"]["cache"]["ok"] is False
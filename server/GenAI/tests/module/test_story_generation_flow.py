@@ -32,6 +32,7 @@ class TestStoryGenerationFlow:
             hooks=Hooks(**sample_story_data["hooks"])
         )
         
+        mock_generator.fork.return_value = mock_generator
         mock_generator.load_user_data.return_value = None
         mock_generator.game_state.difficulty = "beginner"
         mock_generator.game_state.selected_interest = {"category": "Comics & Anime", "interest": "Spider-Man"}
@@ -0,0 +1,138 @@
+"""
+Unit tests for Admission module
+"""
+import asyncio
+import pytest
+from Admission import AdmissionController, Overloaded
+
+
+def controller(limit=1, queue_size=2, deadline=5.0, expected_seconds=0.01):
+    return AdmissionController("test", limit, queue_size, deadline, expected_seconds)
+
+
+class TestAdmissionController:
+    """Unit tests for AdmissionController"""
+
+    def test_admits_under_limit(self):
+        """Test requests under the limit run immediately and release their slot"""
+        admission = controller(limit=2)
+
+        async def scenario():
+            async with admission.admit():
+                async with admission.admit():
+                    assert admission.stats()["active"] == 2
+
+        asyncio.run(scenario())
+        stats = admission.stats()
+        assert stats["active"] == 0
+        assert stats["admitted"] == 2
+        assert stats["queued"] == 0
+
+    def test_queued_requests_run_in_order(self):
+        """Test waiters get the slot in FIFO order as it is released"""
+        admission = controller(limit=1, queue_size=3)
+        order = []
+
+        async def job(name, hold):
+            async with admission.admit():
+                order.append(name)
+                await asyncio.sleep(hold)
+
+        async def scenario():
+            first = asyncio.create_task(job("a", 0.05))
+            await asyncio.sleep(0)
+            rest = [asyncio.create_task(job(name, 0)) for name in ("b", "c", "d")]
+            await asyncio.sleep(0)
+            assert admission.stats()["waiting"] == 3
+            await asyncio.gather(first, *rest)
+
+        asyncio.run(scenario())
+        assert order == ["a", "b", "c", "d"]
+        stats = admission.stats()
+        assert stats["queued"] == 3
+        assert stats["max_waiting"] == 3
+        assert stats["active"] == 0
+
+    def test_rejects_when_queue_full(self):
+        """Test a request beyond the queue is shed immediately with a retry hint"""
+        admission = controller(limit=1, queue_size=0)
+
+        async def scenario():
+            async with admission.admit():
+                with pytest.raises(Overloaded) as excinfo:
+                    async with admission.admit():
+                        pass
+                return excinfo.value
+
+        error = asyncio.run(scenario())
+        assert error.reason == "queue_full"
+        assert error.retry_after >= 1
+        assert admission.stats()["rejected_queue_full"] == 1
+
+    def test_rejects_when_expected_wait_exceeds_deadline(self):
+        """Test a request whose estimated wait is past the deadline is shed without queueing"""
+        admission = controller(limit=1, queue_size=10, deadline=5.0, expected_seconds=4.0)
+
+        async def scenario():
+            async with admission.admit():
+                waiter = asyncio.create_task(admission.admit().__aenter__())
+                await asyncio.sleep(0)
+                with pytest.raises(Overloaded) as excinfo:
+                    async with admission.admit():
+                        pass
+                waiter.cancel()
+                return excinfo.value
+
+        error = asyncio.run(scenario())
+        assert error.reason == "deadline"
+        assert error.retry_after == 8
+        assert admission.stats()["rejected_deadline"] == 1
+
+    def test_times_out_in_queue(self):
+        """Test a queued request is turned away once the deadline passes"""
+        admission = controller(limit=1, queue_size=1, deadline=0.05, expected_seconds=0.01)
+
+        async def scenario():
+            async with admission.admit():
+                with pytest.raises(Overloaded) as excinfo:
+                    async with admission.admit():
+                        pass
+                await asyncio.sleep(0)
+                return excinfo.value
+
+        error = asyncio.run(scenario())
+        assert error.reason == "timeout"
+        stats = admission.stats()
+        assert stats["timed_out"] == 1
+        assert stats["waiting"] == 0
+        assert stats["active"] == 0
+
+    def test_cancelled_waiter_does_not_leak_slot(self):
+        """Test a client that disconnects while queued does not hold a slot"""
+        admission = controller(limit=1, queue_size=2)
+
+        async def scenario():
+            async with admission.admit():
+                waiter = asyncio.create_task(admission.admit().__aenter__())
+                await asyncio.sleep(0)
+                waiter.cancel()
+                await asyncio.sleep(0)
+            async with admission.admit():
+                assert admission.stats()["active"] == 1
+
+        asyncio.run(scenario())
+        assert admission.stats()["active"] == 0
+        assert admission.stats()["waiting"] == 0
+
+    def test_service_time_tracks_recent_requests(self):
+        """Test the expected wait follows observed service times"""
+        admission = controller(limit=2, expected_seconds=10.0)
+
+        async def scenario():
+            for _ in range(20):
+                async with admission.admit():
+                    pass
+
+        asyncio.run(scenario())
+        assert admission.service_seconds < 1.0
+        assert admission.expected_wait(3) == 2 * admission.service_seconds
@@ -0,0 +1,85 @@
+"""
+Unit tests for AnswerCache module
+"""
+import pytest
+from unittest.mock import patch
+from AnswerCache import AnswerCache, normalize_question, shingles, jaccard
+
+
+class TestHelpers:
+    """Unit tests for normalization and similarity helpers"""
+
+    def test_normalize_question(self):
+        """Test punctuation, case and whitespace are normalized"""
+        assert normalize_question("  What IS a   Budget?! ") == "what is a budget"
+
+    def test_shingles(self):
+        """Test character shingles"""
+        assert shingles("abcd") == frozenset(["abc", "bcd"])
+        assert shingles("") == frozenset()
+
+    def test_jaccard(self):
+        """Test Jaccard similarity"""
+        assert jaccard(frozenset("ab"), frozenset("ab")) == 1.0
+        assert jaccard(frozenset("ab"), frozenset("cd")) == 0.0
+
+
+class TestAnswerCache:
+    """Unit tests for AnswerCache class"""
+
+    def test_near_duplicate_hit(self):
+        """Test near-duplicate questions share an answer"""
+        cache = AnswerCache(threshold=0.6)
+        cache.put("What is a budget?", "A plan for your money.")
+        assert cache.get("what is a budget") == "A plan for your money."
+        assert cache.get("What's a budget??") == "A plan for your money."
+
+    def test_different_question_miss(self):
+        """Test unrelated questions miss"""
+        cache = AnswerCache(threshold=0.7)
+        cache.put("What is a budget?", "A plan for your money.")
+        assert cache.get("Why should I save money?") is None
+
+        stats = cache.stats()
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == 0.0
+
+    def test_lru_eviction(self):
+        """Test least recently used entries are evicted beyond capacity"""
+        cache = AnswerCache(max_entries=2)
+        cache.put("What is a budget?", "budget")
+        cache.put("Why save money?", "save")
+        cache.get("What is a budget?")
+        cache.put("What is compound interest?", "interest")
+
+        assert cache.get("Why save money?") is None
+        assert cache.get("What is a budget?") == "budget"
+        assert cache.stats()["evictions"] == 1
+        assert cache.stats()["entries"] == 2
+
+    def test_expired_entries_ignored(self):
+        """Test TTL expiry"""
+        cache = AnswerCache(ttl_seconds=60)
+        with patch('AnswerCache.time.monotonic', return_value=0.0):
+            cache.put("What is a budget?", "budget")
+        with patch('AnswerCache.time.monotonic', return_value=61.0):
+            assert cache.get("What is a budget?") is None
+
+    def test_expired_entries_removed(self):
+        """Test expired entries leave the entry map and LSH buckets on lookup and on put"""
+        with patch('AnswerCache.time.monotonic', return_value=0.0):
+            cache = AnswerCache(ttl_seconds=60)
+            cache.put("What is a budget?", "budget")
+            cache.put("Why save money?", "save")
+        with patch('AnswerCache.time.monotonic', return_value=61.0):
+            assert cache.get("What is a budget?") is None
+            assert cache.stats()["entries"] == 1
+            cache.put("What is compound interest?", "interest")
+        assert cache.stats()["entries"] == 1
+        assert cache.stats()["expirations"] == 2
+        assert all(bucket == {2} for bucket in cache._buckets.values())
+
+    def test_invalid_band_configuration(self):
+        """Test num_perm must split evenly into bands"""
+        with pytest.raises(ValueError, match="divisible"):
+            AnswerCache(num_perm=10, bands=3)
@@ -0,0 +1,228 @@
+"""
+Unit tests for CacheBackend module
+"""
+import os
+import sys
+import socketserver
+import subprocess
+import threading
+import pytest
+from CacheBackend import MemoryCache, SQLiteCache, RedisCache, RedisError, create_cache
+
+
+class RedisStandIn(socketserver.ThreadingTCPServer):
+    """Minimal in-process server speaking the Redis protocol for tests"""
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self):
+        self.data = {}
+        self.zsets = {}
+        self.lock = threading.Lock()
+        super().__init__(("127.0.0.1", 0), RedisStandInHandler)
+
+
+class RedisStandInHandler(socketserver.StreamRequestHandler):
+    def read_command(self):
+        header = self.rfile.readline()
+        if not header:
+            return None
+        args = []
+        for _ in range(int(header[1:])):
+            length = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(length + 2)[:-2].decode())
+        return args
+
+    def reply(self, value):
+        if value is None:
+            self.wfile.write(b"$-1\r\n")
+        elif isinstance(value, bool):
+            self.wfile.write(b":%d\r\n" % int(value))
+        elif isinstance(value, int):
+            self.wfile.write(b":%d\r\n" % value)
+        elif isinstance(value, list):
+            self.wfile.write(b"*%d\r\n" % len(value))
+            for item in value:
+                self.reply(item)
+        else:
+            data = str(value).encode()
+            self.wfile.write(b"$%d\r\n%s\r\n" % (len(data), data))
+
+    def handle(self):
+        server = self.server
+        while True:
+            args = self.read_command()
+            if args is None:
+                return
+            command, rest = args[0].upper(), args[1:]
+            with server.lock:
+                if command == "PING":
+                    self.wfile.write(b"+PONG\r\n")
+                elif command == "GET":
+                    self.reply(server.data.get(rest[0]))
+                elif command == "SET":
+                    server.data[rest[0]] = rest[1]
+                    self.wfile.write(b"+OK\r\n")
+                elif command == "DEL":
+                    removed = 0
+                    for key in rest:
+                        removed += server.data.pop(key, None) is not None or server.zsets.pop(key, None) is not None
+                    self.reply(removed)
+                elif command == "EXISTS":
+                    self.reply(int(rest[0] in server.data))
+                elif command == "INCR":
+                    server.data[rest[0]] = str(int(server.data.get(rest[0], 0)) + 1)
+                    self.reply(int(server.data[rest[0]]))
+                elif command == "ZADD":
+                    zset = server.zsets.setdefault(rest[0], {})
+                    score, member = float(rest[2]), rest[3]
+                    added = member not in zset
+                    if added:
+                        zset[member] = score
+                    self.reply(int(added))
+                elif command == "ZREM":
+                    self.reply(int(server.zsets.get(rest[0], {}).pop(rest[1], None) is not None))
+                elif command == "ZCARD":
+                    self.reply(len(server.zsets.get(rest[0], {})))
+                elif command == "ZSCORE":
+                    score = server.zsets.get(rest[0], {}).get(rest[1])
+                    self.reply(None if score is None else f"{score:g}")
+                elif command == "ZRANGEBYSCORE":
+                    # Only the form RedisCache sends: (min +inf WITHSCORES LIMIT 0 count
+                    members = sorted(server.zsets.get(rest[0], {}).items(), key=lambda item: item[1])
+                    low, count = float(rest[1].lstrip("(")), int(rest[6])
+                    reply = []
+                    for member, score in [item for item in members if item[1] > low][:count]:
+                        reply += [member, f"{score:g}"]
+                    self.reply(reply)
+                elif command == "ZRANGE":
+                    members = sorted(server.zsets.get(rest[0], {}).items(), key=lambda item: item[1])
+                    start, stop = int(rest[1]), int(rest[2])
+                    stop = len(members) if stop == -1 else stop + 1
+                    self.reply([member for member, _ in members[start:stop]])
+                else:
+                    self.wfile.write(b"-ERR unknown command\r\n")
+            self.wfile.flush()
+
+
+@pytest.fixture
+def redis_stand_in():
+    server = RedisStandIn()
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def cache(request, tmp_path):
+    if request.param == "memory":
+        return MemoryCache()
+    if request.param == "sqlite":
+        return SQLiteCache(str(tmp_path / "cache.sqlite3"), "stories")
+    server = request.getfixturevalue("redis_stand_in")
+    host, port = server.server_address
+    return RedisCache(f"redis://{host}:{port}/0", "stories")
+
+
+class TestCacheBackends:
+    """Behaviour shared by every backend"""
+
+    def test_set_get_contains(self, cache, sample_story_data):
+        """Test values round-trip as JSON"""
+        cache["story-1"] = sample_story_data
+        assert "story-1" in cache
+        assert "missing" not in cache
+        assert cache["story-1"] == sample_story_data
+        assert cache.get("missing") is None
+
+    def test_insertion_order_and_latest(self, cache):
+        """Test keys keep insertion order, including after overwrites"""
+        assert cache.latest_key() is None
+        cache["a"] = {"n": 1}
+        cache["b"] = {"n": 2}
+        cache["a"] = {"n": 3}
+        assert list(cache.keys()) == ["a", "b"]
+        assert cache.latest_key() == "b"
+        assert len(cache) == 2
+        assert dict(cache.items())["a"] == {"n": 3}
+
+    def test_delete_and_clear(self, cache):
+        """Test deletion and clearing"""
+        cache["a"] = {}
+        cache["b"] = {}
+        del cache["a"]
+        with pytest.raises(KeyError):
+            del cache["a"]
+        assert list(cache) == ["b"]
+        cache.clear()
+        assert len(cache) == 0
+        assert not cache
+
+    def test_positions_and_range_reads(self, cache):
+        """Test keys are read in insertion order from a position, skipping deleted keys"""
+        for key in "abcde":
+            cache[key] = {}
+        del cache["c"]
+        cache["a"] = {"n": 2}
+        position = cache.position("b")
+        assert cache.position("missing") is None
+        assert [key for _, key in cache.keys_after(0, 2)] == ["a", "b"]
+        assert [key for _, key in cache.keys_after(position, 10)] == ["d", "e"]
+        last_position, _ = cache.keys_after(position, 10)[-1]
+        assert cache.keys_after(last_position, 10) == []
+        cache.clear()
+        cache["f"] = {}
+        assert cache.position("f") > last_position
+
+    def test_ping(self, cache):
+        """Test backend health check"""
+        assert cache.ping() is True
+
+
+class TestSharedBackends:
+    """Cross-process consistency for the shared backends"""
+
+    def test_sqlite_shared_across_processes(self, tmp_path):
+        """Test a story written by another process is visible here"""
+        path = str(tmp_path / "cache.sqlite3")
+        cache = SQLiteCache(path, "stories")
+        module_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        subprocess.run(
+            [sys.executable, "-c",
+             f"import sys; sys.path.insert(0, {module_dir!r}); from CacheBackend import SQLiteCache; "
+             f"SQLiteCache({path!r}, 'stories')['from-worker-b'] = {{'title': 'B'}}"],
+            check=True
+        )
+        assert cache["from-worker-b"] == {"title": "B"}
+        assert cache.latest_key() == "from-worker-b"
+
+    def test_redis_instances_share_state(self, redis_stand_in):
+        """Test two clients (as two workers would) see the same entries"""
+        host, port = redis_stand_in.server_address
+        worker_a = RedisCache(f"redis://{host}:{port}/0", "stories")
+        worker_b = RedisCache(f"redis://{host}:{port}/0", "stories")
+        worker_a["story-1"] = {"title": "A"}
+        assert worker_b["story-1"] == {"title": "A"}
+
+    def test_redis_error_reply(self, redis_stand_in):
+        """Test server errors surface as RedisError"""
+        host, port = redis_stand_in.server_address
+        cache = RedisCache(f"redis://{host}:{port}/0", "stories")
+        with pytest.raises(RedisError):
+            cache._command("FLUSHALL")
+
+
+class TestCreateCache:
+    """Unit tests for the backend factory"""
+
+    def test_default_memory(self):
+        assert isinstance(create_cache("stories", "memory"), MemoryCache)
+
+    def test_unknown_backend_falls_back(self):
+        assert isinstance(create_cache("stories", "bogus"), MemoryCache)
+
+    def test_sqlite(self, tmp_path, monkeypatch):
+        monkeypatch.setattr("CacheBackend.CACHE_SQLITE_PATH", str(tmp_path / "c.sqlite3"))
+        assert isinstance(create_cache("stories", "sqlite"), SQLiteCache)
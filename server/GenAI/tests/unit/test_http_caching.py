@@ -0,0 +1,30 @@
+"""
+Unit tests for HttpCaching module
+"""
+from HttpCaching import content_hash, make_etag, etag_matches
+
+
+class TestHttpCaching:
+    """Unit tests for ETag helpers"""
+
+    def test_content_hash_ignores_key_order(self):
+        """Test equal payloads hash the same regardless of key order"""
+        assert content_hash({"a": 1, "b": [1, 2]}) == content_hash({"b": [1, 2], "a": 1})
+        assert content_hash({"a": 1}) != content_hash({"a": 2})
+
+    def test_make_etag_variants(self):
+        """Test projected representations get distinct weak tags"""
+        full = make_etag("abc")
+        assert full == 'W/"abc"'
+        assert make_etag("abc", ["quiz"]) != full
+        assert make_etag("abc", ["quiz"]) != make_etag("abc", ["story"])
+
+    def test_etag_matches(self):
+        """Test If-None-Match parsing"""
+        etag = make_etag("abc")
+        assert etag_matches('"abc"', etag)
+        assert etag_matches(etag, etag)
+        assert etag_matches('"other", W/"abc"', etag)
+        assert etag_matches("*", etag)
+        assert not etag_matches('"other"', etag)
+        assert not etag_matches(None, etag)
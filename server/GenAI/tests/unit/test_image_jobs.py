@@ -0,0 +1,210 @@
+"""
+Unit tests for ImageJobs module
+"""
+import time
+import pytest
+from ImageJobs import CANCELLED, DONE, FAILED, PENDING, ImageJobQueue, ImageJobWorker, image_job_id
+from WorkScheduler import Preempted
+
+ASSETS = [
+    {"asset": "cover", "kind": "cover", "public_id": "cover_1"},
+    {"asset": "character:Ana", "kind": "character", "public_id": "ana1"},
+    {"asset": "background:primary", "kind": "background", "public_id": "primaryhome_1"},
+]
+
+
+def url(asset):
+    return f"https://cdn/{asset['public_id']}.png"
+
+
+class Renderer:
+    """Stand-in for generate-and-upload that records calls and fails on demand"""
+
+    def __init__(self, fail=()):
+        self.calls = []
+        self.fail = set(fail)
+
+    def __call__(self, asset):
+        self.calls.append(asset["asset"])
+        if asset["asset"] in self.fail:
+            raise RuntimeError("upload failed")
+        return url(asset)
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "jobs.sqlite3")
+
+
+@pytest.fixture
+def jobs(path):
+    queue = ImageJobQueue(path, max_attempts=2, retry_seconds=0)
+    queue.enqueue("job-1", {"story": {"plot": {"title": "T"}}, "timestamp": "1"}, ASSETS)
+    queue.attach("job-1", "story-1")
+    return queue
+
+
+class TestImageJobQueue:
+    """Unit tests for ImageJobQueue"""
+
+    def test_run_renders_every_asset(self, jobs):
+        """Test a fresh job renders each asset once and is done"""
+        render = Renderer()
+        urls = jobs.run("job-1", render)
+        assert urls == {asset["asset"]: url(asset) for asset in ASSETS}
+        assert render.calls == [asset["asset"] for asset in ASSETS]
+        assert jobs.job("job-1")["state"] == DONE
+
+    def test_finished_assets_are_never_redone(self, jobs):
+        """Test rerunning and re-enqueueing a job doesn't generate uploaded assets again"""
+        jobs.run("job-1", Renderer())
+        jobs.enqueue("job-1", {"story": {}, "timestamp": "2"}, ASSETS)
+        render = Renderer()
+        assert len(jobs.run("job-1", render)) == 3
+        assert render.calls == []
+        assert jobs.job("job-1")["payload"]["timestamp"] == "1"
+
+    def test_failed_asset_retried_until_max_attempts(self, jobs):
+        """Test only the failed asset is retried and it fails for good after the last attempt"""
+        jobs.run("job-1", Renderer(fail={"cover"}))
+        assert jobs.job("job-1")["state"] == PENDING
+        cover = jobs.assets("job-1")[0]
+        assert cover["attempts"] == 1
+        assert cover["error"] == "upload failed"
+
+        render = Renderer(fail={"cover"})
+        urls = jobs.run("job-1", render)
+        assert render.calls == ["cover"]
+        assert "cover" not in urls
+        assert jobs.assets("job-1")[0]["state"] == FAILED
+        assert jobs.job("job-1")["state"] == FAILED
+        assert jobs.next_runnable() is None
+
+    def test_retry_waits_for_backoff(self, path):
+        """Test a failed asset is not runnable again before its retry time"""
+        jobs = ImageJobQueue(path, retry_seconds=60)
+        jobs.enqueue("job-1", {}, ASSETS[:1])
+        jobs.run("job-1", Renderer(fail={"cover"}))
+        assert jobs.next_runnable() is None
+        assert jobs.run("job-1", Renderer()) == {}
+
+    def test_missing_image_counts_as_failure(self, jobs):
+        """Test an asset whose render produced no image is retried"""
+        jobs.run("job-1", lambda asset: None if asset["kind"] == "cover" else url(asset))
+        assert jobs.assets("job-1")[0]["state"] == PENDING
+        assert jobs.assets("job-1")[0]["error"] == "no image generated"
+
+    def test_resume_after_crash(self, path):
+        """Test a job interrupted mid-render is picked up by a new process once the lease lapses"""
+        crashed = ImageJobQueue(path, lease_seconds=0.05)
+        crashed.enqueue("job-1", {"timestamp": "1"}, ASSETS)
+        crashed.attach("job-1", "story-1")
+        assert crashed.claim("job-1")
+        crashed._start("job-1", "cover")
+        crashed._finish("job-1", "cover", url(ASSETS[0]))
+        crashed._start("job-1", "character:Ana")
+        # The process dies here, holding the lease with one asset running
+
+        restarted = ImageJobQueue(path)
+        assert restarted.next_runnable() is None
+        time.sleep(0.06)
+        job = restarted.next_runnable()
+        assert job["job_id"] == "job-1"
+
+        render = Renderer()
+        urls = restarted.run("job-1", render)
+        assert render.calls == ["character:Ana", "background:primary"]
+        assert len(urls) == 3
+        assert restarted.assets("job-1")[1]["attempts"] == 2
+
+    def test_leased_job_left_to_its_runner(self, jobs):
+        """Test a job another runner holds is not rendered twice"""
+        assert jobs.claim("job-1")
+        render = Renderer()
+        assert jobs.run("job-1", render) == {}
+        assert render.calls == []
+
+    def test_preempted_render_cancels_job(self, jobs):
+        """Test a job whose pre-generation render was preempted is never resumed, but revives if re-enqueued"""
+        render = Renderer()
+
+        def preempted(asset):
+            if asset["kind"] == "character":
+                raise Preempted("pregeneration call preempted")
+            return render(asset)
+
+        with pytest.raises(Preempted):
+            jobs.run("job-1", preempted)
+        assert jobs.job("job-1")["state"] == CANCELLED
+        assert jobs.assets("job-1")[1]["state"] == PENDING
+        assert jobs.next_runnable() is None
+
+        jobs.enqueue("job-1", {}, ASSETS)
+        jobs.run("job-1", render)
+        assert render.calls == ["cover", "character:Ana", "background:primary"]
+        assert jobs.job("job-1")["state"] == DONE
+
+    def test_unattached_jobs_are_not_resumed(self, path):
+        """Test jobs without a served story are skipped and cancelled once orphaned"""
+        jobs = ImageJobQueue(path, orphan_seconds=0.05)
+        jobs.enqueue("pooled", {}, ASSETS)
+        assert jobs.next_runnable() is None
+        assert jobs.job("pooled")["state"] == PENDING
+        time.sleep(0.06)
+        assert jobs.next_runnable() is None
+        assert jobs.job("pooled")["state"] == CANCELLED
+
+    def test_attach_and_stats(self, jobs):
+        """Test the owning story id is recorded and counts are reported by state"""
+        assert jobs.attach("job-1", "story-1")
+        assert not jobs.attach("missing", "story-2")
+        jobs.run("job-1", Renderer(fail={"cover"}))
+        stats = jobs.stats()
+        assert jobs.job("job-1")["story_id"] == "story-1"
+        assert stats["jobs"] == {PENDING: 1}
+        assert stats["assets"] == {DONE: 2, PENDING: 1}
+
+    def test_job_id_ignores_images(self):
+        """Test the job id depends on the story, not on the images produced so far"""
+        story = {"plot": {"title": "T"}, "dialogue": []}
+        assert image_job_id(story) == image_job_id({**story, "generated_images": {"cover": "x"}})
+        assert image_job_id(story) != image_job_id({**story, "plot": {"title": "U"}})
+
+
+class TestImageJobWorker:
+    """Unit tests for ImageJobWorker"""
+
+    def test_run_pending_finishes_jobs(self, jobs):
+        """Test the worker hands every runnable job to the runner"""
+        jobs.enqueue("job-2", {}, ASSETS[:1])
+        jobs.attach("job-2", "story-2")
+        seen = []
+
+        def runner(job):
+            seen.append(job["job_id"])
+            jobs.run(job["job_id"], Renderer())
+
+        assert ImageJobWorker(jobs, runner).run_pending() == 2
+        assert seen == ["job-1", "job-2"]
+        assert jobs.next_runnable() is None
+
+    def test_failing_runner_does_not_spin(self, jobs):
+        """Test a runner error ends the pass so the worker waits for the next poll"""
+        calls = []
+
+        def runner(job):
+            calls.append(job["job_id"])
+            raise RuntimeError("model unavailable")
+
+        assert ImageJobWorker(jobs, runner).run_pending() == 0
+        assert calls == ["job-1"]
+
+    def test_background_thread(self, jobs):
+        """Test the started worker resumes jobs and stops cleanly"""
+        worker = ImageJobWorker(jobs, lambda job: jobs.run(job["job_id"], Renderer()), poll_seconds=0.01)
+        worker.start()
+        deadline = time.monotonic() + 2
+        while jobs.job("job-1")["state"] != DONE and time.monotonic() < deadline:
+            time.sleep(0.01)
+        worker.stop()
+        assert jobs.job("job-1")["state"] == DONE
@@ -0,0 +1,174 @@
+"""
+Unit tests for LoadTest module
+"""
+import os
+import sys
+import asyncio
+import json
+import httpx
+import pytest
+from unittest.mock import patch
+from LoadTest import (
+    STEPS, LevelStats, StandInClient, local_server_env, percentile, run_level, saturation, standins, format_report
+)
+from NovelGenerator import StoryData
+from QuizGenerator import Quiz
+
+
+def level(users, throughput, lag=0.0, waiters=0):
+    """Minimal level report for saturation tests"""
+    return {"users": users, "throughput": throughput, "journey_p95": 1.0, "journeys": 10, "failed_journeys": 0,
+            "server": {"loop_lag_p95": lag, "thread_waiters_max": waiters}}
+
+
+class TestLocalServerEnv:
+    """Unit tests for the in-process server environment"""
+
+    def test_isolates_background_work_and_output(self, tmp_path, monkeypatch):
+        """Test pool refills and image jobs are off and output goes to the work directory"""
+        for name in ("GEMINI_API", "STORY_POOL_DEPTH", "IMAGE_JOBS", "SUMMARY_DIR"):
+            monkeypatch.setenv(name, "unchanged")
+        monkeypatch.chdir(os.getcwd())
+        monkeypatch.delitem(sys.modules, "web_server", raising=False)
+
+        local_server_env(str(tmp_path))
+        assert os.environ["STORY_POOL_DEPTH"] == "0"
+        assert os.environ["IMAGE_JOBS"] == "false"
+        assert os.environ["SUMMARY_DIR"] == str(tmp_path / "output" / "summaries")
+        assert os.getcwd() == str(tmp_path)
+
+    def test_refuses_after_web_server_import(self, tmp_path, monkeypatch):
+        """Test settings that web_server would never see are rejected"""
+        monkeypatch.setitem(sys.modules, "web_server", object())
+        with pytest.raises(RuntimeError):
+            local_server_env(str(tmp_path))
+
+
+class TestPercentile:
+    """Unit tests for percentile helper"""
+
+    def test_nearest_rank(self):
+        """Test nearest-rank percentiles"""
+        values = [float(v) for v in range(1, 101)]
+        assert percentile(values, 50) == 50.0
+        assert percentile(values, 99) == 99.0
+        assert percentile([3.0], 95) == 3.0
+
+    def test_empty(self):
+        """Test no samples report zero"""
+        assert percentile([], 95) == 0.0
+
+
+class TestStandIns:
+    """Unit tests for model and CDN stand-ins"""
+
+    def test_story_response_is_valid(self):
+        """Test the stand-in story parses into StoryData with the requested interest"""
+        client = StandInClient(model_latency=0)
+        prompt = "Generate a financial literacy story segment about Saving of the Budgeting\n- Character/Reference: Drake\n"
+        story = StoryData(**json.loads(client.models.generate_content(model="m", contents=prompt).text))
+        assert story.plot.title.startswith("Drake's Saving Journey")
+        assert len(story.dialogue) == 5
+
+    def test_quiz_and_summary_responses_are_valid(self):
+        """Test stand-in quiz, quiz set and summary payloads have the expected shapes"""
+        models = StandInClient(model_latency=0).models
+        quiz = Quiz(**json.loads(models.generate_content(model="m", contents="Generate a financial literacy quiz").text))
+        assert len(quiz.questions) == 5
+        quiz_set = json.loads(models.generate_content(model="m", contents="Generate three financial literacy quizzes").text)
+        assert set(quiz_set) == {"beginner", "intermediate", "advanced"}
+        summary = json.loads(models.generate_content(model="m", contents="Generate a JSON summary of financial lessons from X.\n").text)
+        assert summary["topic"] == "X"
+
+    def test_image_stream_yields_png(self):
+        """Test the image stand-in yields inline PNG data like the SDK stream"""
+        chunk = next(StandInClient(image_latency=0).models.generate_content_stream(model="m", contents=[]))
+        assert chunk.candidates[0].content.parts[0].inline_data.data.startswith(b"\x89PNG")
+
+    def test_standins_patch_and_restore(self):
+        """Test the context manager swaps the Gemini client and Cloudinary uploader and restores them"""
+        import google.genai
+        import cloudinary.uploader
+        original_client, original_upload = google.genai.Client, cloudinary.uploader.upload
+        with standins(0, 0, 0):
+            assert isinstance(google.genai.Client(api_key="x"), StandInClient)
+            assert cloudinary.uploader.upload("a.png", folder="covers", public_id="c1")["secure_url"].endswith("covers/c1.png")
+        assert google.genai.Client is original_client
+        assert cloudinary.uploader.upload is original_upload
+
+
+class TestLevels:
+    """Unit tests for journey replay and reporting"""
+
+    def test_level_stats_report(self):
+        """Test per-step error rates and throughput"""
+        stats = LevelStats(2)
+        stats.record("generate", 1.0, True)
+        stats.record("generate", 3.0, False)
+        stats.journey(2.0, True)
+        stats.journey(1.0, False)
+        stats.elapsed = 2.0
+        report = stats.report()
+        assert report["steps"]["generate"]["error_rate"] == 0.5
+        assert report["steps"]["generate"]["p99"] == 3.0
+        assert report["throughput"] == 0.5
+        assert report["failed_journeys"] == 1
+
+    @patch('web_server.summarizer')
+    @patch('web_server.quiz_generator')
+    @patch('web_server.generator')
+    def test_run_level_replays_journeys(self, mock_generator, mock_quiz_gen, mock_summarizer,
+                                        sample_story_data, sample_quiz_data, sample_summary_data):
+        """Test a level drives every journey step against the app"""
+        from web_server import app
+        mock_generator.fork.return_value = mock_generator
+        mock_generator.game_state.difficulty = "beginner"
+        mock_generator.game_state.selected_interest = {"category": "Comics & Anime", "interest": "Spider-Man"}
+        mock_generator.game_state.selected_concept = {"topic": "Budgeting", "subtopic": "Saving"}
+        mock_generator.generate_story_segment.return_value = StoryData(**sample_story_data)
+        mock_quiz_gen.generate_quiz.return_value = Quiz(**sample_quiz_data)
+        mock_summarizer.cache = None
+        mock_summarizer.generate_summary.return_value = sample_summary_data
+
+        report = asyncio.run(run_level(2, 0.2, transport=httpx.ASGITransport(app=app)))
+        assert report["journeys"] >= 2
+        assert report["failed_journeys"] == 0
+        assert all(report["steps"][step]["count"] >= 2 for step in STEPS)
+        assert all(report["steps"][step]["errors"] == 0 for step in STEPS)
+
+
+class TestSaturation:
+    """Unit tests for saturation curve analysis"""
+
+    def test_event_loop_bottleneck(self):
+        """Test a flat curve with high loop lag is attributed to the event loop"""
+        curve = saturation([level(1, 1.0, lag=0.5), level(2, 2.0, lag=0.8), level(4, 2.05, lag=1.6)])
+        assert curve["knee_users"] == 2
+        assert curve["bottleneck"] == "event loop"
+
+    def test_worker_pool_bottleneck(self):
+        """Test threadpool waiters at the knee point to the worker pool"""
+        curve = saturation([level(1, 1.0), level(2, 2.0), level(4, 2.1, waiters=3)])
+        assert curve["bottleneck"] == "worker pool"
+
+    def test_not_saturated(self):
+        """Test a linearly scaling run reports no knee"""
+        curve = saturation([level(1, 1.0), level(2, 2.0), level(4, 4.0)])
+        assert curve["knee_users"] is None
+        assert curve["bottleneck"] == "not saturated"
+
+    def test_remote_server_unknown(self):
+        """Test runs without server samples cannot name a bottleneck"""
+        report = level(1, 1.0)
+        report["server"] = None
+        assert saturation([report])["bottleneck"] == "unknown"
+
+    def test_format_report(self):
+        """Test the text report includes every step and the curve"""
+        stats = LevelStats(1)
+        stats.elapsed = 1.0
+        report = stats.report()
+        report["server"] = None
+        text = format_report([report], saturation([report]))
+        assert all(step in text for step in STEPS)
+        assert "Saturation curve" in text
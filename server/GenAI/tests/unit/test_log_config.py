@@ -0,0 +1,153 @@
+"""
+Unit tests for LogConfig module
+"""
+import asyncio
+import io
+import json
+import logging
+import pytest
+from LogConfig import (
+    RequestContextMiddleware, SamplingFilter, bind_story, configure_logging, request_id_var, shutdown_logging
+)
+
+
+@pytest.fixture
+def log_output():
+    """Route logging to a buffer; returns a function that flushes the queue and parses the lines"""
+    stream = io.StringIO()
+
+    def read():
+        shutdown_logging()
+        return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+    def setup(**options):
+        configure_logging(level="INFO", fmt="json", stream=stream, **options)
+        return read
+
+    yield setup
+    shutdown_logging()
+    configure_logging()
+
+
+class TestStructuredLogging:
+    """Unit tests for queue-based JSON logging"""
+
+    def test_json_lines_with_context(self, log_output):
+        """Test records are JSON with the request and story ids of the caller"""
+        read = log_output()
+        token = request_id_var.set("req-1")
+        bind_story("story-1")
+        logging.getLogger("tests.log").info("hello %s", "world")
+        bind_story(None)
+        request_id_var.reset(token)
+        logging.getLogger("tests.log").warning("no context")
+
+        first, second = read()
+        assert first["msg"] == "hello world"
+        assert first["logger"] == "tests.log"
+        assert first["level"] == "INFO"
+        assert first["request_id"] == "req-1"
+        assert first["story_id"] == "story-1"
+        assert "request_id" not in second
+
+    def test_exception_traceback(self, log_output):
+        """Test tracebacks are captured on the calling thread and emitted as a field"""
+        read = log_output()
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            logging.getLogger("tests.log").exception("failed")
+        entry = read()[0]
+        assert entry["msg"] == "failed"
+        assert "ValueError: boom" in entry["exc"]
+
+    def test_text_format(self):
+        """Test LOG_FORMAT=text keeps the classic layout"""
+        stream = io.StringIO()
+        configure_logging(level="INFO", fmt="text", stream=stream)
+        try:
+            logging.getLogger("tests.log").info("plain")
+            shutdown_logging()
+            assert " - tests.log - INFO - plain" in stream.getvalue()
+        finally:
+            configure_logging()
+
+
+class TestSamplingFilter:
+    """Unit tests for info-level sampling"""
+
+    def record(self, level=logging.INFO, request_id=None):
+        record = logging.LogRecord("tests.log", level, __file__, 1, "msg", None, None)
+        record.request_id = request_id
+        return record
+
+    def test_full_rate_keeps_everything(self):
+        """Test the default rate drops nothing"""
+        sampler = SamplingFilter(1.0)
+        assert all(sampler.filter(self.record()) for _ in range(100))
+
+    def test_warnings_never_sampled(self):
+        """Test warnings and errors are always kept"""
+        sampler = SamplingFilter(0.0)
+        assert sampler.filter(self.record(logging.WARNING)) is True
+        assert sampler.filter(self.record(logging.INFO)) is False
+        assert sampler.dropped == 1
+
+    def test_decision_is_per_request(self):
+        """Test every line of a request is kept or dropped together"""
+        sampler = SamplingFilter(0.5)
+        for request_id in (f"req-{i}" for i in range(50)):
+            decisions = {sampler.filter(self.record(request_id=request_id)) for _ in range(5)}
+            assert len(decisions) == 1
+        kept = sum(sampler.filter(self.record(request_id=f"other-{i}")) for i in range(1000))
+        assert 350 < kept < 650
+
+
+class TestRequestContextMiddleware:
+    """Unit tests for request ids and access lines"""
+
+    def run(self, app, headers=()):
+        messages = []
+
+        async def receive():
+            return {"type": "http.request", "body": b""}
+
+        async def send(message):
+            messages.append(message)
+
+        scope = {"type": "http", "method": "POST", "path": "/api/generate", "headers": list(headers)}
+        asyncio.run(RequestContextMiddleware(app)(scope, receive, send))
+        return messages
+
+    def test_request_id_and_access_line(self, log_output):
+        """Test the request id is echoed, tags handler logs and the access line carries the story id"""
+        read = log_output()
+
+        async def app(scope, receive, send):
+            logging.getLogger("tests.handler").info("working")
+            scope["state"]["story_id"] = "story-9"
+            await send({"type": "http.response.start", "status": 201, "headers": []})
+            await send({"type": "http.response.body", "body": b""})
+
+        messages = self.run(app, headers=[(b"x-request-id", b"abc123")])
+        assert dict(messages[0]["headers"])[b"x-request-id"] == b"abc123"
+
+        handler_line, access_line = read()
+        assert handler_line["request_id"] == "abc123"
+        assert access_line["logger"] == "web_server.access"
+        assert access_line["msg"].startswith("POST /api/generate 201 ")
+        assert access_line["story_id"] == "story-9"
+        assert request_id_var.get() is None
+
+    def test_generates_request_id(self, log_output):
+        """Test a request id is generated when the client sends none"""
+        read = log_output()
+
+        async def app(scope, receive, send):
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b""})
+
+        messages = self.run(app)
+        request_id = dict(messages[0]["headers"])[b"x-request-id"].decode()
+        assert len(request_id) == 32
+        assert read()[0]["request_id"] == request_id
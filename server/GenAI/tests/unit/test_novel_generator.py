@@ -159,6 +159,20 @@ class TestFinancialNovelGenerator:
                     assert isinstance(result, StoryData)
                     assert "Error" in result.plot.title
     
+    def test_client_error_code_read_from_code(self, generator):
+        """Test a real ClientError (code, no status_code) is recognised as a rate limit"""
+        from google.genai.errors import ClientError
+        
+        error = ClientError(429, {"error": {"message": "Rate limit exceeded"}})
+        generator.client.models.generate_content.side_effect = error
+        generator.client.models.generate_content_stream.side_effect = error
+        
+        with patch('NovelGenerator.logger') as logger:
+            generator.generate_story_segment()
+            assert generator._generate_image("A cozy home", "background") is None
+        logger.error.assert_any_call("Rate limit exceeded for story generation")
+        logger.warning.assert_any_call("Rate limit exceeded for image generation")
+    
     def test_parse_response_valid_json(self, generator, sample_story_data):
         """Test parsing valid JSON response"""
         json_str = json.dumps(sample_story_data)
@@ -181,6 +195,43 @@ class TestFinancialNovelGenerator:
         assert isinstance(result, dict)
         assert "Parsing Error" in result.get("plot", {}).get("title", "")
 
+    def test_images_resume_without_redoing_uploads(self, generator, sample_story_data, tmp_path):
+        """Test a rerun of a story's image job only renders the assets that are still missing"""
+        from ImageJobs import ImageJobQueue
+        jobs = ImageJobQueue(str(tmp_path / "jobs.sqlite3"), retry_seconds=0)
+        story = StoryData(**sample_story_data)
+        uploads = []
+
+        def render(story_data, asset):
+            uploads.append(asset["asset"])
+            if asset["kind"] == "background" and uploads.count(asset["asset"]) == 1:
+                raise RuntimeError("upload timed out")
+            return f"https://cdn/{asset['public_id']}.png"
+
+        with patch('NovelGenerator.IMAGE_JOBS', True), patch('NovelGenerator.get_image_jobs', return_value=jobs):
+            with patch.object(generator, 'render_image_asset', side_effect=render):
+                first = generator.generate_all_images_for_story(story, "20240101_000000")
+                second = generator.generate_all_images_for_story(story, "20240101_000000")
+
+        assert first["cover"] == "https://cdn/cover_20240101_000000.png"
+        assert first["characters"] == {"Spider-Man": "https://cdn/spider-man20240101_000000.png"}
+        assert first["backgrounds"]["primary"] is None
+        assert second["backgrounds"]["primary"] == "https://cdn/primaryhome_20240101_000000.png"
+        assert uploads == ["cover", "character:Spider-Man", "background:primary", "background:primary"]
+        assert story.generated_images == second
+
+    def test_images_without_job_queue(self, generator, sample_story_data):
+        """Test images are still generated directly when IMAGE_JOBS is off, skipping failed assets"""
+        story = StoryData(**sample_story_data)
+        with patch.object(generator, 'generate_story_cover', return_value=None), \
+                patch.object(generator, 'generate_character_image', return_value=Mock()), \
+                patch.object(generator, 'generate_background_image', return_value=Mock()), \
+                patch.object(generator, 'upload_to_cloudinary', side_effect=["https://cdn/c.png", RuntimeError("down")]):
+            images = generator.generate_all_images_for_story(story, "20240101_000000")
+        assert "cover" not in images
+        assert images["characters"] == {"Spider-Man": "https://cdn/c.png"}
+        assert images["backgrounds"]["primary"] is None
+
 
 class TestPydanticModels:
     """Unit tests for Pydantic models"""
@@ -208,3 +259,47 @@ class TestPydanticModels:
         assert len(story.dialogue) == 2
         assert len(story.visuals.characters) == 1
 
+
+
+class TestFrontendView:
+    """Unit tests for the precomputed frontend view"""
+    
+    def test_frontend_view_maps_images(self, sample_story_data):
+        """Test scenes get background and character images"""
+        from NovelGenerator import frontend_view
+        story = StoryData(**sample_story_data)
+        story.generated_images = {
+            "backgrounds": {"primary": "bg1.png", "secondary": "bg2.png", "tertiary": "bg3.png"},
+            "characters": {story.dialogue[0].character: "char.png"}
+        }
+        record = frontend_view(story)
+        scenes = record["view"]["dialogue_scenes"]
+        assert len(scenes) == len(story.dialogue)
+        assert scenes[0]["character_image"] == "char.png"
+        assert scenes[-1]["background_image"] == "bg3.png"
+    
+    def test_images_fingerprint_tracks_images(self):
+        """Test the fingerprint changes only when images change"""
+        from NovelGenerator import images_fingerprint
+        assert images_fingerprint({"a": 1, "b": 2}) == images_fingerprint({"b": 2, "a": 1})
+        assert images_fingerprint(None) == images_fingerprint({})
+        assert images_fingerprint({"a": 1}) != images_fingerprint({"a": 2})
+    
+    def test_stored_view_rebuilt_only_when_images_change(self, sample_story_data, monkeypatch):
+        """Test repeated saves and reads reuse the view until the story's images change"""
+        import NovelGenerator
+        from NovelGenerator import FinancialNovelGenerator, stored_frontend_view
+        monkeypatch.setattr(NovelGenerator, "_frontend_views", NovelGenerator.OrderedDict())
+        calls = []
+        format_view = FinancialNovelGenerator.format_story_for_frontend
+        monkeypatch.setattr(FinancialNovelGenerator, "format_story_for_frontend",
+                            staticmethod(lambda story: calls.append(story) or format_view(story)))
+        story = StoryData(**sample_story_data)
+        
+        first = stored_frontend_view("story_1", story)
+        assert stored_frontend_view("story_1", story) is first
+        assert len(calls) == 1
+        
+        story.generated_images = {"characters": {story.dialogue[0].character: "char.png"}}
+        assert stored_frontend_view("story_1", story)["dialogue_scenes"][0]["character_image"] == "char.png"
+        assert len(calls) == 2
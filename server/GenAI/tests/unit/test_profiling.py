@@ -0,0 +1,120 @@
+"""
+Unit tests for Profiling module
+"""
+import asyncio
+import cProfile
+import os
+import pytest
+from Profiling import ProfilingMiddleware, RequestProfiler
+
+
+def http_scope(path="/api/generate", headers=()):
+    return {"type": "http", "method": "POST", "path": path, "headers": list(headers)}
+
+
+class TestRequestProfiler:
+    """Unit tests for RequestProfiler"""
+
+    @pytest.fixture
+    def profiler(self, tmp_path):
+        return RequestProfiler(str(tmp_path / "profiles"), keep=3)
+
+    def test_wants_header_only_when_disabled(self, profiler, monkeypatch):
+        """Test only requests with X-Profile are profiled while the toggle is off"""
+        monkeypatch.setenv("ADMIN_TOKEN", "secret")
+        token = (b"x-admin-token", b"secret")
+        assert profiler.wants(http_scope(headers=[token])) is False
+        assert profiler.wants(http_scope(headers=[(b"x-profile", b"1"), token])) is True
+        assert profiler.wants(http_scope(headers=[(b"x-profile", b"0"), token])) is False
+
+    def test_wants_requires_admin_token(self, profiler, monkeypatch):
+        """Test header-triggered profiling needs the admin token and is off without one"""
+        monkeypatch.delenv("ADMIN_TOKEN", raising=False)
+        assert profiler.wants(http_scope(headers=[(b"x-profile", b"1")])) is False
+        monkeypatch.setenv("ADMIN_TOKEN", "secret")
+        assert profiler.wants(http_scope(headers=[(b"x-profile", b"1")])) is False
+        assert profiler.wants(http_scope(headers=[(b"x-profile", b"1"), (b"x-admin-token", b"wrong")])) is False
+        assert profiler.wants(http_scope(headers=[(b"x-profile", b"1"), (b"x-admin-token", b"secret")])) is True
+
+    def test_toggle_with_path_prefix(self, profiler):
+        """Test the admin toggle profiles every request under a prefix"""
+        profiler.configure(True, "/api/generate")
+        assert profiler.wants(http_scope("/api/generate")) is True
+        assert profiler.wants(http_scope("/api/stories")) is False
+        profiler.configure(False)
+        assert profiler.wants(http_scope("/api/generate")) is False
+
+    def test_single_active_profile(self, profiler):
+        """Test a second request cannot claim the profiler while one is running"""
+        assert profiler.try_begin() is True
+        assert profiler.try_begin() is False
+        profiler.end()
+        assert profiler.try_begin() is True
+
+    def test_save_list_and_report(self, profiler):
+        """Test saved profiles are named after the story, listed newest first and readable"""
+        profile = cProfile.Profile()
+        profile.enable()
+        sum(range(1000))
+        profile.disable()
+
+        first = profiler.save(profiler.new_id(), profile, "POST", "/api/generate", 200, 0.5, "story-1")
+        second = profiler.save(profiler.new_id(), profile, "GET", "/api/stories", 200, 0.1)
+        assert first["file"].endswith("_story-1.prof")
+        assert second["file"].endswith("_no-story.prof")
+        assert [entry["id"] for entry in profiler.list()] == [second["id"], first["id"]]
+        assert profiler.find(first["id"])["story_id"] == "story-1"
+        assert "function calls" in profiler.report(first)
+
+    def test_prune_keeps_newest(self, profiler):
+        """Test only the newest profiles are kept on disk"""
+        entries = [profiler.save(profiler.new_id(), cProfile.Profile(), "GET", "/", 200, 0.0) for _ in range(5)]
+        kept = profiler.list()
+        assert [entry["id"] for entry in kept] == [entry["id"] for entry in reversed(entries[-3:])]
+        assert not os.path.exists(profiler.path_for(entries[0]))
+
+    def test_find_rejects_invalid_ids(self, profiler):
+        """Test ids that could escape the profile directory are rejected"""
+        assert profiler.find("../../etc/passwd") is None
+
+
+class TestProfilingMiddleware:
+    """Unit tests for ProfilingMiddleware"""
+
+    def run(self, middleware, scope):
+        messages = []
+
+        async def receive():
+            return {"type": "http.request", "body": b""}
+
+        async def send(message):
+            messages.append(message)
+
+        asyncio.run(middleware(scope, receive, send))
+        return messages
+
+    @staticmethod
+    async def app(scope, receive, send):
+        scope.get("state", {})["story_id"] = "story-42"
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    def test_passthrough_when_disabled(self, tmp_path):
+        """Test unprofiled requests are forwarded untouched"""
+        profiler = RequestProfiler(str(tmp_path))
+        messages = self.run(ProfilingMiddleware(self.app, profiler), http_scope())
+        assert messages[0]["headers"] == []
+        assert profiler.list() == []
+
+    def test_profiles_request(self, tmp_path, monkeypatch):
+        """Test a profiled request gets an X-Profile-Id and a saved trace with its story id"""
+        monkeypatch.setenv("ADMIN_TOKEN", "secret")
+        profiler = RequestProfiler(str(tmp_path))
+        headers = [(b"x-profile", b"1"), (b"x-admin-token", b"secret")]
+        messages = self.run(ProfilingMiddleware(self.app, profiler), http_scope(headers=headers))
+        profile_id = dict(messages[0]["headers"])[b"x-profile-id"].decode()
+        entry = profiler.find(profile_id)
+        assert entry["story_id"] == "story-42"
+        assert entry["status"] == 200
+        assert os.path.exists(profiler.path_for(entry))
+        assert profiler.try_begin() is True
@@ -106,9 +106,59 @@ class TestQuizGenerator:
         gen.client = mock_client
         
         result = gen.generate_quiz(sample_story_data, "beginner")
-        # Should return default quiz
+        # Should fall back to a quiz built locally from the story
         assert isinstance(result, Quiz)
-        assert result.topic == "Financial Literacy"
+        assert result.source.startswith("local:")
+        assert len(result.questions) == 5
+    
+    @patch('QuizGenerator.genai.Client')
+    def test_rate_limit_skips_model(self, mock_client_class, sample_story_data):
+        """Test a 429 makes later quizzes skip the model during the cooldown"""
+        from google.genai.errors import ClientError
+        
+        mock_client = MagicMock()
+        error = ClientError(429, {"error": {"message": "Rate limit exceeded"}})
+        mock_client.models.generate_content.side_effect = error
+        mock_client_class.return_value = mock_client
+        
+        gen = QuizGenerator()
+        first = gen.generate_quiz(sample_story_data, "beginner")
+        second = gen.generate_quiz(sample_story_data, "beginner")
+        
+        assert first.source.startswith("local:")
+        assert second.source.startswith("local:")
+        assert mock_client.models.generate_content.call_count == 1
+    
+    @patch('QuizGenerator.genai.Client')
+    def test_instant_mode(self, mock_client_class, sample_story_data):
+        """Test instant mode never calls the model"""
+        gen = QuizGenerator()
+        result = gen.generate_quiz(sample_story_data, "advanced", mode="instant")
+        assert result.difficulty == "advanced"
+        assert result.age_group == "14-16"
+        gen.client.models.generate_content.assert_not_called()
+    
+    @patch('QuizGenerator.genai.Client')
+    def test_generate_quiz_set_single_call(self, mock_client_class, sample_story_data, sample_quiz_data):
+        """Test all difficulties come from one model call, with local fill-in for gaps"""
+        mock_client = MagicMock()
+        mock_response = MagicMock()
+        mock_response.text = json.dumps({
+            "beginner": sample_quiz_data,
+            "intermediate": dict(sample_quiz_data, difficulty="intermediate"),
+            "advanced": {"topic": "broken"}
+        })
+        mock_client.models.generate_content.return_value = mock_response
+        mock_client_class.return_value = mock_client
+        
+        gen = QuizGenerator()
+        quizzes = gen.generate_quiz_set(sample_story_data)
+        
+        assert mock_client.models.generate_content.call_count == 1
+        assert set(quizzes) == {"beginner", "intermediate", "advanced"}
+        assert quizzes["intermediate"].age_group == "12-14"
+        assert quizzes["intermediate"].source is None
+        assert quizzes["advanced"].source.startswith("local:")
     
     def test_get_default_quiz(self, quiz_generator):
         """Test default quiz generation"""
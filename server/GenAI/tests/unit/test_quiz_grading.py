@@ -0,0 +1,74 @@
+"""
+Unit tests for QuizGrading module
+"""
+import pytest
+from QuizGrading import GradingError, build_answer_key, grade, public_quiz
+
+
+@pytest.fixture
+def quiz():
+    return {
+        "topic": "Budgeting",
+        "difficulty": "beginner",
+        "age_group": "10-12",
+        "questions": [
+            {
+                "question": "What is a budget?",
+                "options": [
+                    {"text": "A tax", "is_correct": False},
+                    {"text": "A plan for money", "is_correct": True},
+                ],
+                "explanation": "A budget is a plan."
+            },
+            {
+                "question": "Where should savings go?",
+                "options": [
+                    {"text": "A bank", "is_correct": True},
+                    {"text": "A pocket", "is_correct": False},
+                ],
+                "explanation": "Banks keep money safe."
+            }
+        ]
+    }
+
+
+class TestQuizGrading:
+    """Unit tests for answer keys and grading"""
+
+    def test_public_quiz_has_no_answers(self, quiz):
+        """Test the client payload strips answers and explanations"""
+        public = public_quiz(quiz)
+        assert public["topic"] == "Budgeting"
+        assert [q["id"] for q in public["questions"]] == ["q1", "q2"]
+        assert "is_correct" not in str(public)
+        assert "explanation" not in public["questions"][0]
+
+    def test_answer_key(self, quiz):
+        """Test the key maps question ids to the correct option"""
+        key = build_answer_key(quiz)
+        assert key["total"] == 2
+        assert key["questions"]["q1"]["correct_option"] == 1
+        assert key["questions"]["q2"]["explanation"] == "Banks keep money safe."
+
+    def test_grade_full_submission(self, quiz):
+        """Test scoring a complete submission"""
+        result = grade(build_answer_key(quiz), {"q1": 1, "q2": 1})
+        assert result["score"] == 1
+        assert result["graded"] == 2
+        assert [r["correct"] for r in result["results"]] == [True, False]
+        assert result["results"][1]["correct_option"] == 0
+
+    def test_grade_single_question(self, quiz):
+        """Test grading one question at a time"""
+        result = grade(build_answer_key(quiz), {"q2": 0})
+        assert result == {
+            "score": 1, "graded": 1, "total": 2,
+            "results": [{"id": "q2", "selected_option": 0, "correct": True,
+                         "correct_option": 0, "explanation": "Banks keep money safe."}]
+        }
+
+    @pytest.mark.parametrize("answers", [{"q9": 0}, {"q1": 5}, {"q1": -1}, {"q1": True}])
+    def test_invalid_submissions(self, quiz, answers):
+        """Test unknown questions and out-of-range options are rejected"""
+        with pytest.raises(GradingError):
+            grade(build_answer_key(quiz), answers)
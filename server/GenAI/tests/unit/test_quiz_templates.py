@@ -0,0 +1,46 @@
+"""
+Unit tests for QuizTemplates module
+"""
+import pytest
+from QuizTemplates import build_local_quiz, load_bank, resolve_concept
+
+
+class TestQuizTemplates:
+    """Unit tests for local quiz synthesis"""
+
+    @pytest.mark.parametrize("difficulty", ["beginner", "intermediate", "advanced"])
+    def test_builds_five_valid_questions(self, sample_story_data, difficulty):
+        """Test every difficulty yields five questions with one correct option each"""
+        quiz = build_local_quiz(sample_story_data, difficulty, "10-12")
+        assert len(quiz["questions"]) == 5
+        for question in quiz["questions"]:
+            assert len(question["options"]) == 4
+            assert sum(option["is_correct"] for option in question["options"]) == 1
+            assert question["explanation"]
+        assert quiz["source"] == f"local:{load_bank()['version']}"
+
+    def test_uses_story_hints_and_elements(self, sample_story_data):
+        """Test questions are drawn from the story's hints and financial elements"""
+        quiz = build_local_quiz(sample_story_data, "beginner", "10-12")
+        correct = [o["text"] for q in quiz["questions"] for o in q["options"] if o["is_correct"]]
+        hints = {line["hint"] for line in sample_story_data["dialogue"]}
+        assert hints & set(correct)
+        assert sample_story_data["visuals"]["financial_elements"] in correct
+
+    def test_deterministic(self, sample_story_data):
+        """Test the same story always produces the same quiz"""
+        assert build_local_quiz(sample_story_data, "beginner", "10-12") == \
+            build_local_quiz(sample_story_data, "beginner", "10-12")
+
+    def test_concept_resolution(self, sample_story_data):
+        """Test explicit topics win and otherwise keywords pick the concept"""
+        bank = load_bank()
+        assert resolve_concept(bank, sample_story_data, "Investing") == "investing"
+        assert resolve_concept(bank, sample_story_data) == "saving"
+        assert resolve_concept(bank, {"plot": {"title": "A day out"}}) == "general"
+
+    def test_minimal_story(self):
+        """Test a story without hints or visuals still gets five questions"""
+        quiz = build_local_quiz({"plot": {"title": "Empty"}}, "advanced", "14-16")
+        assert len(quiz["questions"]) == 5
+        assert len({q["question"] for q in quiz["questions"]}) == 5
@@ -0,0 +1,40 @@
+"""
+Unit tests for Serialization module
+"""
+import json
+from Serialization import FastJSONResponse, benchmark, sample_payload
+
+
+class TestSerialization:
+    """Unit tests for the response serializer and its benchmark"""
+
+    def test_fast_response_matches_stdlib_json(self):
+        """Test the fast encoder produces the same document"""
+        payload = sample_payload()
+        assert json.loads(FastJSONResponse(payload).body) == payload
+
+    def test_benchmark_reports_sizes_and_cpu(self):
+        """Test the benchmark reports bytes and CPU for each encoder"""
+        report = benchmark(sample_payload(), runs=2)
+        assert report["results"][0]["encoder"] == "default"
+        for row in report["results"]:
+            assert row["gzip_bytes"] < row["bytes"]
+            assert row["serialize_cpu_ms"] >= 0
+
+    def test_sample_payload_matches_api_models(self):
+        """Test the synthetic payload has the shapes /api/generate returns"""
+        from NovelGenerator import StoryData
+        from Summarizer import Summarizer
+        payload = sample_payload()
+        assert StoryData(**payload["story"]).model_dump() == payload["story"]
+        assert Summarizer(**payload["summary"]).model_dump() == payload["summary"]
+        question = payload["quiz"]["questions"][0]
+        assert question["id"] == "q1"
+        assert all(set(option) == {"text"} for option in question["options"])
+        assert len({line["text"] for line in payload["story"]["dialogue"]}) > 30
+
+    def test_sample_payload_from_file(self, tmp_path, sample_story_data):
+        """Test the benchmark payload can be built from a saved story"""
+        path = tmp_path / "story.json"
+        path.write_text(json.dumps(sample_story_data))
+        assert sample_payload(str(path))["story"] == sample_story_data
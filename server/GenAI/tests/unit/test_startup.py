@@ -0,0 +1,120 @@
+"""
+Unit tests for startup helpers and the cold-start budget
+"""
+import os
+import sys
+import json
+import subprocess
+import pytest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+from startup import LazyModule, LazyInstance, Warmup, lazy_import, is_initialized, import_time_report
+
+GENAI_DIR = str(Path(__file__).parent.parent.parent)
+# Seconds allowed for `import web_server` in a fresh interpreter
+COLD_START_BUDGET_SECONDS = float(os.getenv("COLD_START_BUDGET_SECONDS", "1.5"))
+
+
+class TestLazyModule:
+    """Unit tests for LazyModule"""
+
+    def test_loads_on_first_access(self):
+        """Test the real module is imported on attribute access"""
+        module = lazy_import("colorsys")
+        assert module.__dict__["_lazy_module"] is None
+        assert module.rgb_to_hsv(0, 0, 0) == (0, 0, 0)
+        assert module.__dict__["_lazy_module"] is not None
+
+    def test_patch_forwards_to_real_module(self):
+        """Test mock.patch through the placeholder patches the real module"""
+        import colorsys
+        module = LazyModule("colorsys")
+        with patch.object(module, "rgb_to_hsv", MagicMock(return_value="patched")):
+            assert colorsys.rgb_to_hsv(0, 0, 0) == "patched"
+        assert colorsys.rgb_to_hsv(0, 0, 0) == (0, 0, 0)
+
+
+class TestLazyInstance:
+    """Unit tests for LazyInstance"""
+
+    def test_builds_once_on_first_use(self):
+        """Test the factory runs once, on first attribute access"""
+        factory = MagicMock()
+        factory.return_value.value = 42
+        proxy = LazyInstance(factory)
+        assert not is_initialized(proxy)
+        factory.assert_not_called()
+
+        assert proxy.value == 42
+        assert proxy.value == 42
+        factory.assert_called_once()
+        assert is_initialized(proxy)
+
+    def test_attribute_writes_forwarded(self):
+        """Test writes and deletes reach the real object"""
+        class Target:
+            def method(self):
+                return "real"
+
+        proxy = LazyInstance(Target)
+        with patch.object(proxy, "method", return_value="patched"):
+            assert proxy.method() == "patched"
+        assert proxy.method() == "real"
+
+
+class TestWarmup:
+    """Unit tests for Warmup"""
+
+    def test_runs_steps_once(self):
+        """Test steps run once and later runs return the recorded state"""
+        step = MagicMock()
+        warmup = Warmup([("generators", step, True)])
+        assert warmup.state()["status"] == "not_started"
+        warmup.run()
+        warmup.run()
+        step.assert_called_once()
+        assert warmup.done
+        assert warmup.step_ok("generators")
+
+    def test_required_step_failure(self):
+        """Test a failing required step fails warmup"""
+        warmup = Warmup([("caches", MagicMock(side_effect=Exception("down")), True)])
+        state = warmup.run()
+        assert state["status"] == "failed"
+        assert state["steps"]["caches"]["error"] == "down"
+        assert not warmup.done
+
+
+class TestColdStart:
+    """Cold-start regressions for the web server"""
+
+    def _import_in_fresh_interpreter(self, module):
+        code = (
+            "import sys, time, json; start = time.perf_counter(); "
+            f"import {module}; elapsed = time.perf_counter() - start; "
+            "print(json.dumps({'elapsed': elapsed, 'loaded': sorted(m for m in "
+            "('google.genai', 'PIL', 'cloudinary') if m in sys.modules)}))"
+        )
+        env = {**os.environ, "GEMINI_API": "test_api_key_12345"}
+        result = subprocess.run([sys.executable, "-c", code], cwd=GENAI_DIR, env=env,
+                                capture_output=True, text=True, check=True)
+        return json.loads(result.stdout.strip().splitlines()[-1])
+
+    @pytest.mark.slow
+    def test_web_server_import_defers_heavy_dependencies(self):
+        """Test importing the app does not pull in Gemini, PIL or Cloudinary"""
+        result = self._import_in_fresh_interpreter("web_server")
+        assert result["loaded"] == []
+
+    @pytest.mark.slow
+    def test_web_server_cold_start_budget(self):
+        """Test importing the app stays under the cold-start budget"""
+        result = self._import_in_fresh_interpreter("web_server")
+        assert result["elapsed"] < COLD_START_BUDGET_SECONDS
+
+    def test_import_time_report(self):
+        """Test the per-package import-time report"""
+        report = import_time_report("json")
+        assert report["module"] == "json"
+        assert report["total_ms"] > 0
+        assert any(entry["package"] == "json" for entry in report["packages"])
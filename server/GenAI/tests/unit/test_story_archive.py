@@ -0,0 +1,135 @@
+"""
+Unit tests for StoryArchive module
+"""
+import os
+import sys
+import json
+import pytest
+import StoryArchive as story_archive
+from StoryArchive import ArchiveError, StoryArchive, export_json, get_archive, import_json
+
+
+@pytest.fixture
+def archive(tmp_path):
+    archive = StoryArchive(str(tmp_path / "archive"))
+    yield archive
+    archive.close()
+
+
+class TestStoryArchive:
+    """Unit tests for StoryArchive"""
+
+    def test_put_and_get(self, archive, sample_story_data):
+        """Test random access to archived stories"""
+        archive.put("story_1", sample_story_data)
+        archive.put("story_2", {"plot": {"title": "Other"}})
+
+        assert archive.get("story_1") == sample_story_data
+        assert archive.get("story_2")["plot"]["title"] == "Other"
+        assert archive.get("missing") is None
+        assert len(archive) == 2
+
+    def test_records_are_compact(self, archive, sample_story_data):
+        """Test the archive is smaller than pretty-printed JSON"""
+        for i in range(10):
+            archive.put(f"story_{i}", sample_story_data)
+        pretty = len(json.dumps(sample_story_data, indent=2)) * 10
+        assert archive.stats()["bytes"] < pretty
+
+    def test_reads_see_appends_after_mapping(self, archive):
+        """Test the active segment is remapped as it grows"""
+        archive.put("a", {"n": 1})
+        assert archive.get("a") == {"n": 1}
+        archive.put("b", {"n": 2})
+        assert archive.get("b") == {"n": 2}
+
+    def test_segments_roll_over(self, tmp_path, sample_story_data):
+        """Test records are spread over segments once one is full"""
+        archive = StoryArchive(str(tmp_path / "archive"), segment_max_bytes=600)
+        for i in range(5):
+            archive.put(f"story_{i}", sample_story_data)
+        assert archive.stats()["segments"] > 1
+        assert archive.get("story_4") == sample_story_data
+        archive.close()
+
+    def test_overwrite_keeps_latest(self, archive):
+        """Test a later put replaces the earlier record"""
+        archive.put("a", {"v": 1})
+        archive.put("a", {"v": 2})
+        assert archive.get("a") == {"v": 2}
+        assert [story_id for story_id, _ in archive.records()] == ["a"]
+
+    def test_index_rebuilt_from_segments(self, tmp_path, sample_story_data):
+        """Test a lost index is recovered by scanning segments"""
+        root = str(tmp_path / "archive")
+        archive = StoryArchive(root)
+        archive.put("a", sample_story_data)
+        archive.put("b", {"v": 2})
+        archive.close()
+        os.remove(os.path.join(root, "index.jsonl"))
+
+        reopened = StoryArchive(root)
+        assert reopened.get("a") == sample_story_data
+        assert reopened.get("b") == {"v": 2}
+        reopened.close()
+
+    def test_rebuild_skips_torn_record(self, tmp_path):
+        """Test records appended after a torn write survive an index rebuild"""
+        root = str(tmp_path / "archive")
+        archive = StoryArchive(root)
+        archive.put("a", {"v": 1})
+        archive.close()
+        # A crash cut the next write short; the following puts append after it
+        with open(archive._segment_path(0), "ab") as f:
+            f.write(b"\x40\x00\x00\x00\x01\x02\x03\x04partial")
+        archive = StoryArchive(root)
+        archive.put("b", {"v": 2})
+        archive.put("c", {"v": 3})
+        archive.close()
+        os.remove(os.path.join(root, "index.jsonl"))
+
+        reopened = StoryArchive(root)
+        assert sorted(reopened.ids()) == ["a", "b", "c"]
+        assert reopened.get("c") == {"v": 3}
+        assert [story_id for story_id, _ in reopened.records()] == ["a", "b", "c"]
+        reopened.close()
+
+    def test_corrupt_record_detected(self, archive):
+        """Test checksum mismatches raise instead of returning bad data"""
+        archive.put("a", {"v": 1})
+        archive.close()
+        segment, offset, _ = archive._index["a"]
+        with open(archive._segment_path(segment), "r+b") as f:
+            f.seek(offset)
+            byte = f.read(1)
+            f.seek(offset)
+            f.write(bytes([byte[0] ^ 0xFF]))
+        with pytest.raises(ArchiveError):
+            archive.get("a")
+
+    def test_import_export_round_trip(self, archive, tmp_path, sample_story_data):
+        """Test converting JSON story files to the archive and back"""
+        source = tmp_path / "stories"
+        source.mkdir()
+        (source / "story_1.json").write_text(json.dumps(sample_story_data, indent=2))
+        (source / "broken.json").write_text("{not json")
+
+        assert import_json(archive, str(source)) == 1
+        target = tmp_path / "exported"
+        assert export_json(archive, str(target)) == 1
+        assert json.loads((target / "story_1.json").read_text()) == sample_story_data
+
+
+class TestCommandLine:
+    """Unit tests for the StoryArchive CLI"""
+
+    def test_defaults_to_the_server_archive(self, tmp_path, monkeypatch, capsys):
+        """Test the CLI reads the same stories archive the server writes"""
+        monkeypatch.setattr(story_archive, "STORY_ARCHIVE_DIR", str(tmp_path / "archive"))
+        monkeypatch.setattr(story_archive, "_archives", {})
+        get_archive("stories").put("a", {"v": 1})
+        get_archive("stories").close()
+
+        monkeypatch.setattr(sys, "argv", ["StoryArchive.py", "stats"])
+        story_archive.main()
+        assert json.loads(capsys.readouterr().out)["stories"] == 1
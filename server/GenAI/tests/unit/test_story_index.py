@@ -0,0 +1,145 @@
+"""
+Unit tests for StoryIndex module
+"""
+import os
+import json
+import datetime
+import pytest
+from StoryIndex import StoryIndex
+from StoryQuery import QueryError
+
+
+@pytest.fixture
+def stories_dir(tmp_path):
+    return str(tmp_path / "stories")
+
+
+def write_story(stories_dir, filename, story):
+    os.makedirs(stories_dir, exist_ok=True)
+    with open(os.path.join(stories_dir, filename), "w", encoding="utf-8") as f:
+        json.dump(story, f)
+
+
+class TestStoryIndex:
+    """Unit tests for StoryIndex"""
+
+    def test_append_and_read(self, stories_dir):
+        """Test entries are listed newest first"""
+        index = StoryIndex(stories_dir)
+        index.append(StoryIndex.make_entry("story_20250101_100000.json", "First"))
+        index.append(StoryIndex.make_entry("story_20250102_100000.json", "Second"))
+
+        entries = index.read()
+        assert [e["title"] for e in entries] == ["Second", "First"]
+        assert entries[0]["story_id"] == "story_20250102_100000"
+        assert entries[0]["timestamp"] == "100000"
+
+    def test_later_entry_wins(self, stories_dir):
+        """Test re-saving a story replaces its entry"""
+        index = StoryIndex(stories_dir)
+        index.append(StoryIndex.make_entry("story_1.json", "Old"))
+        index.append(StoryIndex.make_entry("story_1.json", "New"))
+
+        entries = index.read()
+        assert len(entries) == 1
+        assert entries[0]["title"] == "New"
+
+    def test_skips_malformed_line(self, stories_dir):
+        """Test a torn line does not break the index"""
+        index = StoryIndex(stories_dir)
+        index.append(StoryIndex.make_entry("story_1.json", "Kept"))
+        with open(index.path, "a", encoding="utf-8") as f:
+            f.write('{"story_id": "story_2", "tit')
+
+        assert [e["title"] for e in index.read()] == ["Kept"]
+
+    def test_query_filters(self, stories_dir):
+        """Test filtering by interest area, concept, difficulty and date"""
+        index = StoryIndex(stories_dir)
+        index.append(StoryIndex.make_entry("story_1.json", "A", interest_area="Music Artists",
+                                           concept="Budgeting", difficulty="beginner",
+                                           created_at="2025-01-01T10:00:00"))
+        index.append(StoryIndex.make_entry("story_2.json", "B", interest_area="Comics & Anime",
+                                           concept="Saving", difficulty="advanced",
+                                           created_at="2025-02-01T10:00:00"))
+
+        assert [e["title"] for e in index.query(interest_area="Music Artists")["stories"]] == ["A"]
+        assert [e["title"] for e in index.query(concept="Saving")["stories"]] == ["B"]
+        assert [e["title"] for e in index.query(difficulty="beginner")["stories"]] == ["A"]
+        assert [e["title"] for e in index.query(since="2025-01-15")["stories"]] == ["B"]
+        assert [e["title"] for e in index.query(until="2025-01-15")["stories"]] == ["A"]
+
+    def test_query_dates_compare_as_instants(self, stories_dir):
+        """Test a date-only until covers its whole day and offsets are compared as instants"""
+        index = StoryIndex(stories_dir)
+        index.append(StoryIndex.make_entry("story_1.json", "Late", created_at="2025-01-15T23:30:00+00:00"))
+        index.append(StoryIndex.make_entry("story_2.json", "Offset", created_at="2025-01-16T01:00:00+02:00"))
+
+        assert [e["title"] for e in index.query(until="2025-01-15")["stories"]] == ["Offset", "Late"]
+        assert [e["title"] for e in index.query(since="2025-01-15T23:45:00Z")["stories"]] == []
+        with pytest.raises(QueryError):
+            index.query(since="last week")
+
+    def test_make_entry_created_at_is_utc(self):
+        """Test new entries record an aware UTC timestamp"""
+        created_at = StoryIndex.make_entry("story_1.json", "A")["created_at"]
+        assert datetime.datetime.fromisoformat(created_at).utcoffset() == datetime.timedelta(0)
+
+    def test_query_pagination(self, stories_dir):
+        """Test offset and limit with total count"""
+        index = StoryIndex(stories_dir)
+        for i in range(5):
+            index.append(StoryIndex.make_entry(f"story_{i}.json", f"Story {i}"))
+
+        page = index.query(offset=1, limit=2)
+        assert page["total"] == 5
+        assert [e["title"] for e in page["stories"]] == ["Story 3", "Story 2"]
+
+    def test_rebuild_from_story_files(self, stories_dir, sample_story_data):
+        """Test rebuilding recovers entries and skips invalid files"""
+        write_story(stories_dir, "story_20250101_100000.json", sample_story_data)
+        write_story(stories_dir, "story_20250102_100000.json", {"not": "a story"})
+
+        index = StoryIndex(stories_dir)
+        assert index.rebuild() == 1
+
+        entries = index.read()
+        assert len(entries) == 1
+        assert entries[0]["title"] == sample_story_data["plot"]["title"]
+        assert not os.path.exists(index.path + ".tmp")
+
+
+class TestNovelGeneratorIndex:
+    """Test that the generator keeps the index in sync"""
+
+    @pytest.fixture
+    def generator(self, tmp_path, monkeypatch, mock_gemini_client):
+        from NovelGenerator import FinancialNovelGenerator
+        monkeypatch.chdir(tmp_path)
+        gen = FinancialNovelGenerator()
+        gen.game_state.selected_interest = {"category": "Music Artists", "interest": "Drake"}
+        return gen
+
+    def test_save_updates_index(self, generator, sample_story_data):
+        """Test save_to_json appends an index entry that listing reads"""
+        from NovelGenerator import StoryData
+        generator.save_to_json(StoryData(**sample_story_data), "story_20250101_100000.json")
+
+        result = generator.list_available_stories(interest_area="Music Artists")
+        assert result["total"] == 1
+        story = result["stories"][0]
+        assert story["story_id"] == "story_20250101_100000"
+        assert story["concept"] == "Budgeting"
+        assert story["difficulty"] == "beginner"
+
+    def test_list_builds_missing_index(self, generator, sample_story_data):
+        """Test listing rebuilds the index for stories saved before it existed"""
+        write_story(os.path.join("output", "stories"), "story_20250101_100000.json", sample_story_data)
+
+        result = generator.list_available_stories()
+        assert result["total"] == 1
+        assert os.path.exists(os.path.join("output", "stories", "index.jsonl"))
+
+    def test_list_no_stories(self, generator):
+        """Test the error shape is unchanged"""
+        assert generator.list_available_stories() == {"error": "No stories found"}
@@ -0,0 +1,130 @@
+"""
+Unit tests for StoryPool module
+"""
+import pytest
+from unittest.mock import MagicMock, patch
+from StoryPool import StoryPool, PoolKey
+from WorkScheduler import Preempted
+
+
+@pytest.fixture
+def pool_key():
+    return PoolKey(
+        category="Comics & Anime",
+        interest="Spider-Man",
+        topic="Budgeting",
+        subtopic="What is a Budget and Why It Matters",
+        difficulty="beginner"
+    )
+
+
+class TestPoolKey:
+    """Unit tests for PoolKey"""
+
+    def test_from_state(self):
+        """Test building a key from game state"""
+        key = PoolKey.from_state(
+            {"category": "Music Artists", "interest": "Drake"},
+            {"topic": "Saving", "subtopic": "Emergency Funds"},
+            "Advanced"
+        )
+        assert key.category == "Music Artists"
+        assert key.interest == "Drake"
+        assert key.subtopic == "Emergency Funds"
+        assert key.difficulty == "advanced"
+
+    def test_from_state_defaults(self):
+        """Test defaults when state is missing"""
+        key = PoolKey.from_state(None, None, None)
+        assert key.category == "Comics & Anime"
+        assert key.difficulty == "beginner"
+
+
+class TestStoryPool:
+    """Unit tests for StoryPool class"""
+
+    def test_disabled_pool(self, pool_key):
+        """Test that a zero-depth pool never hits or refills"""
+        producer = MagicMock()
+        pool = StoryPool(producer, depth=0)
+        assert pool.pop(pool_key) is None
+        pool.request_refill(pool_key)
+        producer.assert_not_called()
+        assert pool.stats()["misses"] == 0
+
+    def test_pop_hit_and_miss(self, pool_key):
+        """Test hit and miss accounting"""
+        pool = StoryPool(MagicMock(), depth=2)
+        assert pool.pop(pool_key) is None
+        pool.put(pool_key, {"story": {"plot": {"title": "Pooled"}}})
+        entry = pool.pop(pool_key)
+        assert entry["story"]["plot"]["title"] == "Pooled"
+
+        stats = pool.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == 0.5
+
+    def test_refill_to_depth(self, pool_key):
+        """Test background refill tops the key up to the configured depth"""
+        producer = MagicMock(return_value={"story": {}, "quiz": {}, "summary": {}})
+        pool = StoryPool(producer, depth=3)
+        pool.pop(pool_key)
+        pool.request_refill(pool_key)
+        pool.wait_idle()
+        pool.stop()
+
+        assert producer.call_count == 3
+        assert pool.size(pool_key) == 3
+        assert pool.stats()["refills"] == 3
+
+    def test_refill_failure_stops(self, pool_key):
+        """Test that a failing producer does not loop forever"""
+        producer = MagicMock(side_effect=Exception("API Error"))
+        pool = StoryPool(producer, depth=2)
+        pool.pop(pool_key)
+        pool.request_refill(pool_key)
+        pool.wait_idle()
+        pool.stop()
+
+        assert producer.call_count == 1
+        assert pool.size(pool_key) == 0
+        assert pool.stats()["refill_failures"] == 1
+
+    def test_preempted_refill_keeps_worker(self, pool_key):
+        """Test a refill preempted by interactive work stops quietly and later refills still run"""
+        producer = MagicMock(side_effect=[Preempted("pregeneration call preempted"), {"story": {}}])
+        pool = StoryPool(producer, depth=1)
+        pool.pop(pool_key)
+        pool.request_refill(pool_key)
+        pool.wait_idle()
+        pool.request_refill(pool_key)
+        pool.wait_idle()
+        pool.stop()
+
+        stats = pool.stats()
+        assert stats["preempted"] == 1
+        assert stats["refill_failures"] == 0
+        assert pool.size(pool_key) == 1
+
+    def test_only_popular_keys_refilled(self, pool_key):
+        """Test that keys outside the most requested set are not refilled"""
+        other_key = pool_key._replace(interest="Drake")
+        producer = MagicMock(return_value={"story": {}})
+        pool = StoryPool(producer, depth=1, max_keys=1)
+        pool.pop(pool_key)
+        pool.pop(pool_key)
+        pool.pop(other_key)
+        pool.request_refill(other_key)
+        pool.wait_idle()
+
+        producer.assert_not_called()
+
+    def test_expired_entries_dropped(self, pool_key):
+        """Test freshness limit"""
+        pool = StoryPool(MagicMock(), depth=2, max_age_seconds=60)
+        with patch('StoryPool.time.monotonic', return_value=1000.0):
+            pool.put(pool_key, {"story": {}})
+        with patch('StoryPool.time.monotonic', return_value=1061.0):
+            assert pool.pop(pool_key) is None
+        assert pool.stats()["expired"] == 1
@@ -0,0 +1,179 @@
+"""
+Unit tests for StoryQuery module
+"""
+import json
+import base64
+import pytest
+from CacheBackend import MemoryCache, SQLiteCache
+from StoryQuery import (
+    QueryError, build_story_meta, decode_cursor, encode_cursor, matches, paginate, parse_fields, parse_time_range,
+    project
+)
+
+
+@pytest.fixture
+def metas():
+    cache = MemoryCache()
+    for i in range(5):
+        cache[f"story-{i}"] = {
+            "title": f"Story {i}",
+            "category": "Music Artists" if i % 2 else "Comics & Anime",
+            "difficulty": "beginner",
+            "created_at": f"2025-01-0{i + 1}T00:00:00+00:00"
+        }
+    return cache
+
+
+class CountingCache(SQLiteCache):
+    """SQLite cache that records the range reads pagination makes"""
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.reads = []
+
+    def keys_after(self, position, limit):
+        self.reads.append(position)
+        return super().keys_after(position, limit)
+
+    def __iter__(self):
+        raise AssertionError("pagination must not scan every key")
+
+
+class TestProjection:
+    """Unit tests for fields= projection"""
+
+    def test_no_fields_returns_payload(self):
+        """Test that no field list keeps the full payload"""
+        payload = {"a": 1}
+        assert project(payload, parse_fields(None)) is payload
+
+    def test_nested_paths(self):
+        """Test dotted paths keep only the requested branches"""
+        payload = {"success": True, "story": {"plot": {"title": "T", "setup": "S"}, "dialogue": []}, "quiz": {}}
+        result = project(payload, parse_fields("story.plot.title,quiz"), always=("success",))
+        assert result == {"success": True, "story": {"plot": {"title": "T"}}, "quiz": {}}
+
+    def test_missing_paths_are_skipped(self):
+        """Test unknown paths do not fail"""
+        assert project({"a": {"b": 1}}, ["a.c", "x.y", "a.b.c"]) == {}
+
+    def test_empty_fields_rejected(self):
+        """Test a field list with no names is rejected"""
+        with pytest.raises(QueryError):
+            parse_fields(" , ")
+
+
+class TestPagination:
+    """Unit tests for cursor pagination"""
+
+    def test_cursor_round_trip(self):
+        """Test cursors decode to the id and position they were built from"""
+        assert decode_cursor(encode_cursor("story-3", 4)) == ("story-3", 4)
+
+    def test_invalid_cursor(self):
+        """Test garbage cursors are rejected"""
+        with pytest.raises(QueryError):
+            decode_cursor("not-a-cursor!")
+        with pytest.raises(QueryError):
+            decode_cursor(encode_cursor("story-3", -1))
+
+    def test_pages_cover_everything_once(self, metas):
+        """Test walking all pages returns each story exactly once"""
+        seen, cursor = [], None
+        while True:
+            page, cursor = paginate(metas, metas.get, limit=2, cursor=cursor)
+            seen.extend(story_id for story_id, _ in page)
+            if cursor is None:
+                break
+        assert seen == list(metas)
+
+    def test_pages_are_range_reads(self, tmp_path):
+        """Test each page starts reading at the cursor position instead of walking from the start"""
+        store = CountingCache(str(tmp_path / "cache.sqlite3"), "story_meta")
+        for i in range(10):
+            store[f"story-{i}"] = {"title": f"Story {i}"}
+        first, cursor = paginate(store, store.get, limit=3)
+        second, cursor = paginate(store, store.get, limit=3, cursor=cursor)
+        assert [story_id for story_id, _ in second] == ["story-3", "story-4", "story-5"]
+        assert store.reads == [0, 3]
+
+    def test_deleted_cursor_story(self, metas):
+        """Test a page continues after its cursor even when that story was deleted"""
+        page, cursor = paginate(metas, metas.get, limit=2)
+        del metas["story-1"]
+        page, _ = paginate(metas, metas.get, limit=2, cursor=cursor)
+        assert [story_id for story_id, _ in page] == ["story-2", "story-3"]
+
+    def test_filters(self, metas):
+        """Test filtering by category and date range"""
+        page, cursor = paginate(metas, metas.get, category="Music Artists")
+        assert [story_id for story_id, _ in page] == ["story-1", "story-3"]
+        assert cursor is None
+
+        page, _ = paginate(metas, metas.get, since="2025-01-02", until="2025-01-04")
+        assert [story_id for story_id, _ in page] == ["story-1", "story-2", "story-3"]
+
+    def test_invalid_dates_rejected(self, metas):
+        """Test since/until that are not ISO dates fail instead of comparing as strings"""
+        for bad in ("yesterday", "2025-13-01", "01/02/2025"):
+            with pytest.raises(QueryError):
+                paginate(metas, metas.get, since=bad)
+
+    def test_unknown_cursor_id(self, metas):
+        """Test a cursor without a position is looked up by id, and rejected for an unknown story"""
+        legacy = base64.urlsafe_b64encode(json.dumps({"after": "missing"}).encode()).decode()
+        with pytest.raises(QueryError):
+            paginate(metas, metas.get, cursor=legacy)
+        legacy = base64.urlsafe_b64encode(json.dumps({"after": "story-2"}).encode()).decode()
+        page, _ = paginate(metas, metas.get, cursor=legacy)
+        assert [story_id for story_id, _ in page] == ["story-3", "story-4"]
+
+    def test_limit_bounds(self, metas):
+        """Test limits outside the allowed range are rejected"""
+        with pytest.raises(QueryError):
+            paginate(metas, metas.get, limit=0)
+
+
+class TestStoryMeta:
+    """Unit tests for listing metadata"""
+
+    def test_build_story_meta(self, sample_story_data):
+        """Test metadata is taken from the story and game state"""
+        meta = build_story_meta(sample_story_data, {"category": "Music Artists"}, {"topic": "Saving"}, "Advanced")
+        assert meta["title"] == sample_story_data["plot"]["title"]
+        assert meta["difficulty"] == "advanced"
+        assert matches(meta, category="Music Artists", difficulty="ADVANCED")
+        assert not matches(meta, category="Comics & Anime")
+
+
+def in_range(meta, since=None, until=None):
+    since_at, until_at = parse_time_range(since, until)
+    return matches(meta, since=since_at, until=until_at)
+
+
+class TestTimeRange:
+    """Unit tests for since/until parsing and matching"""
+
+    def test_date_only_until_covers_the_day(self):
+        """Test a date-only until includes stories created later that day"""
+        meta = {"created_at": "2025-01-04T23:30:00+00:00"}
+        assert in_range(meta, until="2025-01-04")
+        assert not in_range(meta, since="2025-01-05")
+
+    def test_datetimes_compare_across_offsets(self):
+        """Test bounds and timestamps are compared as instants, not strings"""
+        meta = {"created_at": "2025-01-04T10:00:00+00:00"}
+        assert in_range(meta, since="2025-01-04T11:00:00+02:00")
+        assert not in_range(meta, until="2025-01-04T09:59:59Z")
+        # "+" in an unencoded query string arrives as a space
+        assert in_range(meta, until="2025-01-04T10:00:00 00:00")
+
+    def test_naive_values_are_utc(self):
+        """Test bounds and timestamps without an offset are read as UTC"""
+        since, until = parse_time_range("2025-01-04T10:00:00", "2025-01-04T10:00:00")
+        assert matches({"created_at": "2025-01-04T10:00:00"}, since=since, until=until)
+
+    def test_missing_created_at_fails_date_filters(self):
+        """Test stories without a timestamp only pass when no date filter is set"""
+        assert matches({"title": "Old"})
+        assert not in_range({"title": "Old"}, since="2025-01-01")
@@ -4,7 +4,8 @@ Unit tests for Summarizer module
 import pytest
 import json
 from unittest.mock import Mock, MagicMock, patch
-from Summarizer import Summarize, Summarizer
+from Summarizer import Summarize, Summarizer, estimate_tokens
+from SummaryCache import SummaryCache
 
 
 class TestSummarize:
@@ -111,6 +112,19 @@ class TestSummarize:
             assert "topic" in result
             assert "learning_summary" in result
     
+    def test_client_error_code_read_from_code(self, summarizer, sample_story_data):
+        """Test a real ClientError (code, no status_code) is recognised as a rate limit"""
+        from google.genai.errors import ClientError
+        
+        summarizer.cache = None
+        summarizer.client.models.generate_content.side_effect = ClientError(
+            429, {"error": {"message": "Rate limit exceeded"}}
+        )
+        with patch('Summarizer.logger') as logger:
+            with pytest.raises(ValueError, match="API request failed"):
+                summarizer.generate_summary(sample_story_data)
+        logger.warning.assert_any_call("Rate limit exceeded, returning fallback summary")
+    
     def test_generate_summary_invalid_data(self, summarizer):
         """Test summary generation with invalid data"""
         invalid_data = {}
@@ -129,6 +143,80 @@ class TestSummarize:
             result = summarizer.generate_summary(sample_story_data, None)
             assert result["topic"] == "The Savings Challenge"
 
+    def test_estimate_tokens(self):
+        """Test the token estimator"""
+        assert estimate_tokens("") == 0
+        assert estimate_tokens("abc") == 1
+        assert estimate_tokens("a" * 400) == 100
+    
+    def test_chunk_dialogue(self, summarizer):
+        """Test dialogue is split into token-bounded windows"""
+        lines = ["x" * 40] * 10  # 10 tokens each
+        chunks = summarizer._chunk_dialogue(lines, 30)
+        assert [len(c) for c in chunks] == [3, 3, 3, 1]
+        assert sum(chunks, []) == lines
+    
+    def test_generate_summary_short_story_single_shot(self, summarizer, sample_story_data, sample_summary_data):
+        """Test short stories use a single model call"""
+        mock_response = MagicMock()
+        mock_response.text = json.dumps(sample_summary_data)
+        summarizer.client.models.generate_content.return_value = mock_response
+        summarizer.client.models.generate_content.reset_mock()
+        
+        summarizer.generate_summary(sample_story_data)
+        assert summarizer.client.models.generate_content.call_count == 1
+    
+    def test_generate_summary_long_story_chunked(self, summarizer, sample_story_data, sample_summary_data):
+        """Test long stories are summarized per chunk and then reduced"""
+        summarizer.chunk_token_limit = 50
+        sample_story_data["dialogue"] = [
+            {"character": "Spider-Man", "text": f"Line {i}: " + "saving money " * 10}
+            for i in range(12)
+        ]
+        
+        def fake_generate(model, contents):
+            response = MagicMock()
+            if "Do not return JSON" in contents:
+                response.text = "Saved part of the allowance."
+            else:
+                response.text = json.dumps(sample_summary_data)
+            return response
+        
+        summarizer.client.models.generate_content.side_effect = fake_generate
+        result = summarizer.generate_summary(sample_story_data)
+        
+        prompts = [c.kwargs["contents"] for c in summarizer.client.models.generate_content.call_args_list]
+        chunk_prompts = [p for p in prompts if "Do not return JSON" in p]
+        assert len(chunk_prompts) > 1
+        assert "Line 0" not in prompts[-1]
+        assert "Saved part of the allowance." in prompts[-1]
+        assert result["topic"] == "The Savings Challenge"
+    
+    def test_generate_summary_cached(self, summarizer, tmp_path, sample_story_data, sample_summary_data):
+        """Test a repeat request for the same story and interest skips the model"""
+        summarizer.cache = SummaryCache(str(tmp_path))
+        summarizer.client.models.generate_content.return_value.text = json.dumps(sample_summary_data)
+        interest = {"category": "Comics & Anime", "interest": "Spider-Man"}
+        
+        first = summarizer.generate_summary(sample_story_data, interest)
+        second = summarizer.generate_summary(sample_story_data, dict(interest))
+        assert first == second == sample_summary_data
+        assert summarizer.client.models.generate_content.call_count == 1
+        
+        summarizer.generate_summary(sample_story_data, {"category": "Music Artists", "interest": "Drake"})
+        assert summarizer.client.models.generate_content.call_count == 2
+        assert summarizer.cache.stats()["memory_hits"] == 1
+    
+    def test_generate_summary_fallback_not_cached(self, summarizer, tmp_path, sample_story_data):
+        """Test fallback summaries are not stored, so the next request retries the model"""
+        summarizer.cache = SummaryCache(str(tmp_path))
+        summarizer.client.models.generate_content.side_effect = RuntimeError("boom")
+        
+        summarizer.generate_summary(sample_story_data)
+        summarizer.generate_summary(sample_story_data)
+        assert summarizer.client.models.generate_content.call_count == 2
+        assert summarizer.cache.stats()["writes"] == 0
+
 
 class TestSummarizerModel:
     """Unit tests for Summarizer Pydantic model"""
@@ -0,0 +1,125 @@
+"""
+Unit tests for SummaryCache module
+"""
+import copy
+import json
+import os
+import pytest
+from SummaryCache import SummaryCache, summary_key, story_hash
+
+
+SPIDER_MAN = {"category": "Comics & Anime", "interest": "Spider-Man"}
+
+
+class TestSummaryKey:
+    """Unit tests for summary key hashing"""
+
+    def test_key_is_stable(self, sample_story_data):
+        """Test the same story and interest always hash to the same key"""
+        assert summary_key(sample_story_data, SPIDER_MAN) == summary_key(copy.deepcopy(sample_story_data), dict(SPIDER_MAN))
+
+    def test_key_ignores_formatting_and_unrelated_fields(self, sample_story_data):
+        """Test whitespace and fields the prompt never reads do not change the key"""
+        variant = copy.deepcopy(sample_story_data)
+        variant["plot"]["title"] = "  The   Savings Challenge "
+        variant["hooks"]["music"] = "Lo-fi"
+        variant["visuals"]["characters"] = []
+        assert summary_key(variant, SPIDER_MAN) == summary_key(sample_story_data, SPIDER_MAN)
+
+    def test_key_changes_with_content(self, sample_story_data):
+        """Test editing dialogue produces a different key"""
+        variant = copy.deepcopy(sample_story_data)
+        variant["dialogue"][0]["text"] = "I need to save $2000"
+        assert story_hash(variant) != story_hash(sample_story_data)
+
+    def test_key_changes_with_interest(self, sample_story_data):
+        """Test each interest context gets its own key for the same story"""
+        other = {"category": "Music Artists", "interest": "Drake"}
+        assert summary_key(sample_story_data, SPIDER_MAN) != summary_key(sample_story_data, other)
+        assert summary_key(sample_story_data, SPIDER_MAN).startswith(story_hash(sample_story_data) + "-")
+
+    def test_incomplete_interest_matches_none(self, sample_story_data):
+        """Test an interest without a category adds no context, like the prompt"""
+        assert summary_key(sample_story_data, {"interest": "Drake"}) == summary_key(sample_story_data, None)
+
+
+class TestSummaryCache:
+    """Unit tests for the two-tier summary store"""
+
+    @pytest.fixture
+    def cache(self, tmp_path):
+        return SummaryCache(str(tmp_path / "summaries"), max_entries=2)
+
+    def test_miss_then_memory_hit(self, cache, sample_summary_data):
+        """Test a stored summary is served from memory"""
+        assert cache.get("a-1") is None
+        cache.put("a-1", sample_summary_data)
+        assert cache.get("a-1") == sample_summary_data
+        stats = cache.stats()
+        assert stats["misses"] == 1
+        assert stats["memory_hits"] == 1
+        assert stats["hit_rate"] == 0.5
+
+    def test_disk_tier_survives_restart(self, cache, sample_summary_data):
+        """Test a new cache over the same directory serves summaries from disk"""
+        cache.put("a-1", sample_summary_data)
+        assert os.path.exists(os.path.join(cache.root, "a-1.json"))
+
+        restarted = SummaryCache(cache.root)
+        assert restarted.get("a-1") == sample_summary_data
+        assert restarted.get("a-1") == sample_summary_data
+        stats = restarted.stats()
+        assert stats["disk_hits"] == 1
+        assert stats["memory_hits"] == 1
+
+    def test_memory_tier_evicts_lru(self, cache, sample_summary_data):
+        """Test the memory tier is bounded and evicted entries still load from disk"""
+        for key in ("a-1", "b-1", "c-1"):
+            cache.put(key, {**sample_summary_data, "topic": key})
+        stats = cache.stats()
+        assert stats["memory_entries"] == 2
+        assert stats["evictions"] == 1
+        assert cache.get("a-1")["topic"] == "a-1"
+        assert cache.stats()["disk_hits"] == 1
+
+    def test_corrupt_file_is_a_miss(self, cache):
+        """Test an unreadable summary file is ignored"""
+        with open(os.path.join(cache.root, "a-1.json"), "w") as f:
+            f.write("{not json")
+        assert cache.get("a-1") is None
+        assert cache.stats()["misses"] == 1
+
+    def test_invalidate(self, cache, sample_summary_data):
+        """Test invalidation removes a summary from both tiers"""
+        cache.put("a-1", sample_summary_data)
+        assert cache.invalidate("a-1") is True
+        assert cache.invalidate("a-1") is False
+        assert cache.get("a-1") is None
+        assert not os.path.exists(os.path.join(cache.root, "a-1.json"))
+        assert cache.stats()["invalidations"] == 1
+
+    def test_invalidate_story_drops_all_interests(self, cache, sample_story_data, sample_summary_data):
+        """Test invalidating a story removes every interest variant, including ones only on disk"""
+        keys = [summary_key(sample_story_data, interest)
+                for interest in (None, SPIDER_MAN, {"category": "Music Artists", "interest": "Drake"})]
+        for key in keys:
+            cache.put(key, sample_summary_data)
+        cache.put("other-1", sample_summary_data)
+
+        assert cache.invalidate_story(sample_story_data) == 3
+        assert all(cache.get(key) is None for key in keys)
+        assert cache.get("other-1") == sample_summary_data
+
+    def test_clear(self, cache, sample_summary_data):
+        """Test clear empties both tiers"""
+        cache.put("a-1", sample_summary_data)
+        cache.put("b-1", sample_summary_data)
+        assert cache.clear() == 2
+        assert cache.get("a-1") is None
+        assert [name for name in os.listdir(cache.root) if name.endswith(".json")] == []
+
+    def test_file_format(self, cache, sample_summary_data):
+        """Test summaries are stored as {"key", "summary"} JSON"""
+        cache.put("a-1", sample_summary_data)
+        with open(os.path.join(cache.root, "a-1.json")) as f:
+            assert json.load(f) == {"key": "a-1", "summary": sample_summary_data}
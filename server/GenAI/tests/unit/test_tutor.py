@@ -0,0 +1,168 @@
+"""
+Unit tests for tutor module
+"""
+import asyncio
+import pytest
+from unittest.mock import MagicMock, AsyncMock, patch
+from tutor import FinancialTutor, ChatHistory, Message, ConversationMemory
+
+
+def make_stream(texts):
+    """Build an async iterator of fake response chunks"""
+    async def stream():
+        for text in texts:
+            chunk = MagicMock()
+            chunk.text = text
+            yield chunk
+    return stream()
+
+
+@pytest.fixture
+def tutor():
+    with patch('tutor.genai.Client'):
+        return FinancialTutor()
+
+
+class TestConversationMemory:
+    """Unit tests for ConversationMemory class"""
+
+    def test_recent_window(self):
+        """Test older turns move to pending"""
+        memory = ConversationMemory(recent_turns=2)
+        for i in range(5):
+            memory.add(Message(role="user", content=f"turn {i}"))
+        assert [m.content for m in memory.recent] == ["turn 3", "turn 4"]
+        assert len(memory.pending) == 3
+
+    def test_context_stays_within_budget(self):
+        """Test prompt context size stays flat as the conversation grows"""
+        memory = ConversationMemory(token_budget=100)
+        sizes = []
+        for i in range(50):
+            memory.add(Message(role="user", content=f"turn {i} " + "money " * 30))
+            sizes.append(len(memory.context()))
+        assert max(sizes) <= 100 * 4
+        assert "turn 49" in memory.context()
+
+    def test_compact_folds_pending_into_summary(self):
+        """Test pending turns are folded into the rolling summary"""
+        memory = ConversationMemory(recent_turns=1)
+        for i in range(3):
+            memory.add(Message(role="user", content=f"turn {i}"))
+        summarize = AsyncMock(return_value="Student asked about budgets.")
+
+        asyncio.run(memory.compact(summarize))
+        assert memory.summary == "Student asked about budgets."
+        assert not memory.pending
+        summarize.assert_awaited_once()
+        assert memory.context().startswith("Summary of earlier conversation")
+
+    def test_compact_keeps_turns_added_while_summarizing(self):
+        """Test turns that arrive during a summary update are summarized next, never dropped"""
+        memory = ConversationMemory(recent_turns=1, compact_batch=3)
+        for i in range(30):
+            memory.add(Message(role="user", content=f"turn {i}"))
+        assert len(memory.pending) == 29
+        summarized = []
+
+        async def summarize(summary, turns):
+            summarized.extend(turn.content for turn in turns)
+            if len(summarized) == 3:
+                memory.add(Message(role="user", content="turn 30"))
+            await asyncio.sleep(0)
+            return f"{len(summarized)} turns"
+
+        asyncio.run(memory.compact(summarize))
+        assert summarized == [f"turn {i}" for i in range(30)]
+        assert not memory.pending
+        assert [m.content for m in memory.recent] == ["turn 30"]
+
+    def test_compact_failure_keeps_pending(self):
+        """Test failed summary updates keep turns for the next attempt"""
+        memory = ConversationMemory(recent_turns=1)
+        memory.add(Message(role="user", content="turn 0"))
+        memory.add(Message(role="user", content="turn 1"))
+
+        asyncio.run(memory.compact(AsyncMock(side_effect=Exception("API Error"))))
+        assert len(memory.pending) == 1
+        assert memory.summary == ""
+
+
+class TestFinancialTutor:
+    """Unit tests for FinancialTutor class"""
+
+    def test_build_prompt_includes_context(self, tutor):
+        """Test prompt includes conversation context and the question"""
+        history = ChatHistory(messages=[Message(role="user", content=f"msg {i}") for i in range(8)])
+        prompt = tutor.build_prompt("What is a budget?", tutor._conversation_context(history, None))
+        assert "msg 7" in prompt
+        assert "What is a budget?" in prompt
+
+    def test_session_memory_records_turns(self, tutor):
+        """Test answers are remembered per session and compacted in the background"""
+        response = MagicMock()
+        response.text = "A budget is a plan."
+        tutor.client.aio.models.generate_content = AsyncMock(return_value=response)
+
+        async def conversation():
+            for i in range(4):
+                await tutor.get_response(f"question {i}", ChatHistory(), session_id="s1")
+            await asyncio.gather(*tutor._background_tasks)
+
+        asyncio.run(conversation())
+        memory = tutor.sessions["s1"]
+        assert len(memory.recent) == 4
+        assert not memory.pending
+        assert memory.summary == "A budget is a plan."
+        assert "question 3" in memory.context()
+
+    def test_get_response_is_async(self, tutor):
+        """Test get_response awaits the async client"""
+        response = MagicMock()
+        response.text = "A budget is a plan."
+        tutor.client.aio.models.generate_content = AsyncMock(return_value=response)
+
+        result = asyncio.run(tutor.get_response("What is a budget?", ChatHistory()))
+        assert result == "A budget is a plan."
+        tutor.client.aio.models.generate_content.assert_awaited_once()
+
+    def test_stream_response_yields_tokens(self, tutor):
+        """Test streaming yields text chunks and records time to first token"""
+        tutor.client.aio.models.generate_content_stream = AsyncMock(
+            return_value=make_stream(["A budget ", "", "is a plan."])
+        )
+
+        async def collect():
+            return [t async for t in tutor.stream_response("What is a budget?", ChatHistory())]
+
+        assert asyncio.run(collect()) == ["A budget ", "is a plan."]
+        stats = tutor.ttft_stats()
+        assert stats["count"] == 1
+        assert stats["p50_ms"] is not None
+
+    def test_repeated_question_served_from_cache(self, tutor):
+        """Test near-duplicate context-free questions skip the model"""
+        response = MagicMock()
+        response.text = "A budget is a plan."
+        tutor.client.aio.models.generate_content = AsyncMock(return_value=response)
+
+        first = asyncio.run(tutor.get_response("What is a budget?", ChatHistory()))
+        second = asyncio.run(tutor.get_response("what is a budget", ChatHistory()))
+        assert first == second == "A budget is a plan."
+        assert tutor.client.aio.models.generate_content.await_count == 1
+        assert tutor.answer_cache.stats()["hits"] == 1
+
+    def test_cache_skipped_with_prior_context(self, tutor):
+        """Test questions with substantial prior context always reach the model"""
+        response = MagicMock()
+        response.text = "It depends on your goal."
+        tutor.client.aio.models.generate_content = AsyncMock(return_value=response)
+        history = ChatHistory(messages=[Message(role="user", content="I want to buy a bike " * 20)])
+
+        asyncio.run(tutor.get_response("How much should I save?", history))
+        asyncio.run(tutor.get_response("How much should I save?", history))
+        assert tutor.client.aio.models.generate_content.await_count == 2
+
+    def test_ttft_stats_empty(self, tutor):
+        """Test stats before any streamed response"""
+        assert tutor.ttft_stats()["count"] == 0
@@ -0,0 +1,157 @@
+"""
+Unit tests for WorkScheduler module
+"""
+import time
+import threading
+import pytest
+from WorkScheduler import (
+    FOLLOWUP, IMAGES, INTERACTIVE, PREGENERATION, Preempted, WorkScheduler, work_class_var, work_context, work_user_var
+)
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not reached"
+        time.sleep(0.001)
+
+
+class Calls:
+    """Runs model-call stand-ins on threads and records the order they get a slot"""
+
+    def __init__(self, scheduler):
+        self.scheduler = scheduler
+        self.order = []
+        self.errors = {}
+        self.threads = []
+
+    def start(self, name, work_class, user="user", hold=None):
+        def run():
+            try:
+                with self.scheduler.slot(work_class, user):
+                    self.order.append(name)
+                    if hold is not None:
+                        hold.wait(2)
+            except Preempted as e:
+                self.errors[name] = e
+
+        thread = threading.Thread(target=run)
+        self.threads.append(thread)
+        thread.start()
+        return thread
+
+    def queued(self):
+        return sum(c["queued"] for c in self.scheduler.stats()["classes"].values())
+
+    def start_queued(self, name, work_class, user="user"):
+        """Start a call and wait until it is parked in the queue"""
+        expected = self.queued() + 1
+        self.start(name, work_class, user)
+        wait_for(lambda: self.queued() == expected)
+
+    def join(self):
+        for thread in self.threads:
+            thread.join(2)
+
+
+@pytest.fixture
+def busy():
+    """A one-slot scheduler whose slot is held until the test releases it"""
+    scheduler = WorkScheduler(slots=1)
+    calls = Calls(scheduler)
+    release = threading.Event()
+    calls.start("holder", INTERACTIVE, hold=release)
+    wait_for(lambda: calls.order == ["holder"])
+    yield scheduler, calls, release
+    release.set()
+    calls.join()
+
+
+class TestWorkScheduler:
+    """Unit tests for WorkScheduler"""
+
+    def test_free_slot_granted_immediately(self):
+        """Test a call runs at once while slots are free and releases its slot"""
+        scheduler = WorkScheduler(slots=2)
+        with scheduler.slot(IMAGES, "a"):
+            assert scheduler.stats()["classes"]["images"]["running"] == 1
+        stats = scheduler.stats()["classes"]["images"]
+        assert stats["running"] == 0
+        assert stats["granted"] == 1
+
+    def test_queued_calls_granted_by_priority(self, busy):
+        """Test queued interactive text runs before quiz/summary, which runs before images"""
+        scheduler, calls, release = busy
+        calls.start_queued("image", IMAGES)
+        calls.start_queued("summary", FOLLOWUP)
+        calls.start_queued("story", INTERACTIVE)
+        release.set()
+        calls.join()
+        assert calls.order == ["holder", "story", "summary", "image"]
+
+    def test_users_share_a_class_round_robin(self, busy):
+        """Test one user's burst does not hold back another user's call"""
+        scheduler, calls, release = busy
+        for name in ("a1", "a2", "a3"):
+            calls.start_queued(name, IMAGES, user="a")
+        calls.start_queued("b1", IMAGES, user="b")
+        release.set()
+        calls.join()
+        assert calls.order == ["holder", "a1", "b1", "a2", "a3"]
+
+    def test_images_capped_below_slot_count(self):
+        """Test images can't take every slot, so text finds capacity during an image burst"""
+        scheduler = WorkScheduler(slots=2, image_share=0.5)
+        calls = Calls(scheduler)
+        release = threading.Event()
+        calls.start("image1", IMAGES, hold=release)
+        wait_for(lambda: calls.order == ["image1"])
+        calls.start_queued("image2", IMAGES)
+
+        with scheduler.slot(INTERACTIVE, "reader"):
+            assert scheduler.stats()["classes"]["interactive"]["running"] == 1
+        release.set()
+        calls.join()
+        assert calls.order == ["image1", "image2"]
+
+    def test_interactive_preempts_queued_pregeneration(self, busy):
+        """Test waiting interactive work drops queued pre-generation calls"""
+        scheduler, calls, release = busy
+        calls.start_queued("pool", PREGENERATION, user="story-pool")
+        calls.start("story", INTERACTIVE)
+        wait_for(lambda: "pool" in calls.errors)
+        release.set()
+        calls.join()
+        assert calls.order == ["holder", "story"]
+        assert scheduler.stats()["classes"]["pregeneration"]["preempted"] == 1
+
+    def test_queued_images_are_not_preempted(self, busy):
+        """Test images a story is waiting for are deferred, never dropped"""
+        scheduler, calls, release = busy
+        calls.start_queued("image", IMAGES)
+        calls.start_queued("story", INTERACTIVE)
+        release.set()
+        calls.join()
+        assert calls.order == ["holder", "story", "image"]
+        assert not calls.errors
+
+
+class TestWorkContext:
+    """Unit tests for work_context"""
+
+    def test_sets_and_restores_class_and_user(self):
+        """Test the context applies inside the block only"""
+        with work_context(FOLLOWUP, "reader"):
+            assert work_class_var.get() == FOLLOWUP
+            assert work_user_var.get() == "reader"
+            with work_context(IMAGES):
+                assert work_user_var.get() == "reader"
+        assert work_class_var.get() == INTERACTIVE
+        assert work_user_var.get() == "anonymous"
+
+    def test_slot_defaults_to_context(self):
+        """Test calls without an explicit class are scheduled under the caller's context"""
+        scheduler = WorkScheduler(slots=1)
+        with work_context(PREGENERATION, "story-pool"):
+            with scheduler.slot():
+                assert scheduler.stats()["classes"]["pregeneration"]["running"] == 1
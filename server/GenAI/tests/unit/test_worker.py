@@ -0,0 +1,72 @@
+"""
+Unit tests for the long-lived Python worker
+"""
+import io
+import json
+import pytest
+from unittest.mock import MagicMock
+from worker import Worker, serve
+
+
+@pytest.fixture
+def worker(sample_quiz_data, sample_summary_data):
+    """Worker with mocked generators"""
+    w = Worker()
+    quiz = MagicMock()
+    quiz.model_dump.return_value = sample_quiz_data
+    w._quiz_generator = MagicMock()
+    w._quiz_generator.generate_quiz.return_value = quiz
+    w._summarizer = MagicMock()
+    w._summarizer.generate_summary.return_value = sample_summary_data
+    return w
+
+
+class TestWorker:
+    """Unit tests for Worker request handling"""
+
+    def test_ping(self, worker):
+        """Test ping reports the worker process"""
+        response = worker.handle({"id": 1, "method": "ping"})
+        assert response["id"] == 1
+        assert response["result"]["status"] == "success"
+
+    def test_generate_quiz(self, worker, sample_story_data):
+        """Test quiz requests reuse the worker's generator"""
+        response = worker.handle({
+            "id": 2,
+            "method": "generate_quiz",
+            "params": {"story_data": sample_story_data, "difficulty": "advanced"}
+        })
+        assert response["result"]["topic"] == "Budgeting"
+        worker._quiz_generator.generate_quiz.assert_called_once_with(sample_story_data, "advanced")
+
+    def test_unknown_method(self, worker):
+        """Test unknown methods return an error instead of raising"""
+        response = worker.handle({"id": 3, "method": "nope"})
+        assert response["error"]["type"] == "MethodNotFound"
+
+    def test_method_error(self, worker):
+        """Test generator exceptions are reported as errors"""
+        worker._summarizer.generate_summary.side_effect = ValueError("API request failed")
+        response = worker.handle({"id": 4, "method": "generate_summary", "params": {}})
+        assert response["error"] == {"message": "API request failed", "type": "ValueError"}
+
+
+class TestServe:
+    """Unit tests for the newline-delimited JSON-RPC loop"""
+
+    def test_serve_handles_each_line(self, worker):
+        """Test every request line gets exactly one response line"""
+        stdin = io.StringIO(
+            json.dumps({"id": 1, "method": "ping"}) + "\n"
+            "\n"
+            "not json\n"
+            + json.dumps({"id": 2, "method": "generate_summary", "params": {"story_data": {}}}) + "\n"
+        )
+        stdout = io.StringIO()
+        serve(worker, stdin=stdin, stdout=stdout, max_workers=2)
+
+        responses = {r["id"]: r for r in map(json.loads, stdout.getvalue().splitlines())}
+        assert set(responses) == {1, 2, None}
+        assert responses[None]["error"]["type"] == "ParseError"
+        assert responses[2]["result"]["topic"] == "The Savings Challenge"
@@ -1,31 +1,180 @@
 from pydantic import BaseModel
-from typing import List, Optional
-from google import genai
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional
+from collections import deque, OrderedDict
 import os
+import time
+import asyncio
+import itertools
+import logging
 from dotenv import load_dotenv
+from Summarizer import estimate_tokens, CHARS_PER_TOKEN
+from AnswerCache import AnswerCache
+from startup import lazy_import
+
+logger = logging.getLogger(__name__)
+
+genai = lazy_import("google.genai")
+types = lazy_import("google.genai.types")
 
 load_dotenv()
 API_KEY = os.getenv("GEMINI_API")
 
+# Token budget for the conversation context included in each tutor prompt
+MEMORY_TOKEN_BUDGET = int(os.getenv("TUTOR_MEMORY_TOKENS", "1000"))
+MAX_SESSIONS = int(os.getenv("TUTOR_MAX_SESSIONS", "1000"))
+# Questions asked with more prior context than this are never answered from the cache
+CACHE_MAX_CONTEXT_TOKENS = int(os.getenv("TUTOR_CACHE_MAX_CONTEXT_TOKENS", "50"))
+
 class Message(BaseModel):
     role: str
     content: str
-    timestamp: Optional[str]
+    timestamp: Optional[str] = None
 
 class ChatHistory(BaseModel):
     messages: List[Message] = []
 
+def _clip_to_tokens(text: str, max_tokens: int) -> str:
+    """Trim text to roughly max_tokens, keeping the end (most recent content)"""
+    max_chars = max(0, max_tokens) * CHARS_PER_TOKEN
+    return text if len(text) <= max_chars else text[-max_chars:]
+
+class ConversationMemory:
+    """
+    Per-session tutor memory: a rolling summary of older turns plus the most
+    recent turns, rendered within a fixed token budget.
+
+    Turns that fall out of the recent window wait in ``pending`` until
+    ``compact`` folds them into the summary. ``pending`` is unbounded so no
+    turn is dropped before it has been summarized; ``context`` only renders
+    what fits the budget.
+    """
+
+    def __init__(self, token_budget: int = MEMORY_TOKEN_BUDGET, recent_turns: int = 4,
+                 compact_batch: int = 20):
+        self.token_budget = token_budget
+        self.summary_budget = token_budget // 3
+        self.recent_turns = recent_turns
+        self.compact_batch = compact_batch
+        self.summary = ""
+        self.recent: deque = deque()
+        self.pending: deque = deque()
+        self._compacting = asyncio.Lock()
+
+    def add(self, message: Message) -> None:
+        self.recent.append(message)
+        while len(self.recent) > self.recent_turns:
+            self.pending.append(self.recent.popleft())
+
+    def context(self) -> str:
+        """Render summary and newest turns, never exceeding the token budget"""
+        summary = _clip_to_tokens(self.summary, self.summary_budget)
+        remaining = self.token_budget - estimate_tokens(summary)
+
+        lines: List[str] = []
+        for msg in reversed(list(self.pending) + list(self.recent)):
+            line = f"{msg.role}: {msg.content}"
+            tokens = estimate_tokens(line)
+            if tokens > remaining:
+                if not lines:
+                    lines.append(_clip_to_tokens(line, remaining))
+                break
+            lines.append(line)
+            remaining -= tokens
+        lines.reverse()
+
+        if summary:
+            lines.insert(0, f"Summary of earlier conversation: {summary}")
+        return "\n".join(lines)
+
+    async def compact(self, summarize: Callable[[str, List[Message]], Awaitable[str]]) -> None:
+        """Fold pending turns into the rolling summary, oldest first, at most ``compact_batch`` per call"""
+        async with self._compacting:
+            while self.pending:
+                batch = list(itertools.islice(self.pending, self.compact_batch))
+                try:
+                    updated = await summarize(self.summary, batch)
+                except Exception as e:
+                    logger.warning(f"Conversation summary update failed: {e}")
+                    return
+                self.summary = _clip_to_tokens(updated.strip(), self.summary_budget)
+                # Turns added while awaiting were appended behind the batch, and only
+                # compact (holding the lock) removes turns, so the batch is still at the front
+                for _ in batch:
+                    self.pending.popleft()
+
 class FinancialTutor:
     def __init__(self):
         self.client = genai.Client(api_key=API_KEY)
         self.model = "gemini-2.0-flash-lite"
+        self.generation_config = types.GenerateContentConfig(
+            temperature=0.7,
+            top_p=0.8,
+            top_k=40
+        )
+        # Recent time-to-first-token samples in milliseconds
+        self.ttft_samples = deque(maxlen=200)
+        self.sessions: "OrderedDict[str, ConversationMemory]" = OrderedDict()
+        self._background_tasks = set()
+        self.answer_cache = AnswerCache()
+
+    def get_memory(self, session_id: str, chat_history: Optional[ChatHistory] = None) -> ConversationMemory:
+        """Return the session's memory, seeding a new one from client-side history"""
+        memory = self.sessions.get(session_id)
+        if memory is None:
+            memory = ConversationMemory()
+            for msg in (chat_history.messages if chat_history else []):
+                memory.add(msg)
+            self.sessions[session_id] = memory
+            while len(self.sessions) > MAX_SESSIONS:
+                self.sessions.popitem(last=False)
+        else:
+            self.sessions.move_to_end(session_id)
+        return memory
 
-    async def get_response(self, query: str, chat_history: ChatHistory) -> str:
-        chat_context = "\n".join([f"{msg.role}: {msg.content}" for msg in chat_history.messages[-5:]])
-        
+    def _conversation_context(self, chat_history: ChatHistory, session_id: Optional[str]) -> str:
+        if session_id:
+            return self.get_memory(session_id, chat_history).context()
+        # Stateless call: render the client's history through a throwaway memory so it stays in budget
+        memory = ConversationMemory()
+        for msg in chat_history.messages:
+            memory.add(msg)
+        return memory.context()
+
+    async def _summarize_turns(self, summary: str, messages: List[Message]) -> str:
+        turns = "\n".join(f"{msg.role}: {msg.content}" for msg in messages)
+        # The summary gets a third of the token budget; roughly 0.75 words per token
+        words = MEMORY_TOKEN_BUDGET // 4
         prompt = f"""
+        Update the running summary of a conversation between a student and a financial tutor.
+
+        Current summary:
+        {summary or "None yet"}
+
+        New turns:
+        {turns}
+
+        Return only the updated summary as plain text in at most {words} words, keeping the
+        student's goals, questions asked and concepts already explained.
+        """
+        response = await self.client.aio.models.generate_content(model=self.model, contents=prompt)
+        return response.text or summary
+
+    def _remember(self, session_id: Optional[str], query: str, answer: str) -> None:
+        """Record the turn and update the session summary in the background"""
+        if not session_id:
+            return
+        memory = self.get_memory(session_id)
+        memory.add(Message(role="user", content=query))
+        memory.add(Message(role="assistant", content=answer))
+        if memory.pending:
+            task = asyncio.create_task(memory.compact(self._summarize_turns))
+            self._background_tasks.add(task)
+            task.add_done_callback(self._background_tasks.discard)
+
+    def build_prompt(self, query: str, chat_context: str) -> str:
+        return f"""
         You are a friendly financial tutor. Help answer questions about personal finance.
-        
+
         Previous conversation:
         {chat_context}
 
@@ -34,14 +183,77 @@ class FinancialTutor:
         Provide a helpful, accurate response focused on financial education.
         """
 
-        response = self.client.models.generate_content(
+    def _is_cacheable(self, chat_context: str) -> bool:
+        """Only context-free questions can share answers across students"""
+        return estimate_tokens(chat_context) <= CACHE_MAX_CONTEXT_TOKENS
+
+    async def get_response(self, query: str, chat_history: ChatHistory,
+                           session_id: Optional[str] = None) -> str:
+        chat_context = self._conversation_context(chat_history, session_id)
+        cacheable = self._is_cacheable(chat_context)
+        if cacheable:
+            cached = self.answer_cache.get(query)
+            if cached is not None:
+                self._remember(session_id, query, cached)
+                return cached
+
+        response = await self.client.aio.models.generate_content(
             model=self.model,
-            contents=prompt,
-            generation_config={
-                "temperature": 0.7,
-                "top_p": 0.8,
-                "top_k": 40
-            }
+            contents=self.build_prompt(query, chat_context),
+            config=self.generation_config
         )
 
+        if cacheable:
+            self.answer_cache.put(query, response.text)
+        self._remember(session_id, query, response.text)
         return response.text
+
+    async def stream_response(self, query: str, chat_history: ChatHistory,
+                              session_id: Optional[str] = None) -> AsyncIterator[str]:
+        """Yield answer text as it arrives from the model and record time-to-first-token"""
+        started = time.perf_counter()
+        first_token = True
+        answer = []
+
+        chat_context = self._conversation_context(chat_history, session_id)
+        cacheable = self._is_cacheable(chat_context)
+        if cacheable:
+            cached = self.answer_cache.get(query)
+            if cached is not None:
+                self.ttft_samples.append((time.perf_counter() - started) * 1000)
+                yield cached
+                self._remember(session_id, query, cached)
+                return
+
+        stream = await self.client.aio.models.generate_content_stream(
+            model=self.model,
+            contents=self.build_prompt(query, chat_context),
+            config=self.generation_config
+        )
+        async for chunk in stream:
+            text = getattr(chunk, "text", None)
+            if not text:
+                continue
+            if first_token:
+                ttft_ms = (time.perf_counter() - started) * 1000
+                self.ttft_samples.append(ttft_ms)
+                logger.info(f"Tutor time to first token: {ttft_ms:.0f}ms")
+                first_token = False
+            answer.append(text)
+            yield text
+
+        if cacheable:
+            self.answer_cache.put(query, "".join(answer))
+        self._remember(session_id, query, "".join(answer))
+
+    def ttft_stats(self) -> Dict:
+        """Summary of recent time-to-first-token samples"""
+        samples = sorted(self.ttft_samples)
+        if not samples:
+            return {"count": 0, "p50_ms": None, "p95_ms": None, "max_ms": None}
+        return {
+            "count": len(samples),
+            "p50_ms": round(samples[len(samples) // 2], 1),
+            "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 1),
+            "max_ms": round(samples[-1], 1)
+        }
@@ -1,9 +1,13 @@
 #!/usr/bin/env python3
-import os, uuid, json, sys
+import os, uuid, json, sys, time
+import logging
 from typing import Dict, Optional
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-import uvicorn, traceback
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, Response, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+from contextlib import asynccontextmanager
 from pydantic import BaseModel
 
 # Fix import paths
@@ -12,14 +16,61 @@ if current_dir not in sys.path:
     sys.path.append(os.path.dirname(current_dir))
 
 # Now import relative to the current directory
-from NovelGenerator import FinancialNovelGenerator
-from QuizGenerator import QuizGenerator
+from NovelGenerator import FinancialNovelGenerator, StoryData, frontend_view, images_fingerprint
+from QuizGenerator import QuizGenerator, QUIZ_MODES, AGE_GROUPS, local_quiz
+from QuizGrading import GradingError, build_answer_key, public_quiz, grade
 from Summarizer import Summarize
+from SummaryCache import summary_key
+from StoryPool import StoryPool, PoolKey
+from tutor import FinancialTutor, ChatHistory
+from CacheBackend import create_cache, CACHE_BACKEND
+from Serialization import FastJSONResponse, GZIP_MINIMUM_SIZE, GZIP_COMPRESS_LEVEL
+from HttpCaching import content_hash, make_etag, etag_matches, STORY_CACHE_CONTROL, LATEST_CACHE_CONTROL
+from StoryQuery import (
+    QueryError, build_story_meta, paginate, parse_fields, parse_time_range, project, matches, DEFAULT_PAGE_SIZE
+)
+from Profiling import ProfilingMiddleware, RequestProfiler, admin_authorized, admin_token, profile_thread
+from LogConfig import RequestContextMiddleware, bind_story, configure_logging
+from Admission import (
+    AdmissionController, Overloaded, GENERATE_CONCURRENCY, GENERATE_QUEUE_SIZE, GENERATE_QUEUE_DEADLINE,
+    FOLLOWUP_CONCURRENCY, FOLLOWUP_QUEUE_SIZE, FOLLOWUP_QUEUE_DEADLINE
+)
+from WorkScheduler import FOLLOWUP, IMAGES, INTERACTIVE, PREGENERATION, Preempted, scheduler, work_context
+from ImageJobs import IMAGE_JOBS, ImageJobWorker, get_image_jobs, image_job_id
+from startup import LazyInstance, Warmup, is_initialized
+
+# Log records go through a queue and are written as JSON by a background thread
+configure_logging()
+logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Financial Novel API")
-story_cache: Dict[str, dict] = {}
-quiz_cache: Dict[str, dict] = {}
-summary_cache: Dict[str, dict] = {}
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if admin_token() is None:
+        logger.info("ADMIN_TOKEN is not set; admin endpoints and X-Profile profiling are disabled")
+    global image_job_worker
+    if WARMUP_ON_STARTUP:
+        warmup.run_in_background()
+    if IMAGE_JOBS and image_job_worker is None:
+        # Opening the job database waits for startup so importing this module has no side effects
+        image_job_worker = ImageJobWorker(get_image_jobs(), resume_image_job)
+    if image_job_worker is not None:
+        # Finishes image jobs a previous process left behind and retries failed assets
+        image_job_worker.start()
+    yield
+
+app = FastAPI(title="Financial Novel API", lifespan=lifespan, default_response_class=FastJSONResponse)
+# Backed by CACHE_BACKEND (memory, sqlite or redis) so several uvicorn workers can share stories
+story_cache = create_cache("stories")
+quiz_cache = create_cache("quizzes")
+summary_cache = create_cache("summaries")
+# Answer keys stay on the server; quiz_cache only holds the answer-free public quiz
+answer_key_cache = create_cache("answer_keys")
+# Public quizzes per "<story id>:<difficulty>" so difficulty switches are cache hits
+quiz_variant_cache = create_cache("quiz_variants")
+# Frontend-ready views ({"images_hash", "view"}), built once per story and its images
+frontend_cache = create_cache("frontend_stories")
+# Listing metadata (title, category, difficulty, created_at) so listing never loads story bodies
+story_meta_cache = create_cache("story_meta")
 
 # Enable CORS
 app.add_middleware(
@@ -29,11 +80,135 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Story payloads are large and repetitive; compress when the client accepts gzip
+app.add_middleware(GZipMiddleware, minimum_size=GZIP_MINIMUM_SIZE, compresslevel=GZIP_COMPRESS_LEVEL)
+# cProfile for requests sent with X-Profile: 1 or while switched on via /api/admin/profiling
+profiler = RequestProfiler()
+app.add_middleware(ProfilingMiddleware, profiler=profiler)
+# Outermost: request ids cover everything below, including the access log line
+app.add_middleware(RequestContextMiddleware)
+
+# Model-bound endpoints are admitted through bounded queues and shed with 503 when
+# overloaded; read endpoints bypass admission entirely
+story_admission = AdmissionController(
+    "generate", GENERATE_CONCURRENCY, GENERATE_QUEUE_SIZE, GENERATE_QUEUE_DEADLINE, expected_seconds=20.0
+)
+followup_admission = AdmissionController(
+    "quiz_summary", FOLLOWUP_CONCURRENCY, FOLLOWUP_QUEUE_SIZE, FOLLOWUP_QUEUE_DEADLINE, expected_seconds=3.0
+)
+
+@app.exception_handler(Overloaded)
+async def overloaded_handler(request: Request, exc: Overloaded):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc), "reason": exc.reason, "retry_after": exc.retry_after},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+# Generators (and their Gemini clients) are built on first use, not at import
+generator = LazyInstance(FinancialNovelGenerator)
+quiz_generator = LazyInstance(QuizGenerator)
+summarizer = LazyInstance(Summarize)
+tutor = LazyInstance(FinancialTutor)
+
+# Titles returned by FinancialNovelGenerator when generation fails; never pooled
+ERROR_STORY_TITLES = {"Error Generating Story", "Parsing Error"}
+_pool_generator: Optional[FinancialNovelGenerator] = None
+
+def produce_pool_entry(key: PoolKey) -> Optional[Dict]:
+    """Generate a story with quiz, summary and images for a pool key"""
+    global _pool_generator
+    # The pool worker gets its own generator so it never touches the request-path game state
+    if _pool_generator is None:
+        _pool_generator = FinancialNovelGenerator()
+
+    selected_interest = {"category": key.category, "interest": key.interest}
+    _pool_generator.game_state.selected_interest = selected_interest
+    _pool_generator.game_state.selected_concept = {"topic": key.topic, "subtopic": key.subtopic}
+    _pool_generator.game_state.difficulty = key.difficulty
+
+    # Lowest scheduling class: queued calls give way to every user-facing request
+    story = None
+    try:
+        with work_context(PREGENERATION, "story-pool"):
+            story = _pool_generator.generate_story_segment()
+            if story.plot.title in ERROR_STORY_TITLES:
+                return None
+
+            story_data = story.model_dump()
+            quiz = quiz_generator.generate_quiz(story_data, key.difficulty)
+            summary = summarizer.generate_summary(story_data=story_data, selected_interest=selected_interest)
+    except Preempted:
+        # The story is thrown away, so its unfinished images must not be resumed
+        if story is not None and image_job_worker is not None:
+            image_job_worker.queue.cancel(image_job_id(story.model_dump()))
+        raise
+    return {"story": story_data, "quiz": quiz.model_dump(), "summary": summary, "frontend": frontend_view(story)}
+
+story_pool = StoryPool(produce_pool_entry)
+
+def publish_story_images(story_id: str, images: Dict) -> None:
+    """Store images finished after the story was served; the frontend view and ETag follow the new images"""
+    if story_id not in story_cache:
+        return
+    story_data = story_cache[story_id]
+    story_data["generated_images"] = images
+    story_cache[story_id] = story_data
+    meta = story_meta_cache.get(story_id)
+    if meta is not None:
+        meta["content_hash"] = content_hash({
+            "storyId": story_id, "story": story_data,
+            "quiz": quiz_cache.get(story_id), "summary": summary_cache.get(story_id)
+        })
+        story_meta_cache[story_id] = meta
+    logger.info(f"Published resumed images for story {story_id}")
+
+def resume_image_job(job: Dict) -> None:
+    """Finish an interrupted or retrying image job and update the story it belongs to"""
+    if job["story_id"] not in story_cache:
+        # Evicted or deleted since it was served; rendering would only spend model calls on unused images
+        logger.warning(f"Cancelling image job {job['job_id']}: story {job['story_id']} is no longer cached")
+        image_job_worker.queue.cancel(job["job_id"])
+        return
+    payload = job["payload"]
+    job_generator = generator.fork()
+    job_generator.game_state.selected_interest = payload.get("selected_interest") or job_generator.game_state.selected_interest
+    story = StoryData(**payload["story"])
+    with work_context(IMAGES, "image-jobs"):
+        images = job_generator.generate_all_images_for_story(story, payload["timestamp"])
+    publish_story_images(job["story_id"], images)
+
+# Built by the lifespan hook when IMAGE_JOBS is on
+image_job_worker: Optional[ImageJobWorker] = None
+
+# With WARMUP_ON_STARTUP the worker warms up in the background and /ready
+# reports 503 until it is done, so the load balancer only routes to warm workers
+WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "false").lower() in ("1", "true", "yes")
+OUTPUT_DIR = "output"
+MODEL_WARMUP_ID = "gemini-2.0-flash-lite"
+
+def warm_model_connection():
+    """Open the HTTPS connection to the Gemini API with a cheap metadata call"""
+    quiz_generator.client.models.get(model=MODEL_WARMUP_ID)
+
+def warm_cdn_connection():
+    """Import and configure Cloudinary and open its connection pool"""
+    from NovelGenerator import configure_cloudinary
+    import cloudinary.api
+    configure_cloudinary()
+    cloudinary.api.ping()
+
+def warm_caches():
+    for cache in (story_cache, quiz_cache, summary_cache, story_meta_cache, frontend_cache, answer_key_cache, quiz_variant_cache):
+        cache.ping()
 
-# Initialize the generators
-generator = FinancialNovelGenerator()
-quiz_generator = QuizGenerator()
-summarizer = Summarize() 
+warmup = Warmup([
+    ("generators", lambda: [generator.game_state, quiz_generator.client, summarizer.client, tutor.client], True),
+    ("caches", warm_caches, True),
+    ("openapi_schema", app.openapi, False),
+    ("model_connection", warm_model_connection, False),
+    ("cdn_connection", warm_cdn_connection, False),
+])
 
 ELEVENLABS_API_KEY = os.getenv("ELEVENLABS_API_KEY")
 
@@ -44,16 +219,62 @@ class QuizRequest(BaseModel):
     story_data: Optional[Dict] = None
     story_id: Optional[str] = None  # If provided, will use cached story
     difficulty: Optional[str] = "beginner"
+    mode: Optional[str] = "model"  # "instant" builds the quiz locally from templates
+    all_difficulties: Optional[bool] = False  # Build beginner/intermediate/advanced in one call and cache all three
 
 class SummaryRequest(BaseModel):
     story_data: Optional[Dict] = None
     story_id: Optional[str] = None  # If provided, will use cached story
     selected_interest: Optional[Dict] = None
 
+class TutorRequest(BaseModel):
+    query: str
+    chat_history: Optional[ChatHistory] = None
+    session_id: Optional[str] = None  # Enables server-side rolling conversation memory
+
+def sse_event(data: Dict, event: Optional[str] = None) -> str:
+    """Format a server-sent event"""
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
 @app.get("/")
 async def root():
     return {"message": "Financial Novel API is running"}
 
+@app.get("/ready")
+async def ready():
+    checks = {
+        "generators": {
+            "story": is_initialized(generator),
+            "quiz": is_initialized(quiz_generator),
+            "summary": is_initialized(summarizer),
+            "tutor": is_initialized(tutor)
+        },
+        "model_connection": warmup.step_ok("model_connection"),
+        "cdn_connection": warmup.step_ok("cdn_connection")
+    }
+    
+    try:
+        warm_caches()
+        checks["cache"] = {"backend": story_cache.backend_name, "ok": True}
+    except Exception as e:
+        checks["cache"] = {"backend": story_cache.backend_name, "ok": False, "error": str(e)}
+    
+    try:
+        os.makedirs(OUTPUT_DIR, exist_ok=True)
+        checks["storage"] = {"path": OUTPUT_DIR, "ok": os.access(OUTPUT_DIR, os.W_OK)}
+    except OSError as e:
+        checks["storage"] = {"path": OUTPUT_DIR, "ok": False, "error": str(e)}
+    
+    is_ready = checks["cache"]["ok"] and checks["storage"]["ok"] and (warmup.done or not WARMUP_ON_STARTUP)
+    body = {"ready": is_ready, "warm": warmup.done, "checks": checks, "warmup": warmup.state()}
+    return JSONResponse(status_code=200 if is_ready else 503, content=body)
+
+@app.post("/api/warmup")
+async def run_warmup():
+    state = await run_in_threadpool(warmup.run)
+    return {"success": state["status"] == "done", "warmup": state}
+
 @app.post("/api/load-user-data")
 async def load_user_data():
     try:
@@ -64,61 +285,123 @@ async def load_user_data():
             "selected_interest": generator.game_state.selected_interest
         }
     except Exception as e:
-        print(traceback.format_exc())
+        logger.exception("Loading user data failed")
         raise HTTPException(status_code=500, detail=f"Error loading user data: {str(e)}")
 
-@app.post("/api/generate")
-async def generate_story(request: StoryRequest):
-    try:
-        print("Loading user preferences...")
-        generator.load_user_data()  # Load user preferences first
-        
-        # Set difficulty if provided
-        if request.difficulty:
-            generator.game_state.difficulty = request.difficulty
-        
-        print("Generating story from user preferences...")
-        story = generator.generate_story_segment()
-        print("Story generated successfully")
+def create_story(difficulty: Optional[str]) -> Dict:
+    """Generate (or take from the pool) a story with its quiz and summary and cache them; runs in the threadpool"""
+    # Each request works on its own copy of the game state so concurrent generations don't mix preferences
+    story_generator = generator.fork()
+    logger.debug("Loading user preferences")
+    story_generator.load_user_data()  # Load user preferences first
+    state = story_generator.game_state
+    
+    # Set difficulty if provided
+    if difficulty:
+        state.difficulty = difficulty
+    
+    pool_key = PoolKey.from_state(state.selected_interest, state.selected_concept, state.difficulty)
+    pooled = story_pool.pop(pool_key)
+    
+    if pooled:
+        logger.info("Serving pre-generated story from pool")
+        story_data, quiz_data, summary = pooled["story"], pooled["quiz"], pooled["summary"]
+        frontend = pooled.get("frontend") or frontend_view(StoryData(**story_data))
+    else:
+        logger.info("Generating story from user preferences")
+        story = story_generator.generate_story_segment()
+        story_data = story.model_dump()
+        frontend = frontend_view(story)
+        logger.debug("Story generated")
         
-        # Generate quiz
-        quiz = quiz_generator.generate_quiz(
-            story.dict() if hasattr(story, 'dict') else story.model_dump(), 
-            generator.game_state.difficulty
-        )
-        print("Quiz generated successfully")
-        
-        # Generate summary with interest context
-        summary = summarizer.generate_summary(
-            story_data=story.dict() if hasattr(story, 'dict') else story.model_dump(),
-            selected_interest=generator.game_state.selected_interest
-        )
-        print("Summary generated successfully")
-        
-        # Cache everything
-        story_id = str(uuid.uuid4())
-        story_cache[story_id] = story.dict() if hasattr(story, 'dict') else story.model_dump()
-        quiz_cache[story_id] = quiz.dict() if hasattr(quiz, 'dict') else quiz.model_dump()
-        summary_cache[story_id] = summary
-        
-        print(f"Story cached with ID: {story_id}")
-        print(f"Quiz and summary cached with ID: {story_id}")
-        
-        return {
-            "success": True,
-            "storyId": story_id,
-            "story": story.dict() if hasattr(story, 'dict') else story.model_dump(),
-            "quiz": quiz.dict() if hasattr(quiz, 'dict') else quiz.model_dump(),
-            "summary": summary
-        }
-    except Exception as e:
-        print("Full error traceback:")
-        print(traceback.format_exc())
-        raise HTTPException(status_code=500, detail=f"Story generation failed: {str(e)}")
+        with work_context(FOLLOWUP):
+            # Generate quiz
+            quiz = quiz_generator.generate_quiz(story_data, state.difficulty)
+            quiz_data = quiz.model_dump()
+            logger.debug("Quiz generated")
+            
+            # Generate summary with interest context
+            summary = summarizer.generate_summary(
+                story_data=story_data,
+                selected_interest=state.selected_interest
+            )
+            logger.debug("Summary generated")
+    
+    # Top the pool back up for this key in the background
+    story_pool.request_refill(pool_key)
+    
+    # Cache everything
+    story_id = str(uuid.uuid4())
+    bind_story(story_id)
+    answer_key_cache[story_id] = build_answer_key(quiz_data)
+    store_quiz_variant(story_id, state.difficulty, quiz_data)
+    quiz_data = public_quiz(quiz_data)
+    story_cache[story_id] = story_data
+    quiz_cache[story_id] = quiz_data
+    summary_cache[story_id] = summary
+    frontend_cache[story_id] = frontend
+    meta = build_story_meta(story_data, state.selected_interest, state.selected_concept, state.difficulty)
+    # Hashed once here; reads compare ETags without touching the story body
+    meta["content_hash"] = content_hash(
+        {"storyId": story_id, "story": story_data, "quiz": quiz_data, "summary": summary}
+    )
+    story_meta_cache[story_id] = meta
+    if image_job_worker is not None:
+        # Only once the story is cached: images still missing are finished in the
+        # background and published to it
+        image_job_worker.queue.attach(image_job_id(story_data), story_id)
+        image_job_worker.wake()
+    # Requests without a story id (latest quiz/summary) use the newest preferences
+    generator.game_state = state
+    
+    logger.info("Story, quiz and summary cached")
+    return {
+        "success": True,
+        "storyId": story_id,
+        "story": story_data,
+        "quiz": quiz_data,
+        "summary": summary
+    }
+
+def request_user(request: Request) -> str:
+    """Who a request is for, so the scheduler can share model capacity fairly between users"""
+    return request.headers.get("x-user-id") or (request.client.host if request.client else "anonymous")
+
+@app.post("/api/generate")
+async def generate_story(request: StoryRequest, http_request: Request):
+    # Generation blocks on the model, so it runs in the threadpool behind admission
+    # control; the event loop stays free for reads
+    async with story_admission.admit():
+        try:
+            with work_context(INTERACTIVE, request_user(http_request)):
+                payload = await run_in_threadpool(profile_thread, create_story, request.difficulty)
+        except Exception as e:
+            logger.exception("Story generation failed")
+            raise HTTPException(status_code=500, detail=f"Story generation failed: {str(e)}")
+    # Lets the profiling and access-log middleware name the story
+    http_request.state.story_id = payload["storyId"]
+    bind_story(payload["storyId"])
+    # Already plain dicts; returning the response directly skips FastAPI's jsonable_encoder pass
+    return FastJSONResponse(payload)
+
+def quiz_variant_id(story_id: str, difficulty: str) -> str:
+    return f"{story_id}:{(difficulty or 'beginner').lower()}"
+
+def store_quiz_variant(story_id: Optional[str], difficulty: str, quiz_data: Dict) -> Dict:
+    """Keep the answer key server-side and return the public quiz with the id to grade against"""
+    quiz_id = quiz_variant_id(story_id, difficulty) if story_id else f"quiz-{uuid.uuid4()}"
+    answer_key_cache[quiz_id] = build_answer_key(quiz_data)
+    public = {**public_quiz(quiz_data), "quiz_id": quiz_id}
+    if story_id:
+        quiz_variant_cache[quiz_id] = public
+    return public
 
 @app.post("/api/generate-quiz")
-async def generate_quiz(request: QuizRequest):
+async def generate_quiz(request: QuizRequest, http_request: Request):
     try:
+        bind_story(request.story_id)
+        if (request.mode or "model") not in QUIZ_MODES:
+            raise HTTPException(status_code=400, detail=f"mode must be one of {', '.join(QUIZ_MODES)}")
         # Get story_data from cache if story_id is provided, otherwise use provided story_data
         if request.story_id:
             if request.story_id not in story_cache:
@@ -130,20 +413,50 @@ async def generate_quiz(request: QuizRequest):
             # Try to use latest story if available
             if not story_cache:
                 raise HTTPException(status_code=400, detail="No story_data provided and no cached stories available. Either provide story_data or story_id, or generate a story first using /api/generate")
-            latest_id = list(story_cache.keys())[-1]
+            latest_id = story_cache.latest_key()
             story_data = story_cache[latest_id]
         
-        quiz = quiz_generator.generate_quiz(story_data, request.difficulty)
-        return quiz.dict() if hasattr(quiz, 'dict') else quiz.model_dump()
-    except HTTPException:
+        # Quizzes for ad-hoc story_data are not cached and get their own id to grade against
+        story_key = request.story_id or (None if request.story_data else latest_id)
+        difficulty = (request.difficulty or "beginner").lower()
+        if story_key:
+            cached = quiz_variant_cache.get(quiz_variant_id(story_key, difficulty))
+            if cached is not None:
+                return {**cached, "cached": True}
+        
+        # Instant quizzes come from per-level templates, so they need a known level too
+        if (request.all_difficulties or request.mode == "instant") and difficulty not in AGE_GROUPS:
+            raise HTTPException(status_code=400, detail=f"difficulty must be one of {', '.join(AGE_GROUPS)}")
+        if request.all_difficulties:
+            if request.mode == "instant":
+                quizzes = {level: local_quiz(story_data, level) for level in AGE_GROUPS}
+            else:
+                async with followup_admission.admit():
+                    with work_context(FOLLOWUP, request_user(http_request)):
+                        quizzes = await run_in_threadpool(profile_thread, quiz_generator.generate_quiz_set, story_data)
+        elif request.mode == "instant":
+            quizzes = {difficulty: local_quiz(story_data, difficulty)}
+        else:
+            async with followup_admission.admit():
+                with work_context(FOLLOWUP, request_user(http_request)):
+                    quiz = await run_in_threadpool(profile_thread, quiz_generator.generate_quiz, story_data, request.difficulty)
+            quizzes = {difficulty: quiz}
+        
+        if story_key is None:
+            # Ad-hoc variants are never served again, so only the returned quiz gets an answer key
+            quizzes = {difficulty: quizzes[difficulty]}
+        stored = {level: store_quiz_variant(story_key, level, quiz.model_dump()) for level, quiz in quizzes.items()}
+        return {**stored[difficulty], "cached": False}
+    except (HTTPException, Overloaded):
         raise
     except Exception as e:
-        print(traceback.format_exc())
+        logger.exception("Quiz generation failed")
         raise HTTPException(status_code=500, detail=f"Error generating quiz: {str(e)}")
 
 @app.post("/api/generate-summary")
-async def generate_summary(request: SummaryRequest):
+async def generate_summary(request: SummaryRequest, http_request: Request):
     try:
+        bind_story(request.story_id)
         # Get story_data from cache if story_id is provided, otherwise use provided story_data
         if request.story_id:
             if request.story_id not in story_cache:
@@ -155,34 +468,102 @@ async def generate_summary(request: SummaryRequest):
             # Try to use latest story if available
             if not story_cache:
                 raise HTTPException(status_code=400, detail="No story_data provided and no cached stories available. Either provide story_data or story_id, or generate a story first using /api/generate")
-            latest_id = list(story_cache.keys())[-1]
+            latest_id = story_cache.latest_key()
             story_data = story_cache[latest_id]
             # Also get selected_interest from generator state if not provided
             if not request.selected_interest:
                 request.selected_interest = generator.game_state.selected_interest
         
-        summary = summarizer.generate_summary(story_data, request.selected_interest)
+        # Stored summaries are served without queueing; only misses are admitted to the model
+        cache = summarizer.cache
+        if cache is not None:
+            key = summary_key(story_data, request.selected_interest)
+            cached = await run_in_threadpool(cache.get, key, False)
+            if cached is not None:
+                return cached
+        
+        async with followup_admission.admit():
+            with work_context(FOLLOWUP, request_user(http_request)):
+                summary = await run_in_threadpool(profile_thread, summarizer.generate_summary, story_data, request.selected_interest)
         return summary
-    except HTTPException:
+    except (HTTPException, Overloaded):
         raise
     except Exception as e:
-        print(traceback.format_exc())
+        logger.exception("Summary generation failed")
         raise HTTPException(status_code=500, detail=f"Error generating summary: {str(e)}")
 
+def story_meta(story_id: str) -> Optional[Dict]:
+    """Listing metadata for a story; stories cached without it only expose their title"""
+    meta = story_meta_cache.get(story_id)
+    if meta is None and story_id in story_cache:
+        meta = {"title": story_cache[story_id].get("plot", {}).get("title", "Untitled")}
+    return meta
+
+def story_content_hash(story_id: str) -> str:
+    """Content hash recorded at generation; computed on the fly for stories cached without one"""
+    meta = story_meta_cache.get(story_id)
+    if meta and meta.get("content_hash"):
+        return meta["content_hash"]
+    return content_hash({
+        "storyId": story_id,
+        "story": story_cache[story_id],
+        "quiz": quiz_cache.get(story_id),
+        "summary": summary_cache.get(story_id)
+    })
+
+def not_modified(etag: str, cache_control: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
+
 @app.get("/api/story/{story_id}")
-async def get_story(story_id: str):
+async def get_story(story_id: str, request: Request, fields: Optional[str] = None):
+    try:
+        paths = parse_fields(fields)
+    except QueryError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     if story_id in story_cache:
-        return {
+        etag = make_etag(story_content_hash(story_id), paths)
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return not_modified(etag, STORY_CACHE_CONTROL)
+        return FastJSONResponse(project({
             "success": True, 
             "story": story_cache[story_id],
             "quiz": quiz_cache.get(story_id),
             "summary": summary_cache.get(story_id)
-        }
+        }, paths, always=("success",)), headers={"ETag": etag, "Cache-Control": STORY_CACHE_CONTROL})
     raise HTTPException(status_code=404, detail="Story not found")
 
+@app.get("/api/story/{story_id}/frontend")
+async def get_frontend_story(story_id: str, request: Request):
+    """Story mapped to scenes with background and character images, ready to render"""
+    if story_id not in story_cache:
+        raise HTTPException(status_code=404, detail="Story not found")
+    
+    story_data = story_cache[story_id]
+    record = frontend_cache.get(story_id)
+    # Rebuild only when the story's images changed since the view was built
+    if record is None or record["images_hash"] != images_fingerprint(story_data.get("generated_images")):
+        record = frontend_view(StoryData(**story_data))
+        frontend_cache[story_id] = record
+    
+    etag = make_etag(story_content_hash(story_id), ["frontend", record["images_hash"]])
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return not_modified(etag, STORY_CACHE_CONTROL)
+    return FastJSONResponse(
+        {"success": True, "storyId": story_id, "frontend": record["view"]},
+        headers={"ETag": etag, "Cache-Control": STORY_CACHE_CONTROL}
+    )
+
 @app.get("/api/latest-story")
-async def get_latest_story():
+async def get_latest_story(
+    request: Request,
+    category: Optional[str] = None,
+    difficulty: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    fields: Optional[str] = None
+):
     try:
+        paths = parse_fields(fields)
         if not story_cache:
             return {
                 "success": False,
@@ -191,32 +572,196 @@ async def get_latest_story():
                 "cached_stories_count": 0
             }
         
-        latest_id = list(story_cache.keys())[-1]
+        if category or difficulty or since or until:
+            since_at, until_at = parse_time_range(since, until)
+            latest_id = next((
+                story_id for story_id in reversed(list(story_cache))
+                if matches(story_meta(story_id) or {}, category, difficulty, since_at, until_at)
+            ), None)
+            if latest_id is None:
+                raise HTTPException(status_code=404, detail="No stories match the given filters")
+        else:
+            latest_id = story_cache.latest_key()
         
-        return {
+        # cached_stories_count is part of the body, so it is part of the tag too
+        cached_stories_count = len(story_cache)
+        etag = make_etag(story_content_hash(latest_id), [f"count={cached_stories_count}"] + (paths or []))
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return not_modified(etag, LATEST_CACHE_CONTROL)
+        
+        return FastJSONResponse(project({
             "success": True, 
             "storyId": latest_id,
             "story": story_cache[latest_id],
             "quiz": quiz_cache.get(latest_id),
             "summary": summary_cache.get(latest_id),
-            "cached_stories_count": len(story_cache)
-        }
+            "cached_stories_count": cached_stories_count
+        }, paths, always=("success", "storyId", "cached_stories_count")),
+            headers={"ETag": etag, "Cache-Control": LATEST_CACHE_CONTROL})
+    except QueryError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
     except Exception as e:
-        print(traceback.format_exc())
+        logger.exception("Retrieving latest story failed")
         raise HTTPException(status_code=500, detail=f"Error retrieving latest story: {str(e)}")
 
 @app.get("/api/stories")
-async def list_stories():
+async def list_stories(
+    category: Optional[str] = None,
+    difficulty: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None
+):
+    """List cached stories oldest first; pass next_cursor back as cursor for the next page"""
+    try:
+        paths = parse_fields(fields)
+        page, next_cursor = paginate(
+            story_cache, story_meta, limit=limit, cursor=cursor,
+            category=category, difficulty=difficulty, since=since, until=until
+        )
+    except QueryError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
     return {
         "success": True,
-        "stories": [
-            {"id": story_id, "title": story.get("plot", {}).get("title", "Untitled")}
-            for story_id, story in story_cache.items()
-        ]
+        "stories": [project({"id": story_id, **meta}, paths, always=("id",)) for story_id, meta in page],
+        "next_cursor": next_cursor
     }
 
+class GradeRequest(BaseModel):
+    answers: Dict[str, int]  # question id -> chosen option index
+
+@app.post("/api/quiz/{story_id}/grade")
+async def grade_quiz(story_id: str, request: GradeRequest):
+    """Grade answers against the stored answer key; no model call involved"""
+    answer_key = answer_key_cache.get(story_id)
+    if answer_key is None:
+        raise HTTPException(status_code=404, detail="Quiz not found")
+    try:
+        result = grade(answer_key, request.answers)
+    except GradingError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return FastJSONResponse({"success": True, "storyId": story_id, **result})
+
+@app.post("/api/tutor/stream")
+async def stream_tutor(request: TutorRequest):
+    chat_history = request.chat_history or ChatHistory()
+    
+    async def event_stream():
+        started = time.perf_counter()
+        ttft_ms = None
+        try:
+            async for token in tutor.stream_response(request.query, chat_history, request.session_id):
+                if ttft_ms is None:
+                    ttft_ms = (time.perf_counter() - started) * 1000
+                yield sse_event({"token": token})
+        except Exception as e:
+            logger.exception("Tutor stream failed")
+            yield sse_event({"error": f"Tutor response failed: {str(e)}"}, event="error")
+            return
+        yield sse_event({
+            "ttft_ms": round(ttft_ms, 1) if ttft_ms is not None else None,
+            "total_ms": round((time.perf_counter() - started) * 1000, 1)
+        }, event="done")
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/api/tutor/stats")
+async def get_tutor_stats():
+    return {"success": True, "ttft": tutor.ttft_stats(), "answer_cache": tutor.answer_cache.stats()}
+
+@app.get("/api/pool/stats")
+async def get_pool_stats():
+    return {"success": True, "pool": story_pool.stats()}
+
+@app.get("/api/admission/stats")
+async def get_admission_stats():
+    return {"success": True, "admission": {c.name: c.stats() for c in (story_admission, followup_admission)}}
+
+@app.get("/api/scheduler/stats")
+async def get_scheduler_stats():
+    return {"success": True, "scheduler": scheduler.stats()}
+
+@app.get("/api/image-jobs/stats")
+async def get_image_job_stats():
+    if image_job_worker is None:
+        return {"success": True, "enabled": False, "image_jobs": None}
+    return {"success": True, "enabled": True, "image_jobs": await run_in_threadpool(image_job_worker.queue.stats)}
+
+@app.get("/api/summary/stats")
+async def get_summary_stats():
+    cache = summarizer.cache
+    return {"success": True, "summary_cache": cache.stats() if cache is not None else None}
+
+@app.delete("/api/summary/cache/{story_id}")
+async def invalidate_summary(story_id: str):
+    """Forget the stored summaries of a story so the next request regenerates them"""
+    if story_id not in story_cache:
+        raise HTTPException(status_code=404, detail=f"Story with ID {story_id} not found in cache")
+    cache = summarizer.cache
+    removed = cache.invalidate_story(story_cache[story_id]) if cache is not None else 0
+    return {"success": True, "removed": removed}
+
+@app.delete("/api/summary/cache")
+async def clear_summaries():
+    cache = summarizer.cache
+    return {"success": True, "removed": cache.clear() if cache is not None else 0}
+
+class ProfilingToggle(BaseModel):
+    enabled: bool
+    path_prefix: Optional[str] = None  # e.g. "/api/generate"; every request when omitted
+
+def require_admin(request: Request) -> None:
+    if admin_token() is None:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled; set ADMIN_TOKEN to enable them")
+    supplied = request.headers.get("x-admin-token")
+    if not admin_authorized(supplied.encode("utf-8") if supplied is not None else None):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+@app.get("/api/admin/profiling")
+async def get_profiling(request: Request):
+    require_admin(request)
+    return {"success": True, "profiling": profiler.state()}
+
+@app.post("/api/admin/profiling")
+async def set_profiling(toggle: ProfilingToggle, request: Request):
+    require_admin(request)
+    return {"success": True, "profiling": profiler.configure(toggle.enabled, toggle.path_prefix)}
+
+@app.get("/api/admin/profiles")
+async def list_profiles(request: Request, limit: int = Query(20, ge=1, le=200)):
+    require_admin(request)
+    return {"success": True, "profiles": profiler.list(limit)}
+
+@app.get("/api/admin/profiles/{profile_id}")
+async def download_profile(profile_id: str, request: Request, format: str = Query("pstats", pattern="^(pstats|text)$")):
+    """The raw pstats file, or with format=text the top functions by cumulative time"""
+    require_admin(request)
+    entry = profiler.find(profile_id)
+    if entry is None or not os.path.exists(profiler.path_for(entry)):
+        raise HTTPException(status_code=404, detail=f"Profile {profile_id} not found")
+    if format == "text":
+        return PlainTextResponse(await run_in_threadpool(profiler.report, entry))
+    return FileResponse(profiler.path_for(entry), media_type="application/octet-stream", filename=entry["file"])
+
 def main():
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    import uvicorn
+    workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+    if workers > 1:
+        if CACHE_BACKEND == "memory":
+            logger.warning("WEB_CONCURRENCY > 1 with the memory cache; stories will 404 across workers. "
+                           "Set CACHE_BACKEND=sqlite or CACHE_BACKEND=redis.")
+        uvicorn.run("web_server:app", host="0.0.0.0", port=8000, workers=workers)
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=8000)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
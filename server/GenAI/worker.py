@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Long-lived Python worker for the Node bridge.
+
+Speaks newline-delimited JSON-RPC over stdin/stdout:
+
+    -> {"id": 1, "method": "generate_quiz", "params": {"story_data": {...}, "difficulty": "beginner"}}
+    <- {"id": 1, "result": {...}}
+    <- {"id": 2, "error": {"message": "...", "type": "ValueError"}}
+
+Generators and their Gemini clients are created once per process and
+requests are handled concurrently on a thread pool. Anything the
+generators print goes to stderr so stdout only carries protocol lines.
+"""
+import os
+import sys
+import json
+import logging
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+logger = logging.getLogger(__name__)
+
+MAX_CONCURRENCY = int(os.getenv("PYTHON_WORKER_CONCURRENCY", "4"))
+
+
+class Worker:
+    def __init__(self):
+        self._generator = None
+        self._quiz_generator = None
+        self._summarizer = None
+        self._init_lock = threading.Lock()
+        # FinancialNovelGenerator keeps per-request state in game_state
+        self._story_lock = threading.Lock()
+        self.methods: Dict[str, Callable[[Dict], object]] = {
+            "ping": self.ping,
+            "load_user_data": self.load_user_data,
+            "generate_story": self.generate_story,
+            "generate_quiz": self.generate_quiz,
+            "generate_summary": self.generate_summary,
+        }
+
+    @property
+    def generator(self):
+        with self._init_lock:
+            if self._generator is None:
+                from NovelGenerator import FinancialNovelGenerator
+                self._generator = FinancialNovelGenerator()
+            return self._generator
+
+    @property
+    def quiz_generator(self):
+        with self._init_lock:
+            if self._quiz_generator is None:
+                from QuizGenerator import QuizGenerator
+                self._quiz_generator = QuizGenerator()
+            return self._quiz_generator
+
+    @property
+    def summarizer(self):
+        with self._init_lock:
+            if self._summarizer is None:
+                from Summarizer import Summarize
+                self._summarizer = Summarize()
+            return self._summarizer
+
+    def ping(self, params: Dict) -> Dict:
+        return {"status": "success", "pid": os.getpid(), "python_version": sys.version}
+
+    def load_user_data(self, params: Dict) -> Dict:
+        with self._story_lock:
+            self.generator.load_user_data()
+            return {"success": True, "selected_interest": self.generator.game_state.selected_interest}
+
+    def generate_story(self, params: Dict) -> Dict:
+        with self._story_lock:
+            generator = self.generator
+            generator.load_user_data()
+            if params.get("difficulty"):
+                generator.game_state.difficulty = params["difficulty"]
+            story = generator.generate_story_segment()
+            return {
+                **story.model_dump(),
+                "selected_interest": generator.game_state.selected_interest,
+                "difficulty": generator.game_state.difficulty,
+            }
+
+    def generate_quiz(self, params: Dict) -> Dict:
+        if params.get("mode") == "instant":
+            # Template quizzes need no model client
+            from QuizGenerator import local_quiz
+            return local_quiz(params.get("story_data") or {}, params.get("difficulty") or "beginner").model_dump()
+        quiz = self.quiz_generator.generate_quiz(params.get("story_data"), params.get("difficulty") or "beginner")
+        return quiz.model_dump()
+
+    def generate_summary(self, params: Dict) -> Dict:
+        return self.summarizer.generate_summary(params.get("story_data") or {}, params.get("selected_interest"))
+
+    def handle(self, request: Dict) -> Dict:
+        request_id = request.get("id")
+        method = self.methods.get(request.get("method"))
+        if method is None:
+            return {"id": request_id, "error": {"message": f"Unknown method: {request.get('method')}", "type": "MethodNotFound"}}
+        try:
+            return {"id": request_id, "result": method(request.get("params") or {})}
+        except Exception as e:
+            logger.error(f"Worker method {request.get('method')} failed: {e}")
+            logger.error(traceback.format_exc())
+            return {"id": request_id, "error": {"message": str(e), "type": type(e).__name__}}
+
+
+def serve(worker: Optional[Worker] = None, stdin=None, stdout=None, max_workers: int = MAX_CONCURRENCY) -> None:
+    """Serve JSON-RPC requests line by line until stdin closes"""
+    worker = worker or Worker()
+    stdin = stdin or sys.stdin
+    stdout = stdout or sys.stdout
+    write_lock = threading.Lock()
+
+    def respond(response: Dict) -> None:
+        line = json.dumps(response, default=str)
+        with write_lock:
+            stdout.write(line + "\n")
+            stdout.flush()
+
+    def run(request: Dict) -> None:
+        respond(worker.handle(request))
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for line in stdin:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                request = json.loads(line)
+            except json.JSONDecodeError as e:
+                respond({"id": None, "error": {"message": f"Invalid JSON: {e}", "type": "ParseError"}})
+                continue
+            executor.submit(run, request)
+
+
+def main(default_method: Optional[str] = None) -> None:
+    """
+    Entry point for the generator scripts.
+
+    With --worker, serve requests until stdin closes. Otherwise handle a
+    single request whose params are the JSON in argv[1] (the legacy
+    spawn-per-request mode) and print the result.
+    """
+    protocol_out = sys.stdout
+    sys.stdout = sys.stderr
+    from LogConfig import configure_logging
+    configure_logging()
+
+    args = [arg for arg in sys.argv[1:] if arg != "--worker"]
+    if "--worker" in sys.argv[1:] or default_method is None:
+        serve(stdout=protocol_out)
+        return
+
+    params = json.loads(args[0]) if args else {}
+    method = params.pop("action", None) or default_method
+    response = Worker().handle({"id": None, "method": method, "params": params})
+    protocol_out.write(json.dumps(response.get("result", response), default=str) + "\n")
+    protocol_out.flush()
+    if "error" in response:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+/**
+ * Unit Tests for Python Worker Pool
+ * Tests: pythonWorkerPool.js
+ */
+
+const PythonWorkerPool = require('../../../utils/pythonWorkerPool');
+
+// Stand-in for GenAI/worker.py: answers with its pid, exits on "crash", never answers "hang"
+const FAKE_WORKER = `
+  const readline = require('readline');
+  readline.createInterface({ input: process.stdin }).on('line', (line) => {
+    const { id, method, params } = JSON.parse(line);
+    if (method === 'crash') process.exit(1);
+    if (method === 'hang') return;
+    if (method === 'fail') {
+      process.stdout.write(JSON.stringify({ id, error: { type: 'ValueError', message: 'bad input' } }) + '\\n');
+      return;
+    }
+    process.stdout.write(JSON.stringify({ id, result: { pid: process.pid, params } }) + '\\n');
+  });
+`;
+
+const createPool = (options = {}) => new PythonWorkerPool({
+  command: process.execPath,
+  args: ['-e', FAKE_WORKER],
+  respawnDelayMs: 0,
+  ...options
+});
+
+const waitFor = async (condition, timeoutMs = 5000) => {
+  const deadline = Date.now() + timeoutMs;
+  while (!condition()) {
+    if (Date.now() > deadline) {
+      throw new Error('condition not reached');
+    }
+    await new Promise((resolve) => setTimeout(resolve, 10));
+  }
+};
+
+describe('Python Worker Pool - Unit Tests', () => {
+  let pool;
+
+  afterEach(() => {
+    pool.close();
+  });
+
+  describe('Dispatch', () => {
+    test('should resolve with the worker result', async () => {
+      pool = createPool({ size: 1 });
+
+      const result = await pool.call('echo', { story: 1 });
+
+      expect(result.params).toEqual({ story: 1 });
+    });
+
+    test('should reject with the worker error and its type', async () => {
+      pool = createPool({ size: 1 });
+
+      await expect(pool.call('fail', {})).rejects.toMatchObject({ message: 'bad input', type: 'ValueError' });
+    });
+
+    test('should take turns between idle workers', async () => {
+      pool = createPool({ size: 2 });
+
+      const pids = [];
+      for (let i = 0; i < 4; i++) {
+        pids.push((await pool.call('echo', {})).pid);
+      }
+
+      expect(pids[0]).not.toBe(pids[1]);
+      expect(pids[2]).toBe(pids[0]);
+      expect(pids[3]).toBe(pids[1]);
+    });
+
+    test('should send new requests to the least busy worker', async () => {
+      pool = createPool({ size: 2 });
+
+      pool.call('hang', {}).catch(() => {});
+      const busy = pool.workers.find((worker) => worker.pending.size === 1);
+      const pids = [];
+      for (let i = 0; i < 2; i++) {
+        pids.push((await pool.call('echo', {})).pid);
+      }
+
+      expect(pids).not.toContain(busy.child.pid);
+    });
+
+    test('should reject requests that time out', async () => {
+      pool = createPool({ size: 1, timeoutMs: 50 });
+
+      await expect(pool.call('hang', {})).rejects.toThrow('timed out after 50ms');
+    });
+  });
+
+  describe('Crash and respawn', () => {
+    test('should reject pending requests when a worker exits', async () => {
+      pool = createPool({ size: 1 });
+      await pool.call('echo', {});
+      const hung = pool.call('hang', {});
+
+      await expect(pool.call('crash', {})).rejects.toThrow('Python worker exited');
+      await expect(hung).rejects.toThrow('Python worker exited');
+    });
+
+    test('should respawn a crashed worker', async () => {
+      pool = createPool({ size: 1 });
+      const { pid } = await pool.call('echo', {});
+
+      await expect(pool.call('crash', {})).rejects.toThrow('Python worker exited');
+      await waitFor(() => pool.workers[0]);
+
+      expect(pool.workers[0].child.pid).not.toBe(pid);
+      const result = await pool.call('echo', {});
+      expect(result.pid).toBe(pool.workers[0].child.pid);
+    });
+
+    test('should survive EPIPE on a worker stdin', async () => {
+      pool = createPool({ size: 1 });
+      await pool.call('echo', {});
+      const worker = pool.workers[0];
+      const hung = pool.call('hang', {});
+
+      const epipe = Object.assign(new Error('write EPIPE'), { code: 'EPIPE' });
+      worker.child.stdin.emit('error', epipe);
+
+      await expect(hung).rejects.toThrow('Python worker exited: write EPIPE');
+      await waitFor(() => pool.workers[0] && pool.workers[0] !== worker);
+      const result = await pool.call('echo', {});
+      expect(result.pid).not.toBe(worker.child.pid);
+    });
+
+    test('should reject instead of writing to a closed stdin', async () => {
+      pool = createPool({ size: 1 });
+      await pool.call('echo', {});
+      pool.workers[0].child.stdin.destroy();
+
+      await expect(pool.call('echo', {})).rejects.toThrow('Python worker exited');
+    });
+
+    test('should not respawn workers after close', async () => {
+      pool = createPool({ size: 1 });
+      await pool.call('echo', {});
+      const worker = pool.workers[0];
+
+      pool.close();
+      await new Promise((resolve) => worker.child.once('exit', resolve));
+      await new Promise((resolve) => setTimeout(resolve, 20));
+
+      expect(pool.workers).toEqual([]);
+    });
+  });
+});
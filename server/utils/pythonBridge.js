@@ -1,14 +1,44 @@
 const { spawn } = require('child_process');
 const path = require('path');
 const fs = require('fs');
+const PythonWorkerPool = require('./pythonWorkerPool');
+
+// Methods served by GenAI/worker.py for each generator script
+const SCRIPT_METHODS = {
+  'NovelGenerator.py': 'generate_story',
+  'QuizGenerator.py': 'generate_quiz',
+  'Summarizer.py': 'generate_summary'
+};
 
 class PythonBridge {
   constructor() {
     this.pythonPath = process.env.PYTHON_PATH || 'python';
     this.basePath = path.join(__dirname, '..', 'GenAI');
+    // PYTHON_WORKERS=0 falls back to spawning a process per request
+    this.workerCount = parseInt(process.env.PYTHON_WORKERS || '2', 10);
+    this.pool = null;
     this.ensureDirectoriesExist();
   }
 
+  getPool() {
+    if (!this.pool) {
+      this.pool = new PythonWorkerPool({
+        command: this.pythonPath,
+        args: [path.join(this.basePath, 'worker.py'), '--worker'],
+        size: this.workerCount,
+        timeoutMs: parseInt(process.env.PYTHON_WORKER_TIMEOUT_MS || '300000', 10)
+      });
+    }
+    return this.pool;
+  }
+
+  async callWorker(scriptName, args = {}) {
+    const { action, ...params } = args;
+    const method = action || SCRIPT_METHODS[scriptName];
+    console.log(`Calling Python worker method: ${method}`);
+    return this.getPool().call(method, params);
+  }
+
   ensureDirectoriesExist() {
     const dirs = [
       path.join(__dirname, '..', 'output', 'stories'),
@@ -27,6 +57,13 @@ class PythonBridge {
   }
 
   async executeScript(scriptName, args = {}) {
+    if (this.workerCount > 0) {
+      return this.callWorker(scriptName, args);
+    }
+    return this.spawnScript(scriptName, args);
+  }
+
+  async spawnScript(scriptName, args = {}) {
     return new Promise((resolve, reject) => {
       const scriptPath = path.join(this.basePath, scriptName);
       
@@ -83,12 +120,12 @@ class PythonBridge {
   }
 
   async generateStory() {
-    console.log("Executing entire NovelGenerator.py script");
+    console.log("Generating story with NovelGenerator.py");
     return this.executeScript('NovelGenerator.py');
   }
 
   async generateQuiz(storyData, difficulty) {
-    console.log("Executing entire QuizGenerator.py script");
+    console.log("Generating quiz with QuizGenerator.py");
     return this.executeScript('QuizGenerator.py', { 
       story_data: storyData,
       difficulty: difficulty 
@@ -96,7 +133,7 @@ class PythonBridge {
   }
 
   async generateSummary(storyData, selectedInterest) {
-    console.log("Executing entire Summarizer.py script");
+    console.log("Generating summary with Summarizer.py");
     return this.executeScript('Summarizer.py', {
       story_data: storyData,
       selected_interest: selectedInterest
@@ -104,6 +141,9 @@ class PythonBridge {
   }
 
   async testPythonConnection() {
+    if (this.workerCount > 0) {
+      return this.getPool().call('ping');
+    }
     return new Promise((resolve, reject) => {
       const pythonProcess = spawn(this.pythonPath, [
         '-c', 
@@ -140,6 +180,13 @@ class PythonBridge {
     console.log("Explicitly loading user preferences...");
     return this.executeScript('NovelGenerator.py', { action: 'load_user_data' });
   }
+
+  close() {
+    if (this.pool) {
+      this.pool.close();
+      this.pool = null;
+    }
+  }
 }
 
 module.exports = new PythonBridge();
@@ -0,0 +1,158 @@
+const { spawn } = require('child_process');
+const readline = require('readline');
+
+/**
+ * Small pool of long-lived Python workers (GenAI/worker.py) that speak
+ * newline-delimited JSON-RPC over stdin/stdout.
+ */
+class PythonWorkerPool {
+  /**
+   * @param {Object} options
+   * @param {String} options.command - Executable to spawn (python)
+   * @param {Array<String>} options.args - Arguments for the worker script
+   * @param {Number} options.size - Number of worker processes
+   * @param {Number} options.timeoutMs - Per-request timeout
+   * @param {Object} options.spawnOptions - Extra child_process.spawn options
+   * @param {Number} options.respawnDelayMs - Delay before replacing a worker that died
+   */
+  constructor({ command, args = [], size = 2, timeoutMs = 120000, spawnOptions = {}, respawnDelayMs = 1000 }) {
+    this.command = command;
+    this.args = args;
+    this.size = Math.max(1, size);
+    this.timeoutMs = timeoutMs;
+    this.spawnOptions = spawnOptions;
+    this.respawnDelayMs = respawnDelayMs;
+    this.workers = [];
+    this.nextId = 1;
+    this.nextSlot = 0;
+    this.closed = false;
+  }
+
+  _startWorker(slot) {
+    const child = spawn(this.command, this.args, { stdio: ['pipe', 'pipe', 'pipe'], ...this.spawnOptions });
+    const worker = { child, pending: new Map(), slot };
+
+    readline.createInterface({ input: child.stdout }).on('line', (line) => {
+      let message;
+      try {
+        message = JSON.parse(line);
+      } catch (e) {
+        console.error(`Python worker sent invalid JSON: ${line.substring(0, 200)}`);
+        return;
+      }
+
+      const request = worker.pending.get(message.id);
+      if (!request) {
+        return;
+      }
+      worker.pending.delete(message.id);
+      clearTimeout(request.timer);
+
+      if (message.error) {
+        const error = new Error(message.error.message);
+        error.type = message.error.type;
+        request.reject(error);
+      } else {
+        request.resolve(message.result);
+      }
+    });
+
+    child.stderr.on('data', (data) => {
+      console.error(`Python worker ${child.pid}: ${data.toString()}`);
+    });
+
+    const onExit = (reason) => {
+      worker.dead = true;
+      for (const request of worker.pending.values()) {
+        clearTimeout(request.timer);
+        request.reject(new Error(`Python worker exited: ${reason}`));
+      }
+      worker.pending.clear();
+
+      if (this.workers[slot] !== worker) {
+        return;
+      }
+      this.workers[slot] = null;
+      if (!this.closed) {
+        // Replace the worker after a short delay so a worker that dies on startup can't spin
+        const timer = setTimeout(() => {
+          if (!this.closed && !this.workers[slot]) {
+            this._startWorker(slot);
+          }
+        }, this.respawnDelayMs);
+        timer.unref();
+      }
+    };
+
+    child.on('exit', (code, signal) => onExit(signal || `code ${code}`));
+    child.on('error', (err) => onExit(err.message));
+    // Writing to a worker that just died raises EPIPE on stdin; without a listener it would crash the server
+    child.stdin.on('error', (err) => {
+      onExit(err.message);
+      child.kill();
+    });
+
+    this.workers[slot] = worker;
+    return worker;
+  }
+
+  _pickWorker() {
+    // Lazily (re)start empty slots, then pick the worker with the fewest in-flight
+    // requests, taking turns between workers that are equally busy
+    for (let slot = 0; slot < this.size; slot++) {
+      if (!this.workers[slot]) {
+        this._startWorker(slot);
+      }
+    }
+    let best = null;
+    for (let i = 0; i < this.size; i++) {
+      const worker = this.workers[(this.nextSlot + i) % this.size];
+      if (!best || worker.pending.size < best.pending.size) {
+        best = worker;
+      }
+    }
+    this.nextSlot = (best.slot + 1) % this.size;
+    return best;
+  }
+
+  /**
+   * Call a worker method
+   * @param {String} method - RPC method name
+   * @param {Object} params - Method parameters
+   * @returns {Promise<Object>} Method result
+   */
+  call(method, params = {}) {
+    if (this.closed) {
+      return Promise.reject(new Error('Python worker pool is closed'));
+    }
+
+    const worker = this._pickWorker();
+    if (worker.dead || !worker.child.stdin.writable) {
+      return Promise.reject(new Error('Python worker exited: stdin closed'));
+    }
+    const id = this.nextId++;
+
+    return new Promise((resolve, reject) => {
+      const timer = setTimeout(() => {
+        worker.pending.delete(id);
+        reject(new Error(`Python worker request ${method} timed out after ${this.timeoutMs}ms`));
+      }, this.timeoutMs);
+
+      worker.pending.set(id, { resolve, reject, timer });
+      // Write errors (EPIPE) surface on the stdin 'error' listener, which rejects this request
+      worker.child.stdin.write(`${JSON.stringify({ id, method, params })}\n`);
+    });
+  }
+
+  close() {
+    this.closed = true;
+    for (const worker of this.workers) {
+      if (worker) {
+        worker.child.stdin.end();
+      }
+    }
+    this.workers = [];
+  }
+}
+
+module.exports = PythonWorkerPool;